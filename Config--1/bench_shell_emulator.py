@@ -0,0 +1,135 @@
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import zipfile
+from contextlib import redirect_stdout
+
+from shell_emulator import ls, cd, rm, rev, find, du, compact, get_index
+from vfs_backends import open_backend
+
+# Строка, из которой собирается содержимое синтетических файлов
+FILLER_LINE = b"The quick brown fox jumps over the lazy dog 0123456789\n"
+
+
+def directory_levels(depth, fanout):
+    # Пути каталогов дерева заданной глубины и ширины по уровням, последний уровень - листья
+    levels = [['']]
+    for _ in range(depth):
+        levels.append([f"{parent}d{i}/" for parent in levels[-1] for i in range(fanout)])
+    return levels
+
+
+def generate_archive(path, entries, depth=3, fanout=10, file_size=256, compression=zipfile.ZIP_DEFLATED):
+    # Файлы равномерно раскладываются по листовым каталогам дерева
+    levels = directory_levels(depth, fanout)
+    directories = [directory for level in levels[1:] for directory in level]
+    leaves = levels[-1]
+    content = (FILLER_LINE * (file_size // len(FILLER_LINE) + 1))[:file_size]
+    with zipfile.ZipFile(path, 'w', compression) as zip_archive:
+        for directory in directories:
+            zip_archive.writestr(directory, '')
+        for i in range(entries):
+            zip_archive.writestr(f"{leaves[i % len(leaves)]}f{i}.txt", content)
+    return leaves[0] + 'f0.txt'
+
+
+def measure(action, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        action()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def bench_archive(archive_path, sample_file, backend_kind, repeat):
+    sample_directory, sample_name = sample_file.rsplit('/', 1) if '/' in sample_file else ('', sample_file)
+    results = {}
+
+    def open_indexed():
+        backend = open_backend(archive_path, backend_kind)
+        get_index(backend)
+        backend.close()
+
+    results['open+index'] = measure(open_indexed, repeat)
+
+    backend = open_backend(archive_path, backend_kind)
+    get_index(backend)
+    with redirect_stdout(io.StringIO()):
+        results['ls /'] = measure(lambda: ls(backend, ''), repeat)
+        results['ls leaf'] = measure(lambda: ls(backend, sample_directory), repeat)
+        results['cd leaf'] = measure(lambda: cd(backend, '', sample_directory), repeat)
+        results['rev cold'] = measure(lambda: rev(backend, sample_directory, sample_name), 1)
+        results['rev warm'] = measure(lambda: rev(backend, sample_directory, sample_name), repeat)
+        results['find -name'] = measure(lambda: find(backend, '', '.', 'f1*.txt'), repeat)
+        results['du -s'] = measure(lambda: du(backend, '', '.', True), repeat)
+        if not backend.read_only:
+            results['rm'] = measure(lambda: rm(archive_path, backend, sample_directory, sample_name), 1)
+            results['sync'] = measure(lambda: compact(archive_path, backend), 1)
+    backend.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shell emulator commands on synthetic archives")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[1000, 10000, 100000], help="Entry counts of generated archives")
+    parser.add_argument("--depth", type=int, default=3, help="Directory tree depth")
+    parser.add_argument("--fanout", type=int, default=10, help="Subdirectories per directory")
+    parser.add_argument("--file-size", type=int, default=256, help="Size of every generated file in bytes")
+    parser.add_argument("--stored", action="store_true", help="Store files without compression")
+    parser.add_argument("--backend", choices=['zip', 'mmap', 'dir'], default='zip', help="Backend used to open archives")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per command")
+    parser.add_argument("--output", default="bench_results.json", help="Path of the JSON results file")
+    args = parser.parse_args()
+
+    compression = zipfile.ZIP_STORED if args.stored else zipfile.ZIP_DEFLATED
+    report = {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'depth': args.depth,
+        'fanout': args.fanout,
+        'file_size': args.file_size,
+        'compression': 'stored' if args.stored else 'deflated',
+        'results': [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for entries in args.sizes:
+            source_path = os.path.join(tmp_dir, f"source_{entries}.zip")
+            sample_file = generate_archive(source_path, entries, args.depth, args.fanout, args.file_size, compression)
+            # rm и sync изменяют архив, поэтому замеры идут на копии
+            if args.backend == 'dir':
+                archive_path = os.path.join(tmp_dir, f"bench_{entries}")
+                with zipfile.ZipFile(source_path) as zip_archive:
+                    zip_archive.extractall(archive_path)
+            else:
+                archive_path = os.path.join(tmp_dir, f"bench_{entries}.zip")
+                shutil.copyfile(source_path, archive_path)
+
+            archive_size = os.path.getsize(source_path)
+            for command, timings in bench_archive(archive_path, sample_file, args.backend, args.repeat).items():
+                report['results'].append({
+                    'entries': entries,
+                    'archive_bytes': archive_size,
+                    'command': command,
+                    'runs': len(timings),
+                    'seconds_min': min(timings),
+                    'seconds_median': statistics.median(timings),
+                })
+                print(f"{entries:>9} {command:<12} {min(timings) * 1000:10.3f} ms")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == '__main__':
+    main()
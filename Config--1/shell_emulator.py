@@ -1,80 +1,682 @@
-import zipfile
 import posixpath
 import io
 import os
 import argparse
+import asyncio
+import codecs
+import contextlib
+import contextvars
+import fnmatch
+import re
+import shlex
+import signal
+import sys
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from vfs_backends import VfsBackend, ZipBackend, BACKENDS, open_backend
 
-def ls(zip_archive, current_directory):
-    entries = set()
-    for info in zip_archive.infolist():
-        filename = info.filename.rstrip('/')
-        if current_directory:
-            if not filename.startswith(current_directory + '/'):
-                continue
-            path = filename[len(current_directory):].lstrip('/')
+# Индексы каталогов, построенные для открытых файловых систем
+_indexes = weakref.WeakKeyDictionary()
+
+# Атрибут zipfile.ZipFile с его оберткой: обертка ссылается на архив, поэтому в словаре со слабыми
+# ключами она удерживала бы архив вечно, а атрибут освобождается вместе с архивом
+BACKEND_ATTRIBUTE = '_vfs_backend'
+
+# Кэши распакованного содержимого файлов для открытых файловых систем
+_caches = weakref.WeakKeyDictionary()
+
+# Объем кэша содержимого по умолчанию, в байтах
+CONTENT_CACHE_SIZE = 64 * 1024 * 1024
+
+# Символы шаблонов в путях
+GLOB_MAGIC_REGEX = re.compile(r'[*?[]')
+
+# Размер блока при потоковом чтении файла командой rev
+REV_CHUNK_SIZE = 64 * 1024
+
+
+class Node:
+    __slots__ = ('name', 'is_dir', 'size', 'entry', 'children')
+
+    def __init__(self, name, is_dir, size=0, entry=None):
+        self.name = name
+        self.is_dir = is_dir
+        self.size = size
+        # Имя записи в архиве (у неявных каталогов записи нет)
+        self.entry = entry
+        self.children = {} if is_dir else None
+
+    def walk(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.is_dir:
+                stack.extend(node.children.values())
+
+
+class DirectoryIndex:
+    def __init__(self, entries):
+        self.root = Node('', True)
+        # Записи архива, удаленные командой rm, но еще не вычищенные из файла
+        self.tombstones = set()
+        for name, is_dir, size in entries:
+            self.add(name, is_dir, size)
+
+    def add(self, filename, is_dir, size=0):
+        parts = [part for part in filename.split('/') if part]
+        if not parts:
+            return
+        node = self.root
+        for part in parts[:-1]:
+            child = node.children.get(part)
+            if child is None or not child.is_dir:
+                child = node.children[part] = Node(part, True)
+            node = child
+        name = parts[-1]
+        child = node.children.get(name)
+        if child is not None and child.is_dir and is_dir:
+            # Явная запись для каталога, уже созданного неявно
+            child.entry = filename
         else:
-            path = filename
-        entry = path.split('/')[0]
-        entries.add(entry)
-    for entry in sorted(entries):
+            node.children[name] = Node(name, is_dir, size, filename)
+
+    def lookup(self, path):
+        node = self.root
+        for part in path.split('/'):
+            if not part:
+                continue
+            if not node.is_dir:
+                return None
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def remove(self, path):
+        parent_path, name = posixpath.split(path)
+        parent = self.lookup(parent_path)
+        if parent is None or not parent.is_dir:
+            return None
+        return parent.children.pop(name, None)
+
+    def match(self, path):
+        # Раскрывает шаблон пути за один проход, заходя только в подходящие каталоги.
+        # Компонент ** означает любое число вложенных каталогов, в том числе ни одного.
+        # Возвращает тройки (родительский каталог, узел, путь)
+        parts = [part for part in path.split('/') if part]
+        if not parts:
+            return []
+        frontier = [(None, self.root, '')]
+        for position, part in enumerate(parts):
+            matches = []
+            if part == '**':
+                # В середине пути ** дает сам каталог и все вложенные каталоги,
+                # в конце - все его содержимое на любой глубине
+                last = position == len(parts) - 1
+                for item in frontier:
+                    if item[1].is_dir:
+                        if not last:
+                            matches.append(item)
+                        matches.extend(self._descendants(item[1], item[2], directories_only=not last))
+                # Соседние ** не должны давать одну запись дважды
+                frontier = list({id(item[1]): item for item in matches}.values())
+                continue
+            for _, node, node_path in frontier:
+                if not node.is_dir:
+                    continue
+                if GLOB_MAGIC_REGEX.search(part):
+                    for name, child in node.children.items():
+                        if fnmatch.fnmatchcase(name, part):
+                            matches.append((node, child, posixpath.join(node_path, name)))
+                else:
+                    child = node.children.get(part)
+                    if child is not None:
+                        matches.append((node, child, posixpath.join(node_path, part)))
+            frontier = matches
+        return frontier
+
+    def _descendants(self, node, node_path, directories_only=False):
+        stack = [(node, node_path)]
+        while stack:
+            directory, directory_path = stack.pop()
+            for name, child in directory.children.items():
+                child_path = posixpath.join(directory_path, name)
+                if child.is_dir:
+                    stack.append((child, child_path))
+                elif directories_only:
+                    continue
+                yield directory, child, child_path
+
+
+def get_backend(vfs, zip_path=None):
+    if isinstance(vfs, VfsBackend):
+        return vfs
+    backend = getattr(vfs, BACKEND_ATTRIBUTE, None)
+    if backend is None:
+        backend = ZipBackend(vfs, zip_path)
+        setattr(vfs, BACKEND_ATTRIBUTE, backend)
+    elif zip_path is not None:
+        backend.path = zip_path
+    return backend
+
+
+class ContentCache:
+    # LRU-кэш распакованного содержимого файлов с ограничением по суммарному размеру
+    def __init__(self, max_bytes=CONTENT_CACHE_SIZE):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        # В режиме сервера кэш читают сеансы из разных потоков
+        self._lock = threading.Lock()
+
+    def get(self, name, load):
+        with self._lock:
+            data = self._items.get(name)
+            if data is not None:
+                self._items.move_to_end(name)
+                self.hits += 1
+                return data
+            self.misses += 1
+        data = load(name)
+        if len(data) <= self.max_bytes:
+            with self._lock:
+                if name not in self._items:
+                    self._items[name] = data
+                    self.size += len(data)
+                    self._evict()
+        return data
+
+    def invalidate(self, name):
+        with self._lock:
+            data = self._items.pop(name, None)
+            if data is not None:
+                self.size -= len(data)
+
+    def resize(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.max_bytes:
+            _, data = self._items.popitem(last=False)
+            self.size -= len(data)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._items)
+
+
+def get_cache(vfs):
+    backend = get_backend(vfs)
+    cache = _caches.get(backend)
+    if cache is None:
+        cache = _caches[backend] = ContentCache()
+    return cache
+
+
+def get_index(vfs):
+    backend = get_backend(vfs)
+    index = _indexes.get(backend)
+    if index is None:
+        index = _indexes[backend] = DirectoryIndex(backend.entries())
+    return index
+
+
+def resolve_path(current_directory, path):
+    return posixpath.normpath(posixpath.join('/', current_directory, path)).lstrip('/')
+
+
+def ls(vfs, current_directory):
+    node = get_index(vfs).lookup(current_directory)
+    if node is None or not node.is_dir:
+        return
+    for entry in sorted(node.children):
         print(entry)
 
-def cd(zip_archive, current_directory, path):
-    new_path = posixpath.normpath(posixpath.join('/', current_directory, path)).lstrip('/')
-    is_directory = False
-    for info in zip_archive.infolist():
-        filename = info.filename.rstrip('/')
-        if (filename == new_path or filename.startswith(new_path + '/')) and info.filename.endswith('/'):
-            is_directory = True
-            break
-    if is_directory:
+def cd(vfs, current_directory, path):
+    new_path = resolve_path(current_directory, path)
+    node = get_index(vfs).lookup(new_path)
+    if node is not None and node.is_dir:
         return new_path
     else:
         print(f"cd: {path}: Нет такого файла или каталога")
         return current_directory
 
-def rm(zip_path, zip_archive, current_directory, path):
-    target_path = posixpath.normpath(posixpath.join('/', current_directory, path)).lstrip('/')
-    found = False
-    for info in zip_archive.infolist():
-        filename = info.filename.rstrip('/')
-        if filename == target_path or filename.startswith(target_path + '/'):
-            found = True
-            break
+def rm(zip_path, vfs, current_directory, path):
+    # Каталог удаляется вместе с содержимым; для поиска на любой глубине служит компонент **
+    target_path = resolve_path(current_directory, path)
+    backend = get_backend(vfs, zip_path)
+    index = get_index(backend)
+    matches = index.match(target_path)
 
-    if not found:
+    if not matches:
         print(f"rm: {path}: Нет такого файла или каталога")
-        return zip_archive
-
-    new_zip_bytes = io.BytesIO()
-    with zipfile.ZipFile(new_zip_bytes, 'w') as new_zip:
-        for item in zip_archive.infolist():
-            item_filename = item.filename.rstrip('/')
-            if not (item_filename == target_path or item_filename.startswith(target_path + '/')):
-                new_zip.writestr(item, zip_archive.read(item.filename))
-    zip_archive.close()
-    with open(zip_path, 'wb') as f:
-        f.write(new_zip_bytes.getvalue())
-    return zipfile.ZipFile(zip_path, 'a')
-
-def rev(zip_archive, current_directory, filename):
-    file_path = posixpath.normpath(posixpath.join('/', current_directory, filename)).lstrip('/')
+        return vfs
+    if backend.read_only:
+        print(f"rm: {path}: Файловая система доступна только для чтения")
+        return vfs
+
+    cache = get_cache(backend)
+    # Совпадения внутри уже удаленного каталога (шаблон с **) повторно не обходятся
+    removed = set()
+    for parent, node, _ in matches:
+        if id(node) in removed:
+            continue
+        for child in node.walk():
+            removed.add(id(child))
+            if child.entry:
+                index.tombstones.add(child.entry)
+                cache.invalidate(child.entry)
+        parent.children.pop(node.name, None)
+    return vfs
+
+def find(vfs, current_directory, path='.', pattern=None):
+    node = get_index(vfs).lookup(resolve_path(current_directory, path))
+    if node is None:
+        print(f"find: {path}: Нет такого файла или каталога")
+        return
+    stack = [(node, path.rstrip('/') or '/')]
+    while stack:
+        node, node_path = stack.pop()
+        if pattern is None or fnmatch.fnmatchcase(node.name, pattern):
+            print(node_path)
+        if node.is_dir:
+            for name in sorted(node.children, reverse=True):
+                stack.append((node.children[name], posixpath.join(node_path, name)))
+
+def du(vfs, current_directory, path='.', summarize=False):
+    node = get_index(vfs).lookup(resolve_path(current_directory, path))
+    if node is None:
+        print(f"du: {path}: Нет такого файла или каталога")
+        return
+    node_path = path.rstrip('/') or '/'
+    if not node.is_dir:
+        print(f"{node.size}\t{node_path}")
+        return
+
+    # Обход в обратном порядке: размер каталога считается после размеров вложенных
+    totals = {}
+    stack = [(node, node_path, False)]
+    while stack:
+        directory, directory_path, visited = stack.pop()
+        if not visited:
+            stack.append((directory, directory_path, True))
+            for name in sorted(directory.children, reverse=True):
+                child = directory.children[name]
+                if child.is_dir:
+                    stack.append((child, posixpath.join(directory_path, name), False))
+            continue
+        total = 0
+        for child in directory.children.values():
+            total += totals.pop(id(child)) if child.is_dir else child.size
+        totals[id(directory)] = total
+        if not summarize:
+            print(f"{total}\t{directory_path}")
+    if summarize:
+        print(f"{totals[id(node)]}\t{node_path}")
+
+def compact(zip_path, vfs):
+    backend = get_backend(vfs, zip_path)
+    index = get_index(backend)
+    if not index.tombstones:
+        return vfs
+
+    failed = backend.compact(index.tombstones) or {}
+    # Неудаленные записи остаются в надгробиях, следующий sync попробует снова
+    index.tombstones.clear()
+    for name, error in failed.items():
+        print(f"sync: {name}: {error}")
+        index.tombstones.add(name)
+    if isinstance(vfs, VfsBackend):
+        return vfs
+    # Архив был переоткрыт, дальше команды работают с новым объектом ZipFile
+    setattr(backend.archive, BACKEND_ATTRIBUTE, backend)
+    return backend.archive
+
+def _rev_lines(member):
+    # Как rev из coreutils: каждая строка переворачивается отдельно
+    for line in io.TextIOWrapper(member, encoding='utf-8'):
+        if line.endswith('\n'):
+            line = line[:-1]
+        print(line[::-1])
+
+def _rev_whole(member, chunk_size):
+    # Перевернутые блоки складываются во временный файл и выводятся в обратном порядке,
+    # инкрементальный декодер не разрывает многобайтовые последовательности UTF-8
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    offsets = [0]
+    with tempfile.TemporaryFile() as spool:
+        while True:
+            data = member.read(chunk_size)
+            text = decoder.decode(data, final=not data)
+            if text:
+                spool.write(text[::-1].encode('utf-8'))
+                offsets.append(spool.tell())
+            if not data:
+                break
+        for start, end in zip(reversed(offsets[:-1]), reversed(offsets[1:])):
+            spool.seek(start)
+            print(spool.read(end - start).decode('utf-8'), end='')
+    print()
+
+def rev(vfs, current_directory, filename, whole=False, chunk_size=REV_CHUNK_SIZE):
+    node = get_index(vfs).lookup(resolve_path(current_directory, filename))
     try:
-        content = zip_archive.read(file_path).decode('utf-8')
-        print(content[::-1])
+        if node is None or node.is_dir:
+            raise KeyError(filename)
+        backend = get_backend(vfs)
+        cache = get_cache(backend)
+        if node.size <= cache.max_bytes:
+            member = io.BytesIO(cache.get(node.entry, backend.read))
+        else:
+            # Файлы больше кэша читаются потоком
+            member = backend.open(node.entry)
+        with member:
+            if whole:
+                _rev_whole(member, chunk_size)
+            else:
+                _rev_lines(member)
     except KeyError:
         print(f"rev: {filename}: Нет такого файла")
     except UnicodeDecodeError:
         print(f"rev: {filename}: Не удалось прочитать содержимое файла")
 
-def exit_shell(zip_archive):
-    zip_archive.close()
+def stats(vfs):
+    index = get_index(vfs)
+    cache = get_cache(vfs)
+    print(f"Кэш: попаданий {cache.hits}, промахов {cache.misses}, вытеснений {cache.evictions}")
+    print(f"Кэш: записей {len(cache)}, занято {cache.size} из {cache.max_bytes} байт")
+    print(f"Удаленных записей, ожидающих sync: {len(index.tombstones)}")
+
+def exit_shell(zip_path, vfs):
+    vfs = compact(zip_path, vfs)
+    vfs.close()
     exit()
 
+
+class ShellSession:
+    def __init__(self, computer_name, path, vfs):
+        self.computer_name = computer_name
+        self.path = path
+        self.vfs = vfs
+        self.current_directory = ''
+        self.running = True
+
+    def prompt(self):
+        prompt_directory = '/' + self.current_directory if self.current_directory else '/'
+        return f"{self.computer_name}:{prompt_directory}$ "
+
+
+def parse_command(command_input):
+    # Разбор строки команды; при ошибке выводит сообщение и возвращает None
+    try:
+        return shlex.split(command_input)
+    except ValueError as e:
+        print(f"Ошибка разбора команды: {e}")
+        return None
+
+
+def execute_command(session, command_input):
+    command_parts = parse_command(command_input)
+    if command_parts:
+        run_command(session, command_parts)
+
+
+def run_command(session, command_parts):
+    command, *args = command_parts
+
+    if command == 'exit':
+        session.running = False
+    elif command == 'ls':
+        ls(session.vfs, session.current_directory)
+    elif command == 'cd':
+        session.current_directory = cd(session.vfs, session.current_directory, args[0]) if args else ''
+    elif command == 'rm':
+        # Каталоги и так удаляются целиком, -r принимается для привычного синтаксиса
+        if args and args[0] in ('-r', '-R'):
+            args = args[1:]
+        if not args:
+            print("rm: Недостаточно аргументов")
+        for path in args:
+            session.vfs = rm(session.path, session.vfs, session.current_directory, path)
+    elif command == 'find':
+        pattern = None
+        if '-name' in args:
+            position = args.index('-name')
+            if position + 1 >= len(args):
+                print("find: Не указан шаблон для -name")
+                return
+            pattern = args[position + 1]
+            args = args[:position] + args[position + 2:]
+        find(session.vfs, session.current_directory, args[0] if args else '.', pattern)
+    elif command == 'du':
+        summarize = '-s' in args
+        args = [arg for arg in args if arg != '-s']
+        du(session.vfs, session.current_directory, args[0] if args else '.', summarize)
+    elif command == 'stats':
+        stats(session.vfs)
+    elif command in ('sync', 'compact'):
+        session.vfs = compact(session.path, session.vfs)
+    elif command == 'rev':
+        whole = bool(args) and args[0] in ('-w', '--whole')
+        if whole:
+            args = args[1:]
+        if args:
+            rev(session.vfs, session.current_directory, args[0], whole)
+        else:
+            print("rev: Недостаточно аргументов")
+    else:
+        print(f"{command}: Команда не найдена")
+
+
+def split_commands(text):
+    # Команды строки -c разделяются ';' и переводами строк вне кавычек, разделитель
+    # внутри кавычек или после обратной косой черты остается частью аргумента, как в shlex.split
+    commands = []
+    current = []
+    quote = None
+    escaped = False
+    for char in text:
+        if escaped:
+            escaped = False
+        elif char == '\\' and quote != "'":
+            escaped = True
+        elif quote is not None:
+            if char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char in ';\n':
+            commands.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    commands.append(''.join(current))
+    return commands
+
+
+def run_script(session, lines, timing=False):
+    # Пакетный режим: все команды выполняются над одним открытым архивом,
+    # а архив вычищается и сбрасывается на диск один раз в конце
+    started = time.perf_counter()
+    count = 0
+    for line in lines:
+        command_input = line.strip()
+        if not command_input or command_input.startswith('#'):
+            continue
+        command_started = time.perf_counter()
+        execute_command(session, command_input)
+        count += 1
+        if timing:
+            elapsed = time.perf_counter() - command_started
+            sys.stderr.write(f"{elapsed * 1000:.3f} ms\t{command_input}\n")
+        if not session.running:
+            break
+    session.vfs = compact(session.path, session.vfs)
+    if timing:
+        elapsed = time.perf_counter() - started
+        sys.stderr.write(f"Всего: {count} команд за {elapsed * 1000:.3f} ms\n")
+
+
+# Команды, изменяющие общую файловую систему, в режиме сервера выполняются монопольно
+WRITE_COMMANDS = {'rm', 'sync', 'compact'}
+
+# Буфер вывода текущего сеанса сервера
+_session_output = contextvars.ContextVar('session_output', default=None)
+
+
+class _SessionStdout:
+    # Подменяет sys.stdout в режиме сервера: print() из команд попадает в буфер своего сеанса
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        target = _session_output.get()
+        return (self._stream if target is None else target).write(text)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class ReadWriteLock:
+    # Читатели работают одновременно, писатель ждет их завершения и не пускает новых
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextlib.asynccontextmanager
+    async def reading(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._writer and not self._writers_waiting)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def writing(self):
+        async with self._condition:
+            self._writers_waiting += 1
+            await self._condition.wait_for(lambda: not self._writer and not self._readers)
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class ShellServer:
+    # Много сеансов оболочки над одной открытой файловой системой и одним индексом
+    def __init__(self, computer_name, path, vfs):
+        self.computer_name = computer_name
+        self.path = path
+        self.vfs = vfs
+        self.lock = ReadWriteLock()
+
+    async def execute(self, session, command_input):
+        output = io.StringIO()
+        # Строка разбирается один раз: по тем же частям выбирается блокировка и выполняется команда
+        token = _session_output.set(output)
+        try:
+            command_parts = parse_command(command_input)
+        finally:
+            _session_output.reset(token)
+        if not command_parts:
+            return output.getvalue()
+
+        def run():
+            _session_output.set(output)
+            try:
+                run_command(session, command_parts)
+            except Exception as e:
+                print(f"Ошибка: {e}")
+
+        if command_parts[0] in WRITE_COMMANDS:
+            async with self.lock.writing():
+                contextvars.copy_context().run(run)
+                self.vfs = session.vfs
+        else:
+            async with self.lock.reading():
+                if get_backend(self.vfs).thread_safe:
+                    await asyncio.to_thread(run)
+                else:
+                    contextvars.copy_context().run(run)
+        return output.getvalue()
+
+    async def handle(self, reader, writer):
+        session = ShellSession(self.computer_name, self.path, self.vfs)
+        try:
+            writer.write(session.prompt().encode('utf-8'))
+            await writer.drain()
+            while session.running:
+                line = await reader.readline()
+                if not line:
+                    break
+                session.vfs = self.vfs
+                output = await self.execute(session, line.decode('utf-8', 'replace').strip())
+                if session.running:
+                    output += session.prompt()
+                writer.write(output.encode('utf-8'))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self, address):
+        tcp_address = _parse_tcp_address(address)
+        if tcp_address is not None:
+            return await asyncio.start_server(self.handle, *tcp_address)
+        return await asyncio.start_unix_server(self.handle, path=address)
+
+
+def _parse_tcp_address(address):
+    # Адрес вида host:port открывает TCP-сокет, иначе это путь к Unix-сокету
+    host, _, port = address.rpartition(':')
+    if port.isdigit():
+        return host or '127.0.0.1', int(port)
+    return None
+
+
+async def serve(shell_server, address):
+    server = await shell_server.start(address)
+    sys.stderr.write(f"Сервер слушает {address}\n")
+    stopped = asyncio.Event()
+    with contextlib.suppress(NotImplementedError):
+        # Ctrl+C и SIGTERM завершают сервер штатно, с вычисткой архива
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(signal_number, stopped.set)
+    async with server:
+        await stopped.wait()
+    if _parse_tcp_address(address) is None:
+        with contextlib.suppress(OSError):
+            os.remove(address)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Virtual File System Shell")
     parser.add_argument("name", help="Set computer name for prompt display")
-    parser.add_argument("path", help="Set path to the virtual file system archive")
+    parser.add_argument("path", help="Set path to the virtual file system archive or directory")
+    parser.add_argument("script", nargs='?', help="Run commands from a script file instead of the interactive prompt")
+    parser.add_argument("-c", dest="commands", help="Run commands separated by ';' or newlines and exit")
+    parser.add_argument("-b", "--backend", choices=sorted(BACKENDS), help="Virtual file system backend (detected from the path by default)")
+    parser.add_argument("--cache-size", type=int, default=CONTENT_CACHE_SIZE, help="Byte budget of the decompressed file content cache")
+    parser.add_argument("--serve", metavar="ADDRESS", help="Serve shell sessions on a Unix socket path or host:port instead of running a local shell")
+    parser.add_argument("-t", "--timing", action="store_true", help="Report per-command timing to stderr in script mode")
     args = parser.parse_args()
 
     computer_name = args.name
@@ -84,37 +686,38 @@ def main():
         print(f"Ошибка: файл {zip_path} не найден.")
         return
 
-    zip_archive = zipfile.ZipFile(zip_path, 'a')
-    current_directory = ''
+    session = ShellSession(computer_name, zip_path, open_backend(zip_path, args.backend))
+    get_cache(session.vfs).resize(args.cache_size)
 
-    while True:
-        prompt_directory = '/' + current_directory if current_directory else '/'
-        prompt = f"{computer_name}:{prompt_directory}$ "
-        command_input = input(prompt).strip()
-        command_parts = command_input.split()
-        if not command_parts:
-            continue
-        command, *args = command_parts
-
-
-        if command == 'exit':
-            exit_shell(zip_archive)
-        elif command == 'ls':
-            ls(zip_archive, current_directory)
-        elif command == 'cd':
-            current_directory = cd(zip_archive, current_directory, args[0]) if args else ''
-        elif command == 'rm':
-            if args:
-                zip_archive = rm(zip_path, zip_archive, current_directory, args[0])
-            else:
-                print("rm: Недостаточно аргументов")
-        elif command == 'rev':
-            if args:
-                rev(zip_archive, current_directory, args[0])
-            else:
-                print("rev: Недостаточно аргументов")
-        else:
-            print(f"{command}: Команда не найдена")
+    if args.serve is not None:
+        shell_server = ShellServer(computer_name, zip_path, session.vfs)
+        sys.stdout = _SessionStdout(sys.stdout)
+        try:
+            asyncio.run(serve(shell_server, args.serve))
+        except KeyboardInterrupt:
+            pass
+        session.vfs = compact(zip_path, shell_server.vfs)
+    elif args.commands is not None:
+        run_script(session, split_commands(args.commands), args.timing)
+    elif args.script is not None:
+        with open(args.script, 'r', encoding='utf-8') as f:
+            run_script(session, f, args.timing)
+    elif not sys.stdin.isatty():
+        run_script(session, sys.stdin, args.timing)
+    else:
+        # Ctrl+C завершает работу так же, как exit: удаленные записи вычищаются из архива
+        try:
+            while session.running:
+                try:
+                    command_input = input(session.prompt()).strip()
+                except EOFError:
+                    break
+                execute_command(session, command_input)
+        except KeyboardInterrupt:
+            print()
+        exit_shell(session.path, session.vfs)
+        return
+    session.vfs.close()
 
 if __name__ == '__main__':
     main()
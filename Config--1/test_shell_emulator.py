@@ -1,6 +1,14 @@
+import asyncio
+import gc
+import sys
 import zipfile
+import tarfile
 import io
-from shell_emulator import ls, cd, rm, rev
+import os
+import tempfile
+from contextlib import redirect_stdout
+from shell_emulator import _indexes, ls, cd, rm, rev, find, du, compact, get_index, get_cache, ShellSession, execute_command, run_script, split_commands, ShellServer, _SessionStdout
+from vfs_backends import open_backend
 
 # Создаем виртуальный zip-файл в памяти
 def create_test_zip():
@@ -49,13 +57,11 @@ def test_rm():
     zip_archive = create_test_zip()
     current_directory = ''
 
-    # Удаление файла file1.txt
-    rm('filesystem.zip', zip_archive, current_directory, 'file1.txt')
-    try:
-        zip_archive.getinfo('file1.txt')
-        print("Ошибка: файл file1.txt должен был быть удален")
-    except KeyError:
-        print("Тест rm - удаление файла file1.txt прошло успешно")
+    # Удаление файла file1.txt скрывает его сразу, без перезаписи архива
+    zip_archive = rm('filesystem.zip', zip_archive, current_directory, 'file1.txt')
+    assert get_index(zip_archive).lookup('file1.txt') is None, "Ошибка: файл file1.txt должен был быть удален"
+    assert 'file1.txt' in get_index(zip_archive).tombstones, "Ошибка: для file1.txt не записано надгробие"
+    print("Тест rm - удаление файла file1.txt прошло успешно")
 
     # Попытка удаления несуществующего файла
     original_file_count = len(zip_archive.infolist())
@@ -65,6 +71,26 @@ def test_rm():
 
     zip_archive.close()
 
+# Тесты для compact
+def test_compact():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        zip_path = os.path.join(tmp_dir, 'fs.zip')
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_archive:
+            zip_archive.writestr('keep.txt', 'keep me ' * 100)
+            zip_archive.writestr('dir1/drop.txt', 'drop me')
+            zip_archive.writestr('dir1/keep2.txt', 'stored', compress_type=zipfile.ZIP_STORED)
+        zip_archive = zipfile.ZipFile(zip_path, 'a')
+
+        zip_archive = rm(zip_path, zip_archive, 'dir1', 'drop.txt')
+        zip_archive = compact(zip_path, zip_archive)
+        assert zip_archive.namelist() == ['keep.txt', 'dir1/keep2.txt'], "Ошибка: compact оставил удаленную запись"
+        assert zip_archive.testzip() is None, "Ошибка: после compact архив поврежден"
+        assert zip_archive.read('keep.txt') == b'keep me ' * 100, "Ошибка: содержимое keep.txt изменилось"
+        assert zip_archive.getinfo('keep.txt').compress_type == zipfile.ZIP_DEFLATED, "Ошибка: метод сжатия изменился"
+        assert not get_index(zip_archive).tombstones, "Ошибка: надгробия не очищены после compact"
+        zip_archive.close()
+    print("Тест compact - сжатие архива без перекодирования прошло успешно")
+
 # Тесты для rev
 def test_rev():
     zip_archive = create_test_zip()
@@ -80,6 +106,372 @@ def test_rev():
 
     zip_archive.close()
 
+    zip_bytes = io.BytesIO()
+    with zipfile.ZipFile(zip_bytes, 'w', zipfile.ZIP_DEFLATED) as zip_archive:
+        zip_archive.writestr('lines.txt', 'abc\nПривет, мир\n\nxyz')
+    zip_archive = zipfile.ZipFile(zip_bytes, 'r')
+
+    # Построчное реверсирование
+    output = io.StringIO()
+    with redirect_stdout(output):
+        rev(zip_archive, current_directory, 'lines.txt')
+    assert output.getvalue() == 'cba\nрим ,тевирП\n\nzyx\n', "Ошибка: неверное построчное реверсирование"
+
+    # Реверсирование всего файла блоками, разрезающими многобайтовые символы
+    output = io.StringIO()
+    with redirect_stdout(output):
+        rev(zip_archive, current_directory, 'lines.txt', whole=True, chunk_size=3)
+    assert output.getvalue() == 'zyx\n\nрим ,тевирП\ncba\n', "Ошибка: неверное реверсирование всего файла"
+    print("Тест rev - потоковое реверсирование прошло успешно")
+
+    zip_archive.close()
+
+# Тесты для индекса каталогов
+def test_index():
+    zip_bytes = io.BytesIO()
+    with zipfile.ZipFile(zip_bytes, 'w') as zip_archive:
+        zip_archive.writestr('a/b/c.txt', '12345')
+        zip_archive.writestr('a/d.txt', 'xyz')
+    zip_bytes.seek(0)
+    zip_archive = zipfile.ZipFile(zip_bytes, 'r')
+
+    index = get_index(zip_archive)
+    assert index is get_index(zip_archive), "Ошибка: индекс должен строиться один раз для архива"
+    assert index.lookup('a/b').is_dir, "Ошибка: неявный каталог a/b не найден в индексе"
+    assert index.lookup('a/b/c.txt').size == 5, "Ошибка: неверный размер файла в индексе"
+    assert index.lookup('a/d.txt/x') is None, "Ошибка: путь внутри файла не должен находиться"
+
+    # Переход в каталог без явной записи в архиве
+    assert cd(zip_archive, '', 'a/b') == 'a/b', "Ошибка: переход в неявный каталог a/b не выполнен"
+    assert cd(zip_archive, 'a', 'd.txt') == 'a', "Ошибка: переход в файл должен возвращать текущий каталог"
+    assert cd(zip_archive, 'a/b', '/') == '', "Ошибка: переход в корень не выполнен"
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        ls(zip_archive, 'a')
+    assert output.getvalue().split() == ['b', 'd.txt'], "Ошибка: неверное содержимое каталога a"
+
+    # Индекс должен оставаться корректным после rm
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        zip_archive = rm(os.path.join(tmp_dir, 'fs.zip'), zip_archive, 'a', 'b')
+        zip_archive = compact(os.path.join(tmp_dir, 'fs.zip'), zip_archive)
+        assert cd(zip_archive, 'a', 'b') == 'a', "Ошибка: удаленный каталог остался в индексе"
+        assert get_index(zip_archive).lookup('a/d.txt') is not None, "Ошибка: файл a/d.txt пропал из индекса"
+        zip_archive.close()
+
+    # Индексы закрытых архивов освобождаются вместе с ними
+    gc.collect()
+    indexes_before = len(_indexes)
+    for number in range(50):
+        zip_bytes = io.BytesIO()
+        with zipfile.ZipFile(zip_bytes, 'w') as archive:
+            archive.writestr(f'file{number}.txt', 'x')
+        archive = zipfile.ZipFile(zip_bytes, 'r')
+        get_index(archive)
+        get_cache(archive)
+        archive.close()
+    del archive
+    gc.collect()
+    assert len(_indexes) == indexes_before, "Ошибка: индексы закрытых архивов не освобождаются"
+    print("Тест индекса каталогов прошел успешно")
+
+# Тесты для find, du и rm с шаблонами
+def create_tree_zip():
+    zip_bytes = io.BytesIO()
+    with zipfile.ZipFile(zip_bytes, 'w') as zip_archive:
+        zip_archive.writestr('logs/', '')
+        zip_archive.writestr('logs/a.tmp', '1234')
+        zip_archive.writestr('logs/b.log', '12')
+        zip_archive.writestr('logs/old/c.tmp', '123')
+        zip_archive.writestr('keep.tmp', '1')
+    zip_bytes.seek(0)
+    return zipfile.ZipFile(zip_bytes, 'r')
+
+def test_find_du():
+    zip_archive = create_tree_zip()
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        find(zip_archive, '', 'logs', '*.tmp')
+    assert output.getvalue().split() == ['logs/a.tmp', 'logs/old/c.tmp'], "Ошибка: неверный результат find -name"
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        du(zip_archive, '', '/')
+        du(zip_archive, 'logs', '.', summarize=True)
+    assert output.getvalue().splitlines() == ['3\t/logs/old', '9\t/logs', '10\t/', '9\t.'], "Ошибка: неверный результат du"
+    print("Тест find и du прошел успешно")
+
+    zip_archive.close()
+
+def test_rm_patterns():
+    zip_archive = create_tree_zip()
+
+    # Шаблон раскрывается только в каталоге logs
+    rm(None, zip_archive, 'logs', '*.tmp')
+    index = get_index(zip_archive)
+    assert index.lookup('logs/a.tmp') is None, "Ошибка: logs/a.tmp должен был быть удален по шаблону"
+    assert index.lookup('logs/old/c.tmp') is not None, "Ошибка: rm без -r не должен заходить в подкаталоги"
+    assert index.lookup('keep.tmp') is not None, "Ошибка: rm удалил файл вне каталога logs"
+
+    # Компонент ** ищет на любой глубине
+    rm(None, zip_archive, '', 'logs/**/*.tmp')
+    assert index.lookup('logs/old/c.tmp') is None, "Ошибка: rm logs/**/*.tmp не удалил logs/old/c.tmp"
+    assert index.lookup('logs/b.log') is not None, "Ошибка: rm с ** удалил файл, не подходящий под шаблон"
+    assert index.tombstones == {'logs/a.tmp', 'logs/old/c.tmp'}, "Ошибка: неверный набор надгробий"
+
+    # ** в конце пути удаляет содержимое каталога, но не сам каталог
+    rm(None, zip_archive, '', 'logs/**')
+    assert index.lookup('logs') is not None and not index.lookup('logs').children, "Ошибка: rm logs/** удалил не только содержимое"
+    assert index.lookup('keep.tmp') is not None, "Ошибка: rm logs/** удалил файл вне каталога logs"
+    print("Тест rm с шаблонами прошел успешно")
+
+    zip_archive.close()
+
+def test_rm_recursive():
+    # rm -r удаляет только указанный путь с содержимым, одноименные записи в других каталогах остаются
+    zip_bytes = io.BytesIO()
+    with zipfile.ZipFile(zip_bytes, 'w') as zip_archive:
+        zip_archive.writestr('dir1/a.txt', '1')
+        zip_archive.writestr('other/dir1/keep.txt', '2')
+        zip_archive.writestr('other/a.txt', '3')
+        zip_archive.writestr('a.txt', '4')
+    zip_bytes.seek(0)
+    zip_archive = zipfile.ZipFile(zip_bytes, 'r')
+    session = ShellSession('test', None, zip_archive)
+    with redirect_stdout(io.StringIO()):
+        execute_command(session, 'rm -r dir1')
+        execute_command(session, 'rm -r a.txt')
+    index = get_index(zip_archive)
+    assert index.lookup('dir1') is None and index.lookup('a.txt') is None, "Ошибка: rm -r не удалил указанные записи"
+    assert index.lookup('other/dir1/keep.txt') is not None, "Ошибка: rm -r удалил одноименный каталог в другом месте"
+    assert index.lookup('other/a.txt') is not None, "Ошибка: rm -r удалил одноименный файл в другом месте"
+    assert index.tombstones == {'dir1/a.txt', 'a.txt'}, "Ошибка: неверный набор надгробий rm -r"
+    print("Тест rm -r прошел успешно")
+
+    zip_archive.close()
+
+# Тесты для кэша содержимого
+def test_content_cache():
+    zip_bytes = io.BytesIO()
+    with zipfile.ZipFile(zip_bytes, 'w', zipfile.ZIP_DEFLATED) as zip_archive:
+        zip_archive.writestr('a.txt', 'aaaa')
+        zip_archive.writestr('b.txt', 'bbbb')
+        zip_archive.writestr('big.txt', 'x' * 100)
+    zip_archive = zipfile.ZipFile(zip_bytes, 'r')
+    cache = get_cache(zip_archive)
+    cache.resize(8)
+
+    with redirect_stdout(io.StringIO()) as output:
+        rev(zip_archive, '', 'a.txt')
+        rev(zip_archive, '', 'a.txt')
+        rev(zip_archive, '', 'b.txt')
+        rev(zip_archive, '', 'big.txt')  # Больше кэша, читается потоком
+    assert output.getvalue().split() == ['aaaa', 'aaaa', 'bbbb', 'x' * 100], "Ошибка: кэш изменил вывод rev"
+    assert (cache.hits, cache.misses, cache.size) == (1, 2, 8), "Ошибка: неверные счетчики кэша"
+
+    with redirect_stdout(io.StringIO()):
+        rev(zip_archive, '', 'a.txt')
+    cache.resize(4)
+    assert cache.evictions == 1 and len(cache) == 1, "Ошибка: при уменьшении кэша вытеснена не самая старая запись"
+
+    rm(None, zip_archive, '', 'a.txt')
+    assert len(cache) == 0 and cache.size == 0, "Ошибка: rm не сбросил запись кэша"
+    print("Тест кэша содержимого прошел успешно")
+
+    zip_archive.close()
+
+# Тесты для пакетного режима
+def test_run_script():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        zip_path = os.path.join(tmp_dir, 'fs.zip')
+        with zipfile.ZipFile(zip_path, 'w') as zip_archive:
+            zip_archive.writestr('dir1/file1.txt', 'one')
+            zip_archive.writestr('dir1/file2.txt', 'two')
+            zip_archive.writestr('file3.txt', 'three')
+        session = ShellSession('test', zip_path, zipfile.ZipFile(zip_path, 'a'))
+
+        script = ["# комментарий", "cd dir1", "rm file1.txt", "", "rev file2.txt", "exit", "rm /file3.txt"]
+        output = io.StringIO()
+        with redirect_stdout(output):
+            run_script(session, script)
+        session.vfs.close()
+
+        assert output.getvalue() == 'owt\n', "Ошибка: неверный вывод пакетного режима"
+        assert session.current_directory == 'dir1', "Ошибка: cd в пакетном режиме не выполнен"
+        with zipfile.ZipFile(zip_path) as zip_archive:
+            assert zip_archive.namelist() == ['dir1/file2.txt', 'file3.txt'], "Ошибка: архив не сжат в конце сценария или команды после exit выполнены"
+
+        # Строка -c делится на команды по ';' вне кавычек
+        zip_path = os.path.join(tmp_dir, 'quoted.zip')
+        with zipfile.ZipFile(zip_path, 'w') as zip_archive:
+            zip_archive.writestr('a;b', 'ab')
+            zip_archive.writestr('c', 'c')
+        session = ShellSession('test', zip_path, zipfile.ZipFile(zip_path, 'a'))
+        commands = split_commands("rev 'a;b'; rev \"a;b\"\nrev a\\;b;ls")
+        assert commands == ["rev 'a;b'", ' rev "a;b"', 'rev a\\;b', 'ls'], "Ошибка: неверное разделение команд"
+        output = io.StringIO()
+        with redirect_stdout(output):
+            run_script(session, commands)
+        session.vfs.close()
+        assert output.getvalue() == 'ba\nba\nba\na;b\nc\n', "Ошибка: неверный вывод команд с ';' в аргументах"
+    print("Тест пакетного режима прошел успешно")
+
+# Тесты для источников файловой системы
+def check_backend(backend, can_remove=True):
+    output = io.StringIO()
+    with redirect_stdout(output):
+        ls(backend, 'dir1')
+        rev(backend, 'dir1', 'stored.txt')
+        rev(backend, 'dir1', 'deflated.txt')
+        rm(backend.path, backend, '', 'dir1/stored.txt')
+    lines = output.getvalue().splitlines()
+    assert lines[:4] == ['deflated.txt', 'stored.txt', 'derots', 'detalfed'], f"Ошибка: неверный вывод для {type(backend).__name__}"
+    if can_remove:
+        compact(backend.path, backend)
+        backend.close()
+        backend = open_backend(backend.path)
+        assert get_index(backend).lookup('dir1/stored.txt') is None, f"Ошибка: {type(backend).__name__} не удалил файл"
+        assert get_index(backend).lookup('dir1/deflated.txt') is not None, f"Ошибка: {type(backend).__name__} удалил лишнее"
+    else:
+        assert 'только для чтения' in lines[4], "Ошибка: rm должен отказывать для архива только для чтения"
+    backend.close()
+
+def test_backends():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        zip_path = os.path.join(tmp_dir, 'fs.zip')
+        with zipfile.ZipFile(zip_path, 'w') as zip_archive:
+            zip_archive.writestr('dir1/', '')
+            zip_archive.writestr('dir1/stored.txt', 'stored', compress_type=zipfile.ZIP_STORED)
+            zip_archive.writestr('dir1/deflated.txt', 'deflated', compress_type=zipfile.ZIP_DEFLATED)
+
+        host_dir = os.path.join(tmp_dir, 'host')
+        with zipfile.ZipFile(zip_path) as zip_archive:
+            zip_archive.extractall(host_dir)
+        tar_path = os.path.join(tmp_dir, 'fs.tar.gz')
+        with tarfile.open(tar_path, 'w:gz') as tar_archive:
+            tar_archive.add(os.path.join(host_dir, 'dir1'), 'dir1')
+
+        mmap_backend = open_backend(zip_path, 'mmap')
+        assert isinstance(mmap_backend.read('dir1/stored.txt'), memoryview), "Ошибка: несжатая запись должна отдаваться как memoryview"
+        assert bytes(mmap_backend.read('dir1/deflated.txt')) == b'deflated', "Ошибка: неверно распакована запись"
+        check_backend(mmap_backend, can_remove=False)
+
+        check_backend(open_backend(zip_path))
+        check_backend(open_backend(tar_path))
+        check_backend(open_backend(host_dir))
+
+        # После sync tar-архив перезаписан, оставшиеся записи читаются из нового файла
+        tar_path = os.path.join(tmp_dir, 'order.tar.gz')
+        with tarfile.open(tar_path, 'w:gz') as tar_archive:
+            for name, data in (('a.txt', b'first'), ('d/b.txt', b'hello')):
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar_archive.addfile(info, io.BytesIO(data))
+        backend = open_backend(tar_path)
+        get_cache(backend).resize(0)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            rm(tar_path, backend, '', 'a.txt')
+            compact(tar_path, backend)
+            rev(backend, '', 'd/b.txt')
+        backend.close()
+        assert output.getvalue() == 'olleh\n', "Ошибка: после sync tar-архива прочитаны неверные данные"
+
+        # Имена вида ./a.txt (tar czf x.tgz -C src .) индексируются без префикса ./
+        dot_path = os.path.join(tmp_dir, 'dot.tgz')
+        with tarfile.open(dot_path, 'w:gz') as tar_archive:
+            tar_archive.add(host_dir, '.')
+        backend = open_backend(dot_path)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            ls(backend, '')
+            rev(backend, cd(backend, '', 'dir1'), 'deflated.txt')
+            rm(dot_path, backend, '', 'dir1/deflated.txt')
+            compact(dot_path, backend)
+        backend.close()
+        assert output.getvalue().splitlines() == ['dir1', 'detalfed'], "Ошибка: неверный индекс tar-архива с именами ./"
+        with tarfile.open(dot_path) as tar_archive:
+            assert './dir1/deflated.txt' not in tar_archive.getnames(), "Ошибка: sync не удалил запись ./dir1/deflated.txt"
+            assert './dir1' in tar_archive.getnames(), "Ошибка: sync удалил лишнюю запись"
+
+        # Каталог с записями, которых нет в индексе (ссылка на каталог), удаляется целиком
+        tree_dir = os.path.join(tmp_dir, 'tree')
+        os.makedirs(os.path.join(tree_dir, 'd'))
+        os.makedirs(os.path.join(tree_dir, 'target'))
+        with open(os.path.join(tree_dir, 'd', 'f.txt'), 'w') as f:
+            f.write('f')
+        os.symlink(os.path.join(tree_dir, 'target'), os.path.join(tree_dir, 'd', 'link'))
+        backend = open_backend(tree_dir)
+        rm(None, backend, '', 'd')
+        with redirect_stdout(io.StringIO()):
+            compact(None, backend)
+        assert not os.path.exists(os.path.join(tree_dir, 'd')), "Ошибка: каталог со ссылкой не удален"
+        assert os.path.isdir(os.path.join(tree_dir, 'target')), "Ошибка: удален каталог, на который указывала ссылка"
+        assert not get_index(backend).tombstones, "Ошибка: надгробия не очищены"
+
+        # Ошибка удаления сообщается, запись остается в надгробиях до следующего sync
+        failed = backend.compact({'missing/', 'target'})
+        assert list(failed) == ['target'], "Ошибка: не сообщено о неудаленной записи"
+    print("Тест источников файловой системы прошел успешно")
+
+# Тесты для режима сервера
+async def talk(port, commands):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    replies = []
+    await reader.readuntil(b'$ ')
+    for command in commands:
+        writer.write(command.encode('utf-8') + b'\n')
+        await writer.drain()
+        replies.append((await reader.readuntil(b'$ ')).decode('utf-8'))
+    writer.close()
+    return replies
+
+async def run_server_sessions(shell_server):
+    server = await shell_server.start('127.0.0.1:0')
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        first, second = await asyncio.gather(
+            talk(port, ['cd dir1', 'ls', 'rev file2.txt']),
+            talk(port, ['ls', 'rev file1.txt']),
+        )
+        removal = await talk(port, ['rm file1.txt', 'ls'])
+    return first, second, removal
+
+def test_server():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        zip_path = os.path.join(tmp_dir, 'fs.zip')
+        with zipfile.ZipFile(zip_path, 'w') as zip_archive:
+            zip_archive.writestr('file1.txt', 'Hello, world!')
+            zip_archive.writestr('dir1/file2.txt', 'Python testing')
+        shell_server = ShellServer('test', zip_path, open_backend(zip_path))
+
+        old_stdout = sys.stdout
+        sys.stdout = _SessionStdout(old_stdout)
+        try:
+            first, second, removal = asyncio.run(run_server_sessions(shell_server))
+
+            # Команда в кавычках распознается как изменяющая и выполняется под блокировкой записи
+            shell_server = ShellServer('test', zip_path, shell_server.vfs)
+            writes = []
+            writing = shell_server.lock.writing
+            shell_server.lock.writing = lambda: writes.append(True) or writing()
+            session = ShellSession('test', zip_path, shell_server.vfs)
+
+            async def run_commands():
+                return [await shell_server.execute(session, command) for command in ("'rm' dir1/file2.txt", "rm 'dir1")]
+            quoted, broken = asyncio.run(run_commands())
+        finally:
+            sys.stdout = old_stdout
+        shell_server.vfs.close()
+    assert quoted == '' and writes == [True], "Ошибка: rm в кавычках выполнен без блокировки записи"
+    assert broken.startswith("Ошибка разбора команды"), "Ошибка: не выведена ошибка разбора команды"
+
+    assert first == ['test:/dir1$ ', 'file2.txt\ntest:/dir1$ ', 'gnitset nohtyP\ntest:/dir1$ '], "Ошибка: неверный вывод первого сеанса"
+    assert second == ['dir1\nfile1.txt\ntest:/$ ', '!dlrow ,olleH\ntest:/$ '], "Ошибка: неверный вывод второго сеанса"
+    assert removal == ['test:/$ ', 'dir1\ntest:/$ '], "Ошибка: rm в режиме сервера не применился к общему индексу"
+    print("Тест режима сервера прошел успешно")
+
 # Функция для запуска всех тестов
 def run_tests():
     print("Запуск тестов для ls")
@@ -91,9 +483,36 @@ def run_tests():
     print("\nЗапуск тестов для rm")
     test_rm()
 
+    print("\nЗапуск тестов для compact")
+    test_compact()
+
     print("\nЗапуск тестов для rev")
     test_rev()
 
+    print("\nЗапуск тестов для find и du")
+    test_find_du()
+
+    print("\nЗапуск тестов для rm с шаблонами")
+    test_rm_patterns()
+
+    print("\nЗапуск тестов для rm -r")
+    test_rm_recursive()
+
+    print("\nЗапуск тестов для кэша содержимого")
+    test_content_cache()
+
+    print("\nЗапуск тестов для пакетного режима")
+    test_run_script()
+
+    print("\nЗапуск тестов для источников файловой системы")
+    test_backends()
+
+    print("\nЗапуск тестов для режима сервера")
+    test_server()
+
+    print("\nЗапуск тестов для индекса каталогов")
+    test_index()
+
     # Вывод итогового сообщения
     print(f"\nВсе тесты завершены успешно!")
 
@@ -0,0 +1,387 @@
+import copy
+import io
+import mmap
+import os
+import shutil
+import struct
+import tarfile
+import zipfile
+import zlib
+
+# Размер блока при копировании и распаковке данных
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Записи центрального каталога ZIP
+CENTRAL_DIR_STRUCT = struct.Struct('<4s4B4HL2L5H2L')
+END_OF_DIR_STRUCT = struct.Struct('<4s4H2LH')
+ZIP64_LOCATOR_STRUCT = struct.Struct('<4sLQL')
+ZIP64_END_OF_DIR_STRUCT = struct.Struct('<4sQ2H2L4Q')
+
+
+class VfsBackend:
+    # Общий интерфейс источников виртуальной файловой системы для команд оболочки
+    read_only = False
+    # Можно ли читать записи одновременно из нескольких потоков
+    thread_safe = True
+
+    def entries(self):
+        # Последовательность (имя записи, признак каталога, размер)
+        raise NotImplementedError
+
+    def open(self, name):
+        raise NotImplementedError
+
+    def read(self, name):
+        with self.open(name) as member:
+            return member.read()
+
+    def compact(self, removed):
+        # Окончательно удаляет записи с именами из removed.
+        # Возвращает словарь неудаленных записей: имя -> сообщение об ошибке
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ZipBackend(VfsBackend):
+    def __init__(self, archive, path=None):
+        if not isinstance(archive, zipfile.ZipFile):
+            path = archive
+            archive = zipfile.ZipFile(archive, 'a')
+        self.archive = archive
+        self.path = path or archive.filename
+
+    def entries(self):
+        for info in self.archive.infolist():
+            yield info.filename, info.is_dir(), info.file_size
+
+    def open(self, name):
+        return self.archive.open(name)
+
+    def compact(self, removed):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            with zipfile.ZipFile(f, 'w') as new_zip:
+                for info in self.archive.infolist():
+                    if info.filename not in removed:
+                        _copy_zip_member(self.archive, info, new_zip)
+                new_zip.start_dir = f.tell()
+            f.flush()
+            os.fsync(f.fileno())
+        self.archive.close()
+        os.replace(temp_path, self.path)
+        self.archive = zipfile.ZipFile(self.path, 'a')
+
+    def close(self):
+        self.archive.close()
+
+
+def _strip_zip64_extra(extra):
+    # Убираем поле zip64 из extra, FileHeader() добавит его заново при необходимости
+    result = b''
+    while len(extra) >= 4:
+        header_id, size = struct.unpack('<HH', extra[:4])
+        if header_id != 1:
+            result += extra[:4 + size]
+        extra = extra[4 + size:]
+    return result
+
+
+def _copy_zip_member(zip_archive, info, new_zip):
+    # Сжатые данные копируются как есть, без распаковки и повторного сжатия
+    source = zip_archive.fp
+    source.seek(info.header_offset)
+    header = source.read(zipfile.sizeFileHeader)
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    source.seek(info.header_offset + zipfile.sizeFileHeader + name_length + extra_length)
+
+    new_info = copy.copy(info)
+    # Размеры и CRC известны заранее, дескриптор данных не нужен
+    new_info.flag_bits &= ~0x08
+    new_info.extra = _strip_zip64_extra(info.extra)
+    new_info.header_offset = new_zip.fp.tell()
+    new_zip.fp.write(new_info.FileHeader())
+
+    remaining = info.compress_size
+    while remaining:
+        chunk = source.read(min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Обрезанные данные записи {info.filename}")
+        new_zip.fp.write(chunk)
+        remaining -= len(chunk)
+
+    new_zip.filelist.append(new_info)
+    new_zip.NameToInfo[new_info.filename] = new_info
+
+
+class TarBackend(VfsBackend):
+    # Все extractfile() разделяют одну позицию в файле архива
+    thread_safe = False
+
+    def __init__(self, path):
+        self.path = path
+        self.archive = tarfile.open(path, 'r:*')
+        self._load_members()
+
+    def _load_members(self):
+        # TarInfo хранит смещение данных в файле архива, поэтому после перезаписи записи читаются заново
+        self._members = {}
+        for member in self.archive.getmembers():
+            name = _tar_member_name(member)
+            if name and (member.isdir() or member.isreg()):
+                self._members[name] = member
+
+    def entries(self):
+        for name, member in self._members.items():
+            yield name, member.isdir(), member.size
+
+    def open(self, name):
+        member = self._members[name]
+        if not member.isreg():
+            raise KeyError(name)
+        return self.archive.extractfile(member)
+
+    def _write_mode(self):
+        if self.path.endswith(('.tar.gz', '.tgz')):
+            return 'w:gz'
+        if self.path.endswith(('.tar.bz2', '.tbz2')):
+            return 'w:bz2'
+        if self.path.endswith(('.tar.xz', '.txz')):
+            return 'w:xz'
+        return 'w'
+
+    def compact(self, removed):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            with tarfile.open(fileobj=f, mode=self._write_mode()) as new_tar:
+                for member in self.archive.getmembers():
+                    if _tar_member_name(member) in removed:
+                        continue
+                    if member.isreg():
+                        new_tar.addfile(member, self.archive.extractfile(member))
+                    else:
+                        new_tar.addfile(member)
+            f.flush()
+            os.fsync(f.fileno())
+        self.archive.close()
+        os.replace(temp_path, self.path)
+        self.archive = tarfile.open(self.path, 'r:*')
+        self._load_members()
+
+    def close(self):
+        self.archive.close()
+
+
+def _tar_member_name(member):
+    # Архивы вида tar czf x.tgz -C src . хранят имена ./a.txt и сам каталог '.'
+    name = member.name
+    while name.startswith('./'):
+        name = name[2:]
+    return '' if name == '.' else name
+
+
+class DirectoryBackend(VfsBackend):
+    def __init__(self, path):
+        self.path = path
+
+    def entries(self):
+        stack = [('', self.path)]
+        while stack:
+            prefix, directory = stack.pop()
+            with os.scandir(directory) as it:
+                for entry in it:
+                    name = prefix + entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        yield name + '/', True, 0
+                        stack.append((name + '/', entry.path))
+                    elif entry.is_file():
+                        yield name, False, entry.stat().st_size
+
+    def open(self, name):
+        return open(os.path.join(self.path, *name.split('/')), 'rb')
+
+    def compact(self, removed):
+        # Вложенные записи длиннее родительских, поэтому сначала удаляются они. В каталоге могут
+        # остаться записи, которых нет в индексе (ссылки на каталоги, специальные файлы), поэтому
+        # каталог удаляется вместе с содержимым. Ошибка одной записи не прерывает остальные
+        failed = {}
+        for name in sorted(removed, key=len, reverse=True):
+            host_path = os.path.join(self.path, *name.rstrip('/').split('/'))
+            try:
+                if name.endswith('/'):
+                    shutil.rmtree(host_path)
+                else:
+                    os.remove(host_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                failed[name] = e.strerror or str(e)
+        return failed
+
+
+class _MemoryViewReader(io.RawIOBase):
+    def __init__(self, data):
+        self._data = data
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), len(self._data) - self._position)
+        buffer[:size] = self._data[self._position:self._position + size]
+        self._position += size
+        return size
+
+
+class _InflateReader(io.RawIOBase):
+    def __init__(self, data):
+        self._data = data
+        self._position = 0
+        self._inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+        self._pending = memoryview(b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            if self._inflater.eof or self._position >= len(self._data):
+                return 0
+            chunk = self._data[self._position:self._position + COPY_CHUNK_SIZE]
+            self._position += len(chunk)
+            self._pending = memoryview(self._inflater.decompress(chunk))
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class MmapZipBackend(VfsBackend):
+    # ZIP-архив только для чтения: центральный каталог разбирается один раз,
+    # несжатые записи отдаются срезами memoryview без копирования
+    read_only = True
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        self._zip_archive = None
+        # Имя записи -> (метод сжатия, сжатый размер, размер, смещение локального заголовка)
+        self._members = {}
+        self._read_central_directory()
+
+    def _read_central_directory(self):
+        data = self._map
+        end = data.rfind(b'PK\x05\x06', max(0, len(data) - 0xFFFF - END_OF_DIR_STRUCT.size))
+        if end < 0:
+            raise zipfile.BadZipFile(f"{self.path}: не найден конец центрального каталога")
+        _, _, _, _, count, _, offset, _ = END_OF_DIR_STRUCT.unpack_from(data, end)
+
+        locator = end - ZIP64_LOCATOR_STRUCT.size
+        if locator >= 0 and data[locator:locator + 4] == b'PK\x06\x07':
+            _, _, zip64_end, _ = ZIP64_LOCATOR_STRUCT.unpack_from(data, locator)
+            record = ZIP64_END_OF_DIR_STRUCT.unpack_from(data, zip64_end)
+            count, offset = record[7], record[9]
+
+        for _ in range(count):
+            record = CENTRAL_DIR_STRUCT.unpack_from(data, offset)
+            if record[0] != b'PK\x01\x02':
+                raise zipfile.BadZipFile(f"{self.path}: поврежден центральный каталог")
+            flag_bits, compress_type = record[5], record[6]
+            compress_size, file_size = record[10], record[11]
+            name_length, extra_length, comment_length = record[12], record[13], record[14]
+            header_offset = record[18]
+            offset += CENTRAL_DIR_STRUCT.size
+            raw_name = data[offset:offset + name_length]
+            name = raw_name.decode('utf-8' if flag_bits & 0x800 else 'cp437')
+            if 0xFFFFFFFF in (compress_size, file_size, header_offset):
+                extra = data[offset + name_length:offset + name_length + extra_length]
+                file_size, compress_size, header_offset = _read_zip64_extra(
+                    extra, file_size, compress_size, header_offset)
+            offset += name_length + extra_length + comment_length
+            self._members[name] = (compress_type, compress_size, file_size, header_offset)
+
+    def entries(self):
+        for name, (_, _, file_size, _) in self._members.items():
+            yield name, name.endswith('/'), file_size
+
+    def _member_data(self, name):
+        compress_type, compress_size, _, header_offset = self._members[name]
+        name_length, extra_length = struct.unpack_from('<HH', self._map, header_offset + 26)
+        start = header_offset + zipfile.sizeFileHeader + name_length + extra_length
+        return compress_type, self._view[start:start + compress_size]
+
+    def _fallback(self):
+        # Для редких методов сжатия (bzip2, lzma) используется zipfile
+        if self._zip_archive is None:
+            self._zip_archive = zipfile.ZipFile(self._file)
+        return self._zip_archive
+
+    def read(self, name):
+        compress_type, data = self._member_data(name)
+        if compress_type == zipfile.ZIP_STORED:
+            return data
+        if compress_type == zipfile.ZIP_DEFLATED:
+            return zlib.decompress(data, -zlib.MAX_WBITS)
+        return self._fallback().read(name)
+
+    def open(self, name):
+        compress_type, data = self._member_data(name)
+        if compress_type == zipfile.ZIP_STORED:
+            return io.BufferedReader(_MemoryViewReader(data))
+        if compress_type == zipfile.ZIP_DEFLATED:
+            return io.BufferedReader(_InflateReader(data))
+        return self._fallback().open(name)
+
+    def compact(self, removed):
+        if removed:
+            raise OSError(f"{self.path}: архив открыт только для чтения")
+
+    def close(self):
+        if self._zip_archive is not None:
+            self._zip_archive.close()
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # На срезы еще есть ссылки, отображение закроется сборщиком мусора
+            pass
+        self._file.close()
+
+
+def _read_zip64_extra(extra, file_size, compress_size, header_offset):
+    while len(extra) >= 4:
+        header_id, size = struct.unpack('<HH', extra[:4])
+        if header_id == 1:
+            values = list(struct.unpack(f'<{size // 8}Q', extra[4:4 + size - size % 8]))
+            if file_size == 0xFFFFFFFF:
+                file_size = values.pop(0)
+            if compress_size == 0xFFFFFFFF:
+                compress_size = values.pop(0)
+            if header_offset == 0xFFFFFFFF:
+                header_offset = values.pop(0)
+            break
+        extra = extra[4 + size:]
+    return file_size, compress_size, header_offset
+
+
+BACKENDS = {
+    'zip': ZipBackend,
+    'tar': TarBackend,
+    'dir': DirectoryBackend,
+    'mmap': MmapZipBackend,
+}
+
+
+def open_backend(path, kind=None):
+    if kind is None:
+        if os.path.isdir(path):
+            kind = 'dir'
+        elif zipfile.is_zipfile(path):
+            kind = 'zip'
+        else:
+            kind = 'tar'
+    return BACKENDS[kind](path)
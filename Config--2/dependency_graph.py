@@ -0,0 +1,224 @@
+import sys
+from array import array
+from collections.abc import Mapping
+
+# Способы объединения узлов перед отрисовкой: все версии пакета в один узел или все пакеты scope
+GROUPINGS = ("versions", "scopes")
+
+
+def node_label(name, version):
+    # Идентификатор узла: имя и версия пакета, интернируется один раз на весь процесс
+    return sys.intern(f"{name}@{version}")
+
+
+def split_label(label):
+    # Имена пакетов со scope сами начинаются с @, поэтому версия отделяется по последнему @;
+    # у объединенных при отрисовке узлов версии нет
+    index = label.rfind("@")
+    if index <= 0:
+        return label, ""
+    return label[:index], label[index + 1:]
+
+
+class DependencyGraph(Mapping):
+    # Компактный граф зависимостей: узлы - целые индексы интернированных меток name@version,
+    # ребра каждого узла - массив array('I') индексов зависимостей без повторов.
+    # Как отображение граф отдает метку узла -> список меток его зависимостей.
+    # Слушатели (например, потоковые writer-ы из graph_writers) получают каждый новый узел и ребро
+    def __init__(self, listeners=()):
+        self.ids = {}
+        self.labels = []
+        self.adjacency = []
+        self.roots = []
+        self.edge_count = 0
+        self.listeners = list(listeners)
+
+    def add_label(self, label):
+        node = self.ids.get(label)
+        if node is None:
+            node = self.ids[label] = len(self.labels)
+            self.labels.append(label)
+            self.adjacency.append(array('I'))
+            for listener in self.listeners:
+                listener.node(label)
+        return node
+
+    def add_node(self, name, version):
+        return self.add_label(node_label(name, version))
+
+    def add_root(self, node):
+        # Корни - прямые зависимости проекта, от них отсчитывается глубина при отрисовке
+        if node not in self.roots:
+            self.roots.append(node)
+
+    def add_edge(self, source, target):
+        # Степень узла невелика, линейная проверка по массиву дешевле отдельного множества ребер
+        edges = self.adjacency[source]
+        if target in edges:
+            return False
+        edges.append(target)
+        self.edge_count += 1
+        for listener in self.listeners:
+            listener.edge(self.labels[source], self.labels[target])
+        return True
+
+    def node(self, label):
+        return self.ids[label]
+
+    def package(self, node):
+        return split_label(self.labels[node])
+
+    def dependencies(self, node):
+        return self.adjacency[node]
+
+    def edges(self):
+        for source, targets in enumerate(self.adjacency):
+            for target in targets:
+                yield source, target
+
+    def versions(self, name):
+        # Все версии пакета, попавшие в граф
+        return [version for package, version in map(split_label, self.labels) if package == name]
+
+    def to_json(self):
+        return {"labels": self.labels, "adjacency": [list(targets) for targets in self.adjacency], "roots": self.roots}
+
+    def load_json(self, data):
+        # Добавляет узлы и ребра, сохраненные to_json(); слушатели получают их как при обходе
+        nodes = [self.add_label(sys.intern(label)) for label in data["labels"]]
+        for source, targets in zip(nodes, data["adjacency"]):
+            for target in targets:
+                self.add_edge(source, nodes[target])
+        for root in data["roots"]:
+            self.add_root(nodes[root])
+        return self
+
+    def __getitem__(self, label):
+        labels = self.labels
+        return [labels[target] for target in self.adjacency[self.ids[label]]]
+
+    def __contains__(self, label):
+        return label in self.ids
+
+    def __iter__(self):
+        return iter(self.labels)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __repr__(self):
+        return f"DependencyGraph(nodes={len(self.labels)}, edges={self.edge_count})"
+
+
+def node_depths(graph):
+    # Расстояние от ближайшего корня для каждого узла, -1 для недостижимых
+    depths = array('i', [-1]) * len(graph.labels)
+    level = list(dict.fromkeys(graph.roots))
+    for node in level:
+        depths[node] = 0
+    depth = 0
+    while level:
+        depth += 1
+        next_level = []
+        for node in level:
+            for target in graph.adjacency[node]:
+                if depths[target] < 0:
+                    depths[target] = depth
+                    next_level.append(target)
+        level = next_level
+    return depths
+
+
+def fit_depth(graph, max_nodes):
+    # Наибольшая глубина, при которой в графе остается не больше max_nodes узлов
+    counts = {}
+    for depth in node_depths(graph):
+        if depth >= 0:
+            counts[depth] = counts.get(depth, 0) + 1
+    total = 0
+    for depth in sorted(counts):
+        total += counts[depth]
+        if total > max_nodes:
+            return max(depth - 1, 0)
+    return None
+
+
+def _group_label(graph, node, group):
+    name, _ = graph.package(node)
+    if group == "versions":
+        return name
+    if group == "scopes" and name.startswith("@"):
+        return name.split("/")[0] + "/*"
+    return graph.labels[node]
+
+
+def reduce_graph(graph, depth=None, prune=(), collapse=(), group=None, roots=None):
+    # Уменьшенная копия графа для отрисовки: обход от корней не глубже depth уровней,
+    # пакеты из prune удаляются вместе с тем, что достижимо только через них,
+    # пакеты из collapse остаются листьями с числом скрытых за ними узлов,
+    # group объединяет версии пакета или пакеты одного scope в один узел;
+    # roots задает другие корни обхода, например прямые зависимости одного проекта
+    if roots is None:
+        roots = graph.roots
+    if group is not None and group not in GROUPINGS:
+        raise ValueError(f"Unknown grouping '{group}'")
+    prune, collapse = set(prune), set(collapse)
+    names = [split_label(label)[0] for label in graph.labels]
+    kept = bytearray(len(graph.labels))
+    expanded = bytearray(len(graph.labels))
+
+    roots = list(dict.fromkeys(roots))
+    level = [root for root in roots if names[root] not in prune]
+    for node in level:
+        kept[node] = 1
+    current = 0
+    while level and (depth is None or current < depth):
+        next_level = []
+        for node in level:
+            if names[node] in collapse:
+                continue
+            expanded[node] = 1
+            for target in graph.adjacency[node]:
+                if not kept[target] and names[target] not in prune:
+                    kept[target] = 1
+                    next_level.append(target)
+        level = next_level
+        current += 1
+
+    reduced = DependencyGraph()
+    mapping = {}
+    for node in range(len(graph.labels)):
+        if not kept[node]:
+            continue
+        label = _group_label(graph, node, group)
+        if names[node] in collapse:
+            hidden = _count_hidden(graph, node, kept)
+            if hidden:
+                label = f"{label} (+{hidden})"
+        mapping[node] = reduced.add_label(sys.intern(label))
+    for root in roots:
+        if root in mapping:
+            reduced.add_root(mapping[root])
+    for node, new_node in mapping.items():
+        if not expanded[node]:
+            continue
+        for target in graph.adjacency[node]:
+            new_target = mapping.get(target)
+            if new_target is not None and new_target != new_node:
+                reduced.add_edge(new_node, new_target)
+    return reduced
+
+
+def _count_hidden(graph, start, kept):
+    # Число узлов, достижимых из start, которые не попали в уменьшенный граф
+    seen = {start}
+    stack = [start]
+    hidden = 0
+    while stack:
+        for target in graph.adjacency[stack.pop()]:
+            if target not in seen:
+                seen.add(target)
+                stack.append(target)
+                if not kept[target]:
+                    hidden += 1
+    return hidden
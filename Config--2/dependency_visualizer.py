@@ -1,9 +1,71 @@
+import argparse
+import hashlib
 import json
+import os
+import tempfile
+import time
 import toml
 import requests
 import subprocess
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 from graphviz import Digraph
+from requests.adapters import HTTPAdapter
 import re
+from npm_semver import pick_version, sort_versions
+from dependency_graph import DependencyGraph, GROUPINGS, fit_depth, node_label, reduce_graph
+from graph_writers import EXTENSIONS, WRITERS, open_graph_writer, write_graph
+from lockfiles import load_lockfile
+from instrumentation import Metrics
+from fetch_scheduler import FetchScheduler, RetryPolicy, DEFAULT_BACKOFF, DEFAULT_MAX_DELAY, DEFAULT_RETRIES, DEFAULT_TIMEOUT
+from graph_queries import (GraphIndex, closure_size, fan_ranking, find_cycles, find_nodes, load_graph,
+                           longest_path, reverse_dependencies, shortest_path)
+
+
+# Число параллельных запросов к репозиторию по умолчанию
+DEFAULT_WORKERS = 8
+
+# Сессия HTTP рабочего потока: requests.Session не потокобезопасен,
+# поэтому каждый поток держит свое keep-alive соединение
+_thread_state = threading.local()
+
+# Время жизни закэшированных метаданных для версии latest, в секундах
+DEFAULT_LATEST_TTL = 3600
+
+# Каталог дискового кэша метаданных по умолчанию
+DEFAULT_CACHE_DIR = ".registry_cache"
+
+# Точная версия x.y.z с необязательными pre-release и build частями
+EXACT_VERSION_REGEX = re.compile(r"^\d+\.\d+\.\d+(-[0-9A-Za-z.-]+)?(\+[0-9A-Za-z.-]+)?$")
+
+# Сокращенные метаданные пакета: только версии, их зависимости и dist-tags
+PACKUMENT_ACCEPT = "application/vnd.npm.install-v1+json; q=1.0, application/json; q=0.8"
+
+# Дисковый кэш, которым пользуется fetch_dependencies (настраивается в main)
+registry_cache = None
+
+# Наибольшее число узлов, которое передается в dot для раскладки
+DEFAULT_MAX_RENDER_NODES = 2000
+
+# Метрики обхода (настраиваются в main)
+metrics = Metrics()
+
+# Таймауты, повторы и предел одновременных запросов к репозиторию (настраиваются в main)
+scheduler = FetchScheduler(limit=DEFAULT_WORKERS)
+
+# Формат файла снимка графа; снимок другого формата игнорируется
+SNAPSHOT_FORMAT = 1
+
+# Результат fetch_dependencies, если зависимости получить не удалось: ведет себя как пустой словарь,
+# но отличается от настоящего отсутствия зависимостей и не попадает в ResolutionTable
+UNAVAILABLE = MappingProxyType({})
+
+# Разобранные packument-ы за время работы процесса: (repository_url, pkg) -> Packument
+_packuments = {}
+_packument_locks = {}
+_packuments_lock = threading.Lock()
 
 
 def load_config(config_path):
@@ -27,49 +89,413 @@ def normalize_version(version):
     return "latest"
 
 
-def fetch_dependencies(pkg, version="latest", repository_url="https://registry.npmjs.org"):
-    url = f"{repository_url}/{pkg}/{version}"
-    response = requests.get(url)
-    
+class RegistryCache:
+    # Дисковый кэш метаданных пакетов: один JSON-файл на URL запроса.
+    # Опубликованные версии npm неизменяемы, поэтому точные версии не устаревают,
+    # а записи для latest перепроверяются условным запросом с ETag по истечении TTL
+    def __init__(self, path=DEFAULT_CACHE_DIR, latest_ttl=DEFAULT_LATEST_TTL, offline=False):
+        self.path = path
+        self.latest_ttl = latest_ttl
+        self.offline = offline
+        os.makedirs(path, exist_ok=True)
+
+    def _entry_path(self, url):
+        return os.path.join(self.path, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def load(self, url):
+        try:
+            with open(self._entry_path(url), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return entry if entry.get("url") == url and "data" in entry else None
+
+    def is_fresh(self, entry, immutable):
+        return immutable or time.time() - entry["fetched_at"] < self.latest_ttl
+
+    def store(self, url, data, etag=None):
+        entry = {"url": url, "etag": etag, "fetched_at": time.time(), "data": data}
+        # Запись через временный файл, чтобы параллельные потоки и процессы не видели половину JSON
+        fd, temp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(temp_path, self._entry_path(url))
+        return entry
+
+
+def create_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _init_worker(sessions):
+    _thread_state.session = create_session()
+    sessions.append(_thread_state.session)
+
+
+def _fetch_json(url, label, immutable, extract, cache=None, accept=None):
+    # Загружает JSON из репозитория через дисковый кэш; extract оставляет от ответа только нужное
+    cache = cache if cache is not None else registry_cache
+    entry = cache.load(url) if cache is not None else None
+    if entry is not None and (cache.offline or cache.is_fresh(entry, immutable)):
+        metrics.count("cache_hits")
+        return entry["data"]
+    if cache is not None:
+        metrics.count("cache_revalidations" if entry is not None else "cache_misses")
+    if cache is not None and cache.offline:
+        print(f"Failed to fetch {label}: not cached (offline mode)")
+        metrics.count("failures")
+        return None
+
+    headers = {}
+    if accept:
+        headers["Accept"] = accept
+    if entry is not None and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    http = getattr(_thread_state, "session", None) or requests
+    response = scheduler.send(http.get, url, headers or None, label, metrics)
+    if response is None:
+        metrics.count("failures")
+        return None
+
+    if response.status_code == 304 and entry is not None:
+        # Метаданные не изменились, продлеваем срок жизни записи
+        metrics.count("not_modified")
+        return cache.store(url, entry["data"], entry["etag"])["data"]
     if response.status_code == 200:
         try:
-            package_data = response.json()
-            return package_data.get("dependencies", {})
+            data = extract(response.json())
         except json.JSONDecodeError:
-            print(f"Failed to parse response for {pkg}@{version}")
-            return {}
+            print(f"Failed to parse response for {label}")
+            metrics.count("failures")
+            return None
+        if cache is not None:
+            cache.store(url, data, response.headers.get("ETag"))
+        return data
     else:
-        print(f"Failed to fetch {pkg}@{version}")
-        return {}
+        print(f"Failed to fetch {label}: HTTP {response.status_code}")
+        metrics.count("failures")
+        return None
+
+
+class Packument:
+    # Все версии пакета с их зависимостями; список версий разбирается и сортируется один раз
+    def __init__(self, dist_tags, versions):
+        self.dist_tags = dist_tags
+        self.versions = versions
+        self.sorted_versions = sort_versions(versions)
+
+
+def _reduce_packument(package_data):
+    return {
+        "dist-tags": package_data.get("dist-tags", {}),
+        "versions": {version: meta.get("dependencies", {}) for version, meta in package_data.get("versions", {}).items()},
+    }
+
+
+def fetch_packument(pkg, repository_url="https://registry.npmjs.org", cache=None):
+    key = (repository_url, pkg)
+    with _packuments_lock:
+        if key in _packuments:
+            return _packuments[key]
+        lock = _packument_locks.setdefault(key, threading.Lock())
+    # Несколько потоков, одновременно запросивших один пакет, дожидаются одной загрузки
+    with lock:
+        if key not in _packuments:
+            url = f"{repository_url}/{pkg.replace('/', '%2f')}"
+            data = _fetch_json(url, pkg, False, _reduce_packument, cache, PACKUMENT_ACCEPT)
+            _packuments[key] = Packument(data["dist-tags"], data["versions"]) if data is not None else None
+        return _packuments[key]
+
+
+def lookup_version(pkg, spec, repository_url="https://registry.npmjs.org", cache=None, fetch=True):
+    # Точная версия не требует запросов, диапазоны и теги разрешаются по packument пакета.
+    # С fetch=False packument не загружается. None - версию определить не удалось
+    spec = spec.strip()
+    exact = spec.lstrip("=v")
+    if EXACT_VERSION_REGEX.match(exact):
+        return exact
+    packument = fetch_packument(pkg, repository_url, cache) if fetch else _packuments.get((repository_url, pkg))
+    if packument is None:
+        return None
+    if spec in packument.dist_tags:
+        return packument.dist_tags[spec]
+    try:
+        return pick_version(packument.sorted_versions, spec, packument.dist_tags.get("latest"))
+    except ValueError:
+        # Не диапазон semver (git, file:, псевдоним npm:)
+        return None
 
 
-def collect_dependencies(dependencies, repository_url, max_depth, all_dependencies=None, visited=None, depth=1):
-    if all_dependencies is None:
-        all_dependencies = {}
+def resolve_version(pkg, spec, repository_url="https://registry.npmjs.org", cache=None, fetch=True):
+    # Если версию определить не удалось, берется версия из самого диапазона (с fetch=False - сам диапазон)
+    version = lookup_version(pkg, spec, repository_url, cache, fetch)
+    if version is not None:
+        return version
+    return normalize_version(spec.strip()) if fetch else spec.strip()
+
+
+def fetch_dependencies(pkg, version="latest", repository_url="https://registry.npmjs.org", cache=None):
+    # Если packument пакета уже загружен, зависимости версии берутся из него без запроса
+    packument = _packuments.get((repository_url, pkg))
+    if packument is not None and version in packument.versions:
+        metrics.count("packument_hits")
+        return packument.versions[version]
+    url = f"{repository_url}/{pkg}/{version}"
+    immutable = bool(EXACT_VERSION_REGEX.match(version))
+    dependencies = _fetch_json(url, f"{pkg}@{version}", immutable, lambda data: data.get("dependencies", {}), cache)
+    return dependencies if dependencies is not None else UNAVAILABLE
+
+
+class ResolutionTable:
+    # Результаты обхода, которые можно переиспользовать: (пакет, диапазон) -> версия
+    # и name@version -> зависимости версии. Таблицу сохраняет снимок графа между запусками;
+    # неудачные разрешения и запросы в нее не попадают и повторяются при следующем обходе
+    def __init__(self, resolutions=None, manifests=None):
+        self.resolutions = resolutions if resolutions is not None else {}
+        self.manifests = manifests if manifests is not None else {}
+        self.failures = 0
+
+    def resolve(self, pkg, spec, repository_url, fetch=True):
+        version = self.resolutions.get((pkg, spec))
+        if version is not None:
+            metrics.count("resolution_table_hits")
+        else:
+            version = lookup_version(pkg, spec, repository_url, fetch=fetch)
+            if version is None:
+                if not fetch:
+                    return spec.strip()
+                self.failures += 1
+                return normalize_version(spec.strip())
+            self.resolutions[(pkg, spec)] = version
+        return version
+
+    def dependencies(self, pkg, version, repository_url):
+        label = node_label(pkg, version)
+        dependencies = self.manifests.get(label)
+        if dependencies is not None:
+            metrics.count("manifest_table_hits")
+        else:
+            dependencies = fetch_dependencies(pkg, version, repository_url)
+            if dependencies is UNAVAILABLE:
+                self.failures += 1
+            else:
+                self.manifests[label] = dependencies
+        return dependencies
+
+    def to_json(self, graph):
+        # В снимок попадают только записи, относящиеся к узлам графа
+        return {
+            "resolutions": [[pkg, spec, version] for (pkg, spec), version in self.resolutions.items()
+                            if node_label(pkg, version) in graph],
+            "manifests": {label: deps for label, deps in self.manifests.items() if label in graph},
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls({(pkg, spec): version for pkg, spec, version in data["resolutions"]}, dict(data["manifests"]))
+
+
+def collect_dependencies(dependencies, repository_url, max_depth, graph=None, visited=None, depth=1,
+                         workers=DEFAULT_WORKERS, frontier=None, table=None, executor=None):
+    if graph is None:
+        graph = DependencyGraph()
     if visited is None:
         visited = set()
+    if table is None:
+        table = ResolutionTable()
+    failures = table.failures
 
-    if depth > max_depth:
-        return all_dependencies
+    # Обход в ширину по уровням: фронт - ребра (родитель, пакет, диапазон версий), корни без родителя.
+    # Узлы различаются по name@version, поэтому разные версии одного пакета не теряются
+    if frontier is None:
+        frontier = [(None, pkg, spec) for pkg, spec in dependencies.items()]
+    # Переданный пул (например, общий для пакетного режима) не закрывается
+    sessions = []
+    pool = nullcontext(executor) if executor is not None else \
+        ThreadPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(sessions,))
+    with pool as executor:
+        while frontier and depth <= max_depth:
+            # Сначала параллельно разрешаются версии, каждая пара (пакет, диапазон) - один раз
+            specs = list(dict.fromkeys((pkg, spec) for _, pkg, spec in frontier))
+            with metrics.phase("resolve versions", depth=depth, specs=len(specs)):
+                resolved = dict(zip(specs, executor.map(
+                    lambda item: table.resolve(item[0], item[1], repository_url), specs)))
 
-    for pkg, version in dependencies.items():
-        if pkg in visited:
-            continue
-        visited.add(pkg)
+            level = []
+            for parent, pkg, spec in frontier:
+                node = graph.add_node(pkg, resolved[(pkg, spec)])
+                if parent is None:
+                    graph.add_root(node)
+                else:
+                    graph.add_edge(parent, node)
+                if node not in visited:
+                    visited.add(node)
+                    level.append(node)
 
-        normalized_version = normalize_version(version)
-        
-        # Добавление зависимостей пакета
-        if pkg not in all_dependencies:
-            all_dependencies[pkg] = []
+            # Затем параллельно загружаются зависимости новых узлов уровня
+            with metrics.phase("fetch dependencies", depth=depth, packages=len(level)):
+                results = list(executor.map(
+                    lambda node: table.dependencies(*graph.package(node), repository_url), level))
+            frontier = [(node, dep, dep_spec) for node, deps in zip(level, results) for dep, dep_spec in deps.items()]
+            depth += 1
 
-        deps = fetch_dependencies(pkg, normalized_version, repository_url)
-        all_dependencies[pkg].extend(deps.keys())
-        
-        # Рекурсивно собираем зависимости с учетом глубины
-        collect_dependencies(deps, repository_url, max_depth, all_dependencies, visited, depth + 1)
+    for session in sessions:
+        session.close()
 
-    return all_dependencies
+    # Пакеты за пределами max_depth попадают в граф листьями, без новых запросов к репозиторию
+    for parent, pkg, spec in frontier:
+        node = graph.add_node(pkg, table.resolve(pkg, spec, repository_url, fetch=False))
+        if parent is None:
+            graph.add_root(node)
+        else:
+            graph.add_edge(parent, node)
+    if table.failures > failures:
+        print(f"Warning: {table.failures - failures} registry requests failed after retries, "
+              f"the graph is missing their dependencies")
+    return graph
+
+
+def load_project(manifest_path):
+    # Манифест проекта: файл package.json или каталог, в котором он лежит
+    if os.path.isdir(manifest_path):
+        manifest_path = os.path.join(manifest_path, "package.json")
+    with open(manifest_path, 'r') as f:
+        data = json.load(f)
+    name = data.get("name") or os.path.basename(os.path.dirname(os.path.abspath(manifest_path)))
+    return name, load_dependencies(manifest_path)
+
+
+def collect_batch_dependencies(projects, repository_url, max_depth, workers=DEFAULT_WORKERS, table=None):
+    # Все проекты обходятся одним обходом от объединения их корней: каждая пара (пакет, диапазон)
+    # разрешается и каждая версия загружается один раз. Граф проекта затем вырезается из общего
+    # обходом от его корней на ту же глубину и совпадает с графом отдельного запуска
+    if table is None:
+        table = ResolutionTable()
+    frontier = [(None, pkg, spec) for dependencies in projects.values() for pkg, spec in dependencies.items()]
+    merged = DependencyGraph()
+    sessions = []
+    with ThreadPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(sessions,)) as executor:
+        collect_dependencies({}, repository_url, max_depth, merged, workers=workers, frontier=frontier,
+                             table=table, executor=executor)
+    for session in sessions:
+        session.close()
+
+    # Корни уже разрешены общим обходом, их версии берутся из таблицы
+    project_roots = {
+        name: [merged.add_node(pkg, table.resolve(pkg, spec, repository_url, fetch=max_depth >= 1))
+               for pkg, spec in dependencies.items()]
+        for name, dependencies in projects.items()
+    }
+    graphs = {name: reduce_graph(merged, max_depth, roots=roots) for name, roots in project_roots.items()}
+    return merged, graphs
+
+
+def load_snapshot(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return snapshot if snapshot.get("format") == SNAPSHOT_FORMAT else None
+
+
+def save_snapshot(path, inputs, graph, table):
+    # Граф, при построении которого были ошибки, не считается готовым и будет пересчитан
+    snapshot = {"format": SNAPSHOT_FORMAT, "inputs": inputs, "complete": table.failures == 0, "graph": graph.to_json()}
+    snapshot.update(table.to_json(graph))
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(temp_path, path)
+
+
+def rebuild_dependencies(dependencies, repository_url, max_depth, snapshot_path, graph=None, workers=DEFAULT_WORKERS):
+    # Построение графа с учетом снимка предыдущего запуска. Если входные данные не изменились,
+    # граф берется из снимка целиком. Иначе обход повторяется в памяти по сохраненной таблице
+    # разрешений, и в репозиторий уходят только запросы для новых диапазонов и версий
+    if graph is None:
+        graph = DependencyGraph()
+    inputs = {"dependencies": dependencies, "repository_url": repository_url, "max_depth": max_depth}
+    snapshot = load_snapshot(snapshot_path)
+    table = None
+    if snapshot is not None and snapshot["inputs"]["repository_url"] == repository_url:
+        table = ResolutionTable.from_json(snapshot)
+        if snapshot["inputs"] == inputs and snapshot["complete"]:
+            graph.load_json(snapshot["graph"])
+            return graph
+    if table is None:
+        table = ResolutionTable()
+    collect_dependencies(dependencies, repository_url, max_depth, graph, workers=workers, table=table)
+    save_snapshot(snapshot_path, inputs, graph, table)
+    return graph
+
+
+def _is_optional(lockfile, location, pkg):
+    entry = lockfile.entries.get(location if location is not None else "")
+    return entry is not None and pkg in entry.optional
+
+
+def collect_lockfile_dependencies(lockfile, repository_url, max_depth, dependencies=None, workers=DEFAULT_WORKERS,
+                                  graph=None):
+    # Граф строится по lock-файлу без запросов; в репозиторий уходят только пакеты, которых в нем нет
+    if isinstance(lockfile, str):
+        lockfile = load_lockfile(lockfile)
+    if dependencies is None:
+        dependencies = lockfile.root_dependencies()
+    if dependencies is None:
+        raise ValueError("Lock-файл не содержит корневого проекта, нужен список зависимостей")
+
+    if graph is None:
+        graph = DependencyGraph()
+    visited = set()
+    missing = {}
+    # Фронт - (родительский узел, его место в lock-файле, пакет, диапазон версий)
+    frontier = [(None, None, pkg, spec) for pkg, spec in dependencies.items()]
+    depth = 1
+    while frontier and depth <= max_depth:
+        next_frontier = []
+        for parent, parent_location, pkg, spec in frontier:
+            location = lockfile.find(parent_location, pkg, spec)
+            if location is None:
+                # Необязательные зависимости для других платформ в lock-файл не попадают
+                if not _is_optional(lockfile, parent_location, pkg):
+                    missing.setdefault(depth, []).append((parent, pkg, spec))
+                continue
+            entry = lockfile.entries[location]
+            node = graph.add_node(entry.name, entry.version)
+            if parent is None:
+                graph.add_root(node)
+            else:
+                graph.add_edge(parent, node)
+            if node not in visited:
+                visited.add(node)
+                next_frontier.extend((node, location, dep, dep_spec) for dep, dep_spec in entry.dependencies.items())
+        frontier = next_frontier
+        depth += 1
+
+    # Пакеты за пределами max_depth становятся листьями
+    for parent, parent_location, pkg, spec in frontier:
+        location = lockfile.find(parent_location, pkg, spec)
+        if location is not None:
+            entry = lockfile.entries[location]
+            node = graph.add_node(entry.name, entry.version)
+        elif not _is_optional(lockfile, parent_location, pkg):
+            node = graph.add_node(pkg, resolve_version(pkg, spec, repository_url, fetch=False))
+        else:
+            continue
+        if parent is None:
+            graph.add_root(node)
+        else:
+            graph.add_edge(parent, node)
+
+    for depth, edges in sorted(missing.items()):
+        collect_dependencies({}, repository_url, max_depth, graph, visited, depth, workers, frontier=edges)
+    return graph
 
 
 def generate_graphviz_graph(dependencies):
@@ -80,6 +506,17 @@ def generate_graphviz_graph(dependencies):
     return graph
 
 
+def prepare_render_graph(graph, depth=None, prune=(), collapse=(), group=None, max_nodes=DEFAULT_MAX_RENDER_NODES):
+    # Раскладка dot растет сверхлинейно, поэтому перед отрисовкой граф обрезается и сворачивается,
+    # а если он все равно больше max_nodes, глубина уменьшается до подходящей
+    reduced = reduce_graph(graph, depth, prune, collapse, group)
+    if max_nodes and len(reduced) > max_nodes:
+        fitted = fit_depth(reduced, max_nodes)
+        print(f"Graph has {len(reduced)} nodes, rendering only {fitted} levels below the direct dependencies")
+        reduced = reduce_graph(reduced, fitted)
+    return reduced
+
+
 def save_graph(graph, output_path, graphviz_path):
     graph_file = output_path.replace(".png", ".dot")
     graph.save(graph_file)
@@ -90,20 +527,186 @@ def save_graph(graph, output_path, graphviz_path):
         print("Error generating graph:", e)
 
 
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Визуализатор графа зависимостей npm-пакетов.")
+    parser.add_argument("--config", default="config.toml", help="Путь к конфигурационному файлу (по умолчанию: config.toml).")
+    parser.add_argument("--offline", action="store_true", help="Не обращаться к репозиторию, использовать только дисковый кэш.")
+    parser.add_argument("--lockfile", help="package-lock.json или yarn.lock, по которому строится граф без запросов к репозиторию.")
+    parser.add_argument("--snapshot", help="Файл снимка графа для инкрементального пересчета при следующем запуске.")
+    parser.add_argument("--rebuild", action="store_true", help="Игнорировать сохраненный снимок и построить граф заново.")
+    parser.add_argument("--batch", nargs="+", metavar="MANIFEST", help="Пакетный режим: package.json или каталоги проектов, обрабатываемые одним процессом.")
+    parser.add_argument("--batch-output", default="output", help="Каталог для графов пакетного режима (по умолчанию: output).")
+    parser.add_argument("--batch-format", choices=sorted(WRITERS), default="dot", help="Формат графов пакетного режима (по умолчанию: dot).")
+    parser.add_argument("--output", action="append", help="Файл .dot/.json/.graphml/.csv, в который граф пишется по ходу обхода (можно указать несколько раз).")
+    parser.add_argument("--render-depth", type=int, help="Глубина графа, передаваемого в Graphviz.")
+    parser.add_argument("--prune", action="append", help="Не отрисовывать пакет и то, что достижимо только через него.")
+    parser.add_argument("--collapse", action="append", help="Отрисовать пакет листом с числом скрытых зависимостей.")
+    parser.add_argument("--group", choices=GROUPINGS, help="Объединить при отрисовке версии пакета или пакеты одного scope.")
+    parser.add_argument("--max-render-nodes", type=int, help="Наибольшее число узлов, передаваемое в Graphviz.")
+    parser.add_argument("--metrics", help="Файл JSON со сводкой метрик обхода: задержки, объем, кэши, время этапов.")
+    parser.add_argument("--trace", help="Файл трассировки в формате Chrome trace (chrome://tracing, Perfetto).")
+
+    commands = parser.add_subparsers(dest="command")
+    query = commands.add_parser("query", help="Запросы к графу зависимостей вместо отрисовки.")
+    query.add_argument("--graph", help="JSON-граф (--output graph.json) или снимок графа; без него граф строится как обычно.")
+    queries = query.add_subparsers(dest="query", required=True)
+    rdeps = queries.add_parser("rdeps", help="Кто зависит от пакета.")
+    rdeps.add_argument("package", help="Имя пакета или name@version.")
+    rdeps.add_argument("--transitive", action="store_true", help="Все пакеты, через которые пакет попадает в граф.")
+    path = queries.add_parser("path", help="Кратчайшая цепочка зависимостей между пакетами.")
+    path.add_argument("source")
+    path.add_argument("target")
+    queries.add_parser("longest", help="Самая длинная цепочка зависимостей.")
+    queries.add_parser("cycles", help="Циклы зависимостей (компоненты сильной связности).")
+    fan = queries.add_parser("fan", help="Пакеты с наибольшим числом зависимостей или зависимых.")
+    fan.add_argument("--in", dest="fan_in", action="store_true", help="Ранжировать по числу зависимых.")
+    fan.add_argument("--top", type=int, default=10, help="Число пакетов в ответе (по умолчанию: 10).")
+    closure = queries.add_parser("closure", help="Размер транзитивного замыкания пакета.")
+    closure.add_argument("package")
+    return parser.parse_args()
+
+
+def run_query(args, graph):
+    index = GraphIndex(graph)
+    if args.query == "rdeps":
+        for label in index.labels(reverse_dependencies(index, find_nodes(graph, args.package), args.transitive)):
+            print(label)
+    elif args.query == "path":
+        path = shortest_path(index, find_nodes(graph, args.source), find_nodes(graph, args.target))
+        print(" -> ".join(index.labels(path)) if path else f"No path from {args.source} to {args.target}")
+    elif args.query == "longest":
+        path = longest_path(index)
+        print(f"{len(path)} packages: " + " -> ".join(index.labels(path)))
+    elif args.query == "cycles":
+        cycles = find_cycles(index)
+        for cycle in cycles:
+            print(", ".join(sorted(index.labels(cycle))))
+        if not cycles:
+            print("No cycles")
+    elif args.query == "fan":
+        for degree, label in fan_ranking(index, args.top, args.fan_in):
+            print(f"{degree:>6} {label}")
+    elif args.query == "closure":
+        nodes = find_nodes(graph, args.package)
+        print(f"{args.package}: {closure_size(index, nodes)} transitive dependencies, "
+              f"{closure_size(index, nodes, reverse=True)} transitive dependents")
+
+
+def run_batch(args, repository_url, max_depth, workers):
+    projects = {}
+    for manifest_path in args.batch:
+        name, dependencies = load_project(manifest_path)
+        # Одноименные проекты различаются порядковым номером
+        unique_name, index = name, 2
+        while unique_name in projects:
+            unique_name, index = f"{name}-{index}", index + 1
+        projects[unique_name] = dependencies
+
+    print(f"Generating dependency graphs for {len(projects)} projects from repository '{repository_url}' with max depth {max_depth}")
+    merged, graphs = collect_batch_dependencies(projects, repository_url, max_depth, workers)
+
+    extension = next(ext for ext, graph_format in EXTENSIONS.items() if graph_format == args.batch_format)
+    os.makedirs(args.batch_output, exist_ok=True)
+    for name, graph in graphs.items():
+        # Имена пакетов со scope содержат /, который недопустим в имени файла
+        file_name = name.replace("/", "__").replace("@", "") + extension
+        write_graph(graph, os.path.join(args.batch_output, file_name), args.batch_format)
+    write_graph(merged, os.path.join(args.batch_output, "merged" + extension), args.batch_format)
+    total = sum(len(graph) for graph in graphs.values())
+    print(f"Graphs saved to {args.batch_output}: {total} nodes across projects, {len(merged)} unique package versions resolved")
+
+
+def build_graph(args, settings, repository_url, max_depth, workers):
+    # Граф из lock-файла, снимка или обходом репозитория; файлы --output пишутся по ходу обхода
+    writers = [open_graph_writer(path) for path in args.output or settings.get("graph_outputs", [])]
+    dependency_graph = DependencyGraph(writers)
+    try:
+        lockfile_path = args.lockfile or settings.get("lockfile")
+        if lockfile_path:
+            lockfile = load_lockfile(lockfile_path)
+            dependencies = None if lockfile.root_dependencies() is not None else load_dependencies("package_dependecies.json")
+            collect_lockfile_dependencies(lockfile, repository_url, max_depth, dependencies, workers, dependency_graph)
+        else:
+            dependencies = load_dependencies("package_dependecies.json")
+            snapshot_path = args.snapshot or settings.get("snapshot")
+            if snapshot_path:
+                if args.rebuild and os.path.exists(snapshot_path):
+                    os.remove(snapshot_path)
+                rebuild_dependencies(dependencies, repository_url, max_depth, snapshot_path, dependency_graph, workers)
+            else:
+                collect_dependencies(dependencies, repository_url, max_depth, dependency_graph, workers=workers)
+    finally:
+        for writer in writers:
+            writer.close()
+    return dependency_graph
+
+
+def run(args, settings, graphviz_path, package_name, output_path, repository_url, max_depth, workers):
+    if args.batch:
+        with metrics.phase("build graph"):
+            run_batch(args, repository_url, max_depth, workers)
+        return
+
+    if args.command == "query":
+        with metrics.phase("build graph"):
+            graph = load_graph(args.graph) if args.graph else build_graph(args, settings, repository_url, max_depth, workers)
+        try:
+            with metrics.phase("query"):
+                run_query(args, graph)
+        except KeyError as e:
+            print(e.args[0])
+        return
+
+    print(f"Generating dependency graph for package '{package_name}' from repository '{repository_url}' with max depth {max_depth}")
+    with metrics.phase("build graph"):
+        dependency_graph = build_graph(args, settings, repository_url, max_depth, workers)
+
+    with metrics.phase("reduce graph"):
+        render_graph = prepare_render_graph(
+            dependency_graph,
+            args.render_depth if args.render_depth is not None else settings.get("render_depth"),
+            args.prune or settings.get("prune", []),
+            args.collapse or settings.get("collapse", []),
+            args.group or settings.get("group"),
+            args.max_render_nodes if args.max_render_nodes is not None else settings.get("max_render_nodes", DEFAULT_MAX_RENDER_NODES),
+        )
+    with metrics.phase("graphviz", nodes=len(render_graph)):
+        graph = generate_graphviz_graph(render_graph)
+        save_graph(graph, output_path, graphviz_path)
+
+
 def main():
-    config = load_config("config.toml")
+    global registry_cache, metrics, scheduler
+
+    args = parse_arguments()
+    config = load_config(args.config)
     graphviz_path = config["settings"]["graphviz_path"]
     package_name = config["settings"]["package_name"]
     output_path = config["settings"]["output_path"]
     max_depth = config["settings"]["max_depth"]
     repository_url = config["settings"]["repository_url"]
+    workers = config["settings"].get("workers", DEFAULT_WORKERS)
+    registry_cache = RegistryCache(
+        config["settings"].get("cache_dir", DEFAULT_CACHE_DIR),
+        config["settings"].get("latest_ttl", DEFAULT_LATEST_TTL),
+        args.offline or config["settings"].get("offline", False),
+    )
 
-    print(f"Generating dependency graph for package '{package_name}' from repository '{repository_url}' with max depth {max_depth}")
-
-    dependencies = load_dependencies("package_dependecies.json")
-    all_dependencies = collect_dependencies(dependencies, repository_url, max_depth)
-    graph = generate_graphviz_graph(all_dependencies)
-    save_graph(graph, output_path, graphviz_path)
+    settings = config["settings"]
+    scheduler = FetchScheduler(RetryPolicy(
+        settings.get("retries", DEFAULT_RETRIES),
+        settings.get("backoff", DEFAULT_BACKOFF),
+        settings.get("max_retry_delay", DEFAULT_MAX_DELAY),
+        settings.get("timeout", DEFAULT_TIMEOUT),
+    ), workers)
+    metrics = Metrics(trace=bool(args.trace), settings={"workers": workers, "max_depth": max_depth, "repository_url": repository_url})
+    try:
+        run(args, settings, graphviz_path, package_name, output_path, repository_url, max_depth, workers)
+    finally:
+        if args.metrics:
+            metrics.write_json(args.metrics)
+        if args.trace:
+            metrics.write_trace(args.trace)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from instrumentation import Metrics
+
+# Таймаут одного запроса к репозиторию, в секундах
+DEFAULT_TIMEOUT = 30
+
+# Число повторов после первой неудачной попытки
+DEFAULT_RETRIES = 4
+
+# Базовая и наибольшая задержка перед повтором, в секундах
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_DELAY = 60
+
+# Ответы, после которых запрос повторяется; 429 и 503 означают, что репозиторий ограничивает нагрузку
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+THROTTLE_STATUSES = frozenset((429, 503))
+
+# Сетевые ошибки, после которых запрос повторяется
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+def parse_retry_after(value):
+    # Retry-After содержит число секунд или дату HTTP
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - time.time())
+
+
+class RetryPolicy:
+    def __init__(self, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, max_delay=DEFAULT_MAX_DELAY,
+                 timeout=DEFAULT_TIMEOUT):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.timeout = timeout
+
+    def delay(self, attempt, retry_after=None):
+        # Экспоненциальная задержка с полным джиттером, чтобы потоки не повторяли запросы одновременно;
+        # Retry-After от репозитория важнее, но не больше max_delay
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.backoff * 2 ** attempt))
+
+
+class AdaptiveLimiter:
+    # Предел одновременных запросов по схеме AIMD: при перегрузке репозитория он уменьшается вдвое,
+    # после limit успешных ответов подряд растет на единицу, но не выше начального.
+    # Ответ 429/503 приостанавливает все запросы до истечения паузы, прочие ошибки предел не меняют
+    def __init__(self, limit, min_limit=1):
+        self.max_limit = limit
+        self.min_limit = min_limit
+        self.limit = limit
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait > 0:
+                    self._condition.wait(wait)
+                elif self.in_flight >= self.limit:
+                    self._condition.wait()
+                else:
+                    break
+            self.in_flight += 1
+
+    def release(self, congested=False, pause=0.0, succeeded=True):
+        with self._condition:
+            self.in_flight -= 1
+            if congested:
+                self.limit = max(self.min_limit, self.limit // 2)
+                self._successes = 0
+                if pause:
+                    self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            elif succeeded:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
+
+class FetchScheduler:
+    # Отправка запросов к репозиторию с таймаутом, повторами и адаптивным пределом одновременности
+    def __init__(self, policy=None, limit=8):
+        self.policy = policy or RetryPolicy()
+        self.limiter = AdaptiveLimiter(limit)
+
+    def send(self, get, url, headers=None, label=None, metrics=None):
+        # Возвращает последний ответ (успешный или исчерпавший повторы) либо None после сетевой ошибки
+        if metrics is None:
+            metrics = Metrics()
+        attempt = 0
+        while True:
+            response, error = None, None
+            self.limiter.acquire()
+            try:
+                with metrics.request(label or url) as info:
+                    try:
+                        response = get(url, headers=headers, timeout=self.policy.timeout)
+                    except RETRY_ERRORS as e:
+                        error = e
+                        info["error"] = type(e).__name__
+                    else:
+                        info["status"] = response.status_code
+                        info["bytes"] = len(response.content)
+            finally:
+                status = response.status_code if response is not None else None
+                throttled = status in THROTTLE_STATUSES
+                retry_after = parse_retry_after(response.headers.get("Retry-After")) if throttled else None
+                # Пауза для всех запросов только по явному сигналу перегрузки; таймауты лишь снижают предел
+                pause = self.policy.delay(attempt, retry_after) if throttled else 0.0
+                retry = error is not None or status in RETRY_STATUSES
+                self.limiter.release(throttled or isinstance(error, requests.Timeout), pause, not retry)
+
+            if not retry:
+                return response
+            if attempt >= self.policy.retries:
+                if error is not None:
+                    print(f"Failed to fetch {label or url}: {type(error).__name__}")
+                return response
+            metrics.count("retries")
+            if throttled:
+                metrics.count("throttled")
+            else:
+                time.sleep(self.policy.delay(attempt))
+            attempt += 1
@@ -0,0 +1,209 @@
+import heapq
+import json
+from array import array
+from collections import deque
+
+from dependency_graph import DependencyGraph, split_label
+
+
+def _csr(node_count, edges):
+    # Списки смежности в формате CSR: зависимости узла i - targets[offsets[i]:offsets[i + 1]]
+    offsets = array('I', [0]) * (node_count + 1)
+    for source, _ in edges:
+        offsets[source + 1] += 1
+    for node in range(node_count):
+        offsets[node + 1] += offsets[node]
+    targets = array('I', [0]) * offsets[node_count]
+    position = array('I', offsets)
+    for source, target in edges:
+        targets[position[source]] = target
+        position[source] += 1
+    return offsets, targets
+
+
+class GraphIndex:
+    # Индексы для запросов к графу: прямая и обратная смежность, построенные один раз за O(V + E)
+    def __init__(self, graph):
+        self.graph = graph
+        self.node_count = len(graph.labels)
+        edges = list(graph.edges())
+        self.offsets, self.targets = _csr(self.node_count, edges)
+        self.reverse_offsets, self.reverse_targets = _csr(self.node_count, [(target, source) for source, target in edges])
+
+    def successors(self, node):
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def predecessors(self, node):
+        return self.reverse_targets[self.reverse_offsets[node]:self.reverse_offsets[node + 1]]
+
+    def fan_out(self, node):
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def fan_in(self, node):
+        return self.reverse_offsets[node + 1] - self.reverse_offsets[node]
+
+    def labels(self, nodes):
+        return [self.graph.labels[node] for node in nodes]
+
+
+def find_nodes(graph, query):
+    # Узел по метке name@version или все версии пакета по имени
+    if query in graph.ids:
+        return [graph.ids[query]]
+    nodes = [node for node, label in enumerate(graph.labels) if split_label(label)[0] == query]
+    if not nodes:
+        raise KeyError(f"Package '{query}' is not in the graph")
+    return nodes
+
+
+def _reachable(offsets, targets, sources):
+    seen = bytearray(len(offsets) - 1)
+    queue = deque(sources)
+    for node in sources:
+        seen[node] = 1
+    order = []
+    while queue:
+        node = queue.popleft()
+        for edge in range(offsets[node], offsets[node + 1]):
+            target = targets[edge]
+            if not seen[target]:
+                seen[target] = 1
+                order.append(target)
+                queue.append(target)
+    return order
+
+
+def reverse_dependencies(index, nodes, transitive=False):
+    # Кто зависит от узлов: прямые зависимые или все, через кого они попадают в граф
+    if transitive:
+        return _reachable(index.reverse_offsets, index.reverse_targets, nodes)
+    return list(dict.fromkeys(source for node in nodes for source in index.predecessors(node)))
+
+
+def closure_size(index, nodes, reverse=False):
+    # Число узлов, достижимых из nodes (с reverse=True - число узлов, из которых достижимы nodes)
+    if reverse:
+        return len(_reachable(index.reverse_offsets, index.reverse_targets, nodes))
+    return len(_reachable(index.offsets, index.targets, nodes))
+
+
+def shortest_path(index, sources, targets):
+    # Кратчайшая цепочка зависимостей от любого узла sources до любого узла targets, поиск в ширину
+    targets = set(targets)
+    parents = {node: None for node in sources}
+    queue = deque(sources)
+    while queue:
+        node = queue.popleft()
+        if node in targets:
+            path = []
+            while node is not None:
+                path.append(node)
+                node = parents[node]
+            return path[::-1]
+        for target in index.successors(node):
+            if target not in parents:
+                parents[target] = node
+                queue.append(target)
+    return None
+
+
+def strongly_connected_components(index):
+    # Итеративный алгоритм Тарьяна. Компоненты выдаются в обратном топологическом порядке:
+    # каждая - после всех компонент, достижимых из нее
+    offsets, targets = index.offsets, index.targets
+    node_count = index.node_count
+    order = array('i', [-1]) * node_count
+    low = array('i', [0]) * node_count
+    next_edge = array('I', offsets)
+    on_stack = bytearray(node_count)
+    stack = []
+    components = []
+    counter = 0
+    for start in range(node_count):
+        if order[start] >= 0:
+            continue
+        order[start] = low[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack[start] = 1
+        work = [start]
+        while work:
+            node = work[-1]
+            edge = next_edge[node]
+            if edge < offsets[node + 1]:
+                next_edge[node] = edge + 1
+                target = targets[edge]
+                if order[target] < 0:
+                    order[target] = low[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack[target] = 1
+                    work.append(target)
+                elif on_stack[target] and order[target] < low[node]:
+                    low[node] = order[target]
+                continue
+            work.pop()
+            if work and low[node] < low[work[-1]]:
+                low[work[-1]] = low[node]
+            if low[node] == order[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def find_cycles(index):
+    # Циклы зависимостей: компоненты сильной связности из нескольких узлов и петли
+    return [component for component in strongly_connected_components(index)
+            if len(component) > 1 or component[0] in index.successors(component[0])]
+
+
+def longest_path(index):
+    # Самая длинная цепочка зависимостей. Ребра внутри циклов не учитываются, поэтому
+    # узлы обрабатываются в порядке компонент Тарьяна, и для ациклического графа ответ точный
+    components = strongly_connected_components(index)
+    component_of = array('I', [0]) * index.node_count
+    for number, component in enumerate(components):
+        for node in component:
+            component_of[node] = number
+    length = array('I', [1]) * index.node_count
+    following = array('i', [-1]) * index.node_count
+    for component in components:
+        for node in component:
+            for target in index.successors(node):
+                if component_of[target] != component_of[node] and length[target] + 1 > length[node]:
+                    length[node] = length[target] + 1
+                    following[node] = target
+    if not index.node_count:
+        return []
+    node = max(range(index.node_count), key=length.__getitem__)
+    path = [node]
+    while following[node] >= 0:
+        node = following[node]
+        path.append(node)
+    return path
+
+
+def fan_ranking(index, top=10, reverse=False):
+    # Узлы с наибольшим числом зависимостей (reverse=True - зависимых)
+    degree = index.fan_in if reverse else index.fan_out
+    return heapq.nlargest(top, ((degree(node), index.graph.labels[node]) for node in range(index.node_count)))
+
+
+def load_graph(path):
+    # Граф из JSON, записанного JsonWriter ({"edges", "nodes"}), или из снимка rebuild_dependencies
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    graph = DependencyGraph()
+    if "graph" in data:
+        return graph.load_json(data["graph"])
+    for label in data["nodes"]:
+        graph.add_label(label)
+    for source, target in data["edges"]:
+        graph.add_edge(graph.add_label(source), graph.add_label(target))
+    return graph
@@ -0,0 +1,130 @@
+import csv
+import json
+import os
+from xml.sax.saxutils import quoteattr
+
+
+class GraphWriter:
+    # Потоковая запись графа: узлы и ребра попадают в файл сразу, как только их находит обход,
+    # поэтому граф не нужно держать целиком в памяти ради сериализации
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.begin()
+
+    def begin(self):
+        pass
+
+    def node(self, label):
+        pass
+
+    def edge(self, source, target):
+        raise NotImplementedError
+
+    def end(self):
+        pass
+
+    def close(self):
+        if not self.file.closed:
+            self.end()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _dot_id(label):
+    return '"' + label.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class DotWriter(GraphWriter):
+    def begin(self):
+        self.file.write("// Dependency Graph\ndigraph {\n")
+
+    def node(self, label):
+        self.file.write(f"\t{_dot_id(label)}\n")
+
+    def edge(self, source, target):
+        self.file.write(f"\t{_dot_id(source)} -> {_dot_id(target)}\n")
+
+    def end(self):
+        self.file.write("}\n")
+
+
+class JsonWriter(GraphWriter):
+    # {"edges": [[источник, цель], ...], "nodes": [...]}: ребра пишутся сразу,
+    # список узлов дописывается при закрытии
+    def begin(self):
+        self.nodes = []
+        self.edge_count = 0
+        self.file.write('{"edges": [')
+
+    def node(self, label):
+        self.nodes.append(label)
+
+    def edge(self, source, target):
+        self.file.write((",\n" if self.edge_count else "\n") + json.dumps([source, target]))
+        self.edge_count += 1
+
+    def end(self):
+        self.file.write('\n], "nodes": ')
+        json.dump(self.nodes, self.file)
+        self.file.write("}\n")
+
+
+class GraphMLWriter(GraphWriter):
+    def begin(self):
+        self.file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                        '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                        '  <graph id="dependencies" edgedefault="directed">\n')
+
+    def node(self, label):
+        self.file.write(f"    <node id={quoteattr(label)}/>\n")
+
+    def edge(self, source, target):
+        self.file.write(f"    <edge source={quoteattr(source)} target={quoteattr(target)}/>\n")
+
+    def end(self):
+        self.file.write("  </graph>\n</graphml>\n")
+
+
+class CsvWriter(GraphWriter):
+    # Список ребер source,target; узлы без ребер в этот формат не попадают
+    def begin(self):
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["source", "target"])
+
+    def edge(self, source, target):
+        self.writer.writerow([source, target])
+
+
+WRITERS = {
+    "dot": DotWriter,
+    "json": JsonWriter,
+    "graphml": GraphMLWriter,
+    "csv": CsvWriter,
+}
+
+EXTENSIONS = {".dot": "dot", ".gv": "dot", ".json": "json", ".graphml": "graphml", ".csv": "csv"}
+
+
+def open_graph_writer(path, graph_format=None):
+    if graph_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in EXTENSIONS:
+            raise ValueError(f"Unknown graph format for '{path}'")
+        graph_format = EXTENSIONS[extension]
+    return WRITERS[graph_format](path)
+
+
+def write_graph(graph, path, graph_format=None):
+    # Запись уже построенного графа тем же writer-ом
+    with open_graph_writer(path, graph_format) as writer:
+        for label in graph.labels:
+            writer.node(label)
+        labels = graph.labels
+        for source, target in graph.edges():
+            writer.edge(labels[source], labels[target])
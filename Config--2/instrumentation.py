@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Верхние границы корзин гистограммы задержек запросов, в миллисекундах
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+class Metrics:
+    # Потокобезопасный сборщик метрик обхода: задержки и объем запросов к репозиторию,
+    # попадания в кэши, повторы, число одновременных запросов и время этапов.
+    # С trace=True дополнительно копит события для Chrome trace (chrome://tracing, Perfetto)
+    def __init__(self, trace=False, settings=None):
+        self.settings = settings or {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.latencies = array('d')
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.counters = {}
+        self.phases = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.events = [] if trace else None
+        self._threads = {}
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def _timestamp(self, moment):
+        return (moment - self._origin) * 1e6
+
+    def _trace(self, name, category, started, finished, args=None):
+        if self.events is None:
+            return
+        thread = threading.current_thread()
+        event = {
+            "name": name, "cat": category, "ph": "X", "pid": os.getpid(), "tid": thread.ident,
+            "ts": self._timestamp(started), "dur": (finished - started) * 1e6,
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+            self._threads.setdefault(thread.ident, thread.name)
+
+    @contextmanager
+    def request(self, label):
+        # Один HTTP-запрос к репозиторию; в info можно записать статус и размер ответа
+        info = {}
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        started = time.perf_counter()
+        try:
+            yield info
+        finally:
+            finished = time.perf_counter()
+            latency_ms = (finished - started) * 1000
+            with self._lock:
+                self.in_flight -= 1
+                self.latencies.append(latency_ms)
+                self.buckets[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+                self.counters["requests"] = self.counters.get("requests", 0) + 1
+                self.counters["bytes_received"] = self.counters.get("bytes_received", 0) + info.get("bytes", 0)
+            self._trace(label, "fetch", started, finished, info)
+
+    @contextmanager
+    def phase(self, name, **args):
+        # Этап работы (разрешение, уровень обхода, отрисовка); время этапов с одним именем суммируется
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + finished - started
+            self._trace(name, "phase", started, finished, args)
+
+    def _percentile(self, ordered, fraction):
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self):
+        with self._lock:
+            ordered = sorted(self.latencies)
+            counters = dict(self.counters)
+            buckets = list(self.buckets)
+            phases = dict(self.phases)
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "settings": self.settings,
+            "counters": counters,
+            "max_concurrency": self.max_in_flight,
+            "latency_ms": {
+                "count": len(ordered),
+                "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+                "p50": self._percentile(ordered, 0.5),
+                "p90": self._percentile(ordered, 0.9),
+                "p99": self._percentile(ordered, 0.99),
+                "max": ordered[-1] if ordered else 0.0,
+                "histogram": dict(zip(labels, buckets)),
+            },
+            "phases_seconds": phases,
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def write_trace(self, path):
+        # Формат Trace Event: события "X" с длительностью и метаданные с именами потоков
+        with self._lock:
+            events = list(self.events or [])
+            threads = dict(self._threads)
+        pid = os.getpid()
+        metadata = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in threads.items()]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,144 @@
+import json
+import os
+
+
+class LockfileEntry:
+    # Установленный пакет из lock-файла: имя, точная версия и зависимости (имя -> диапазон)
+    __slots__ = ("name", "version", "dependencies", "optional")
+
+    def __init__(self, name, version, dependencies, optional=()):
+        self.name = name
+        self.version = version
+        self.dependencies = dependencies
+        self.optional = frozenset(optional)
+
+
+class PackageLock:
+    # package-lock.json / npm-shrinkwrap.json версий 2 и 3: плоский словарь packages,
+    # ключи - пути установки вида node_modules/a/node_modules/b, "" - корневой проект
+    def __init__(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("lockfileVersion", 1) < 2 or "packages" not in data:
+            raise ValueError(f"{path}: поддерживаются только package-lock.json версий 2 и 3")
+        self.entries = {}
+        self.links = {}
+        for location, meta in data["packages"].items():
+            if meta.get("link"):
+                self.links[location] = meta.get("resolved", "")
+                continue
+            dependencies = dict(meta.get("dependencies", {}))
+            optional = meta.get("optionalDependencies", {})
+            dependencies.update(optional)
+            if "node_modules/" not in location:
+                # Корень и рабочие пространства (workspaces) устанавливают и devDependencies
+                dependencies.update(meta.get("devDependencies", {}))
+            name = meta.get("name") or location.rpartition("node_modules/")[2]
+            self.entries[location] = LockfileEntry(name, meta.get("version", ""), dependencies, optional)
+
+    def root_dependencies(self):
+        root = self.entries.get("")
+        return dict(root.dependencies) if root is not None else None
+
+    def find(self, parent, name, spec):
+        # Поиск как у Node.js: node_modules родителя, затем node_modules каждого предка
+        base = parent or ""
+        while True:
+            location = f"{base}/node_modules/{name}" if base else f"node_modules/{name}"
+            location = self.links.get(location, location)
+            if location in self.entries:
+                return location
+            if not base:
+                return None
+            index = base.rfind("node_modules/")
+            base = base[:index].rstrip("/") if index > 0 else ""
+
+
+def _unquote(text):
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        return text[1:-1]
+    return text
+
+
+def _split_field(text):
+    # Строка поля yarn.lock: 'version "1.2.3"' (v1) или 'version: 1.2.3' (berry)
+    if text.startswith('"'):
+        end = text.index('"', 1)
+        key, value = text[1:end], text[end + 1:]
+    else:
+        key, _, value = text.partition(" ")
+    return key.rstrip(":"), _unquote(value.lstrip(": "))
+
+
+def _split_descriptor(descriptor):
+    # Имя пакета со scope начинается с @, диапазон отделяется первым @ после него
+    index = descriptor.index("@", 1)
+    return descriptor[:index], descriptor[index + 1:]
+
+
+class YarnLock:
+    # yarn.lock классического формата (v1) и формата Yarn Berry. Файл читается построчно:
+    # заголовок записи перечисляет дескрипторы name@range, поля и секции зависимостей идут с отступом
+    DEPENDENCY_SECTIONS = ("dependencies", "optionalDependencies")
+
+    def __init__(self, path):
+        self.entries = {}
+        self.descriptors = {}
+        self.root = None
+        with open(path, "r", encoding="utf-8") as f:
+            descriptors, entry, section = None, None, None
+            for line in f:
+                text = line.strip()
+                if not text or text.startswith("#"):
+                    continue
+                indent = len(line) - len(line.lstrip(" "))
+                if indent == 0:
+                    self._add(descriptors, entry)
+                    descriptors = [item.strip().strip('"') for item in text[:-1].split(",")]
+                    entry = LockfileEntry(None, "", {}, ())
+                    entry.optional = set()
+                    section = None
+                elif indent == 2:
+                    if text.endswith(":"):
+                        section = _unquote(text[:-1])
+                    else:
+                        section = None
+                        key, value = _split_field(text)
+                        if key == "version":
+                            entry.version = value
+                elif section in self.DEPENDENCY_SECTIONS:
+                    key, value = _split_field(text)
+                    entry.dependencies[key] = value
+                    if section == "optionalDependencies":
+                        entry.optional.add(key)
+            self._add(descriptors, entry)
+
+    def _add(self, descriptors, entry):
+        if not descriptors or descriptors[0] == "__metadata":
+            return
+        location = descriptors[0]
+        entry.name = _split_descriptor(location)[0]
+        entry.optional = frozenset(entry.optional)
+        self.entries[location] = entry
+        for descriptor in descriptors:
+            self.descriptors[_split_descriptor(descriptor)] = location
+            if descriptor.endswith("@workspace:."):
+                self.root = location
+
+    def root_dependencies(self):
+        # В yarn.lock v1 корневого проекта нет, зависимости берутся из package.json
+        return dict(self.entries[self.root].dependencies) if self.root is not None else None
+
+    def find(self, parent, name, spec):
+        # Разрешение в yarn плоское: запись определяется только парой (имя, диапазон)
+        location = self.descriptors.get((name, spec))
+        if location is None:
+            location = self.descriptors.get((name, "npm:" + spec))
+        return location
+
+
+def load_lockfile(path):
+    if os.path.basename(path).endswith(".json"):
+        return PackageLock(path)
+    return YarnLock(path)
@@ -0,0 +1,162 @@
+import re
+
+# Полная или частичная версия: 1, 1.2, 1.2.3, 1.x, 1.2.*, v1.2.3-beta.1+build
+VERSION_REGEX = re.compile(
+    r"^\s*v?(\d+|[xX*])(?:\.(\d+|[xX*]))?(?:\.(\d+|[xX*]))?"
+    r"(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?\s*$"
+)
+
+# Оператор сравнения перед версией
+COMPARATOR_REGEX = re.compile(r"^(<=|>=|<|>|=|~>|~|\^)?\s*(.*)$")
+
+# Диапазон через дефис: 1.2.3 - 2.3.4
+HYPHEN_REGEX = re.compile(r"^\s*(\S+)\s+-\s+(\S+)\s*$")
+
+# Наименьшая pre-release метка: граница <2.0.0-0 исключает и 2.0.0-alpha
+LOWEST_PRERELEASE = ((0, 0),)
+
+
+def _prerelease_key(prerelease):
+    # Числовые идентификаторы меньше строковых и сравниваются как числа
+    return tuple((0, int(part)) if part.isdigit() else (1, part) for part in prerelease.split("."))
+
+
+def parse_version(version):
+    # Разобранная точная версия или None, если строка не является версией x.y.z
+    match = VERSION_REGEX.match(version)
+    if not match or any(part is None or not part.isdigit() for part in match.group(1, 2, 3)):
+        return None
+    major, minor, patch = (int(part) for part in match.group(1, 2, 3))
+    prerelease = match.group(4)
+    return (major, minor, patch, _prerelease_key(prerelease) if prerelease else None)
+
+
+def version_key(parsed):
+    # Версия без pre-release старше любой своей pre-release версии
+    major, minor, patch, prerelease = parsed
+    return (major, minor, patch, (1,) if prerelease is None else (0, prerelease))
+
+
+def _parse_partial(text):
+    match = VERSION_REGEX.match(text)
+    if not match:
+        raise ValueError(f"Invalid version '{text}'")
+    parts = []
+    for part in match.group(1, 2, 3):
+        if part is None or not part.isdigit():
+            break
+        parts.append(int(part))
+    prerelease = match.group(4)
+    return parts, _prerelease_key(prerelease) if prerelease and len(parts) == 3 else None
+
+
+def _bound(parts, prerelease=None):
+    major, minor, patch = (parts + [0, 0, 0])[:3]
+    return (major, minor, patch, prerelease)
+
+
+def _next(parts, position):
+    # Следующая версия после увеличения компонента position: 1.2 -> 1.3.0-0
+    bumped = parts[:position + 1]
+    bumped[position] += 1
+    return _bound(bumped, LOWEST_PRERELEASE)
+
+
+def _desugar(operator, text):
+    # Переводит одну запись диапазона в список простых сравнений (оператор, версия)
+    parts, prerelease = _parse_partial(text)
+    if not parts:
+        return [] if operator not in ("<", ">") else [("<", (0, 0, 0, LOWEST_PRERELEASE))]
+    if operator in ("", "="):
+        if len(parts) == 3:
+            return [("=", _bound(parts, prerelease))]
+        return [(">=", _bound(parts)), ("<", _next(parts, len(parts) - 1))]
+    if operator in ("~", "~>"):
+        position = 1 if len(parts) >= 2 else 0
+        return [(">=", _bound(parts, prerelease)), ("<", _next(parts, position))]
+    if operator == "^":
+        # Меняться может все правее первого ненулевого компонента
+        position = next((i for i, part in enumerate(parts) if part != 0), len(parts) - 1)
+        return [(">=", _bound(parts, prerelease)), ("<", _next(parts, position))]
+    if operator == ">=":
+        return [(">=", _bound(parts, prerelease))]
+    if operator == "<":
+        return [("<", _bound(parts, prerelease if len(parts) == 3 else LOWEST_PRERELEASE))]
+    if operator == ">":
+        if len(parts) == 3:
+            return [(">", _bound(parts, prerelease))]
+        return [(">=", _next(parts, len(parts) - 1)[:3] + (None,))]
+    if operator == "<=":
+        if len(parts) == 3:
+            return [("<=", _bound(parts, prerelease))]
+        return [("<", _next(parts, len(parts) - 1))]
+    raise ValueError(f"Unknown operator '{operator}'")
+
+
+def parse_range(spec):
+    # Диапазон npm -> список наборов сравнений, наборы объединяются через ||
+    comparator_sets = []
+    for alternative in spec.split("||"):
+        comparators = []
+        hyphen = HYPHEN_REGEX.match(alternative)
+        if hyphen:
+            low, high = hyphen.groups()
+            comparators.extend(_desugar(">=", low))
+            comparators.extend(_desugar("<=", high))
+        else:
+            # Оператор может быть отделен от версии пробелом: ">= 1.2.3"
+            tokens = re.sub(r"(<=|>=|<|>|=|~>|~|\^)\s+", r"\1", alternative.strip()).split()
+            for token in tokens or ["*"]:
+                operator, version = COMPARATOR_REGEX.match(token).groups()
+                comparators.extend(_desugar(operator or "", version))
+        comparator_sets.append(comparators)
+    return comparator_sets
+
+
+def _compare(operator, key, bound_key):
+    if operator == "=":
+        return key == bound_key
+    if operator == ">=":
+        return key >= bound_key
+    if operator == ">":
+        return key > bound_key
+    if operator == "<=":
+        return key <= bound_key
+    return key < bound_key
+
+
+def satisfies(parsed, comparator_sets):
+    key = version_key(parsed)
+    for comparators in comparator_sets:
+        if not all(_compare(operator, key, version_key(bound)) for operator, bound in comparators):
+            continue
+        if parsed[3] is None:
+            return True
+        # Pre-release версия подходит, только если в наборе есть pre-release той же x.y.z
+        if any(bound[3] not in (None, LOWEST_PRERELEASE) and bound[:3] == parsed[:3] for _, bound in comparators):
+            return True
+    return False
+
+
+def max_satisfying(versions, spec):
+    # versions - отсортированный по возрастанию список пар (разобранная версия, строка)
+    return pick_version(versions, spec)
+
+
+def pick_version(versions, spec, preferred=None):
+    # Как npm: предпочтительная версия (dist-tags.latest) выбирается, если подходит под диапазон
+    comparator_sets = parse_range(spec)
+    parsed = parse_version(preferred) if preferred else None
+    if parsed is not None and satisfies(parsed, comparator_sets):
+        return preferred
+    for parsed, version in reversed(versions):
+        if satisfies(parsed, comparator_sets):
+            return version
+    return None
+
+
+def sort_versions(versions):
+    parsed_versions = [(parse_version(version), version) for version in versions]
+    parsed_versions = [(parsed, version) for parsed, version in parsed_versions if parsed is not None]
+    parsed_versions.sort(key=lambda item: version_key(item[0]))
+    return parsed_versions
@@ -0,0 +1,98 @@
+import json
+
+from dependency_graph import DependencyGraph, fit_depth, node_depths, reduce_graph, split_label
+
+
+def test_add_node():
+    graph = DependencyGraph()
+    first = graph.add_node("lodash", "4.17.21")
+    assert graph.add_node("lodash", "4.17.21") == first, "Ошибка в add_node: повторный узел"
+    assert graph.add_node("lodash", "3.10.1") != first, "Ошибка в add_node: версии пакета слились в один узел"
+    assert graph.versions("lodash") == ["4.17.21", "3.10.1"], "Ошибка в versions"
+    assert len(graph) == 2
+
+
+def test_add_edge():
+    graph = DependencyGraph()
+    express = graph.add_node("express", "4.17.1")
+    qs = graph.add_node("qs", "6.7.0")
+    assert graph.add_edge(express, qs), "Ошибка в add_edge: ребро не добавлено"
+    assert not graph.add_edge(express, qs), "Ошибка в add_edge: повторное ребро добавлено"
+    assert graph.edge_count == 1
+    assert list(graph.dependencies(express)) == [qs]
+    assert list(graph.edges()) == [(express, qs)]
+    assert dict(graph) == {"express@4.17.1": ["qs@6.7.0"], "qs@6.7.0": []}, "Ошибка в отображении графа"
+
+
+def test_scoped_package():
+    graph = DependencyGraph()
+    node = graph.add_node("@babel/core", "7.26.0")
+    assert graph.package(node) == ("@babel/core", "7.26.0"), "Ошибка в package: пакет со scope"
+    assert split_label("@types/node@^20") == ("@types/node", "^20"), "Ошибка в split_label"
+    assert graph.node("@babel/core@7.26.0") == node
+
+
+def build_tree():
+    # app -> (lib@1, @babel/core -> @babel/parser -> lib@2), old -> lib@1
+    graph = DependencyGraph()
+    app, old = graph.add_node("app", "1.0.0"), graph.add_node("old", "1.0.0")
+    lib1, core = graph.add_node("lib", "1.0.0"), graph.add_node("@babel/core", "7.0.0")
+    parser, lib2 = graph.add_node("@babel/parser", "7.0.0"), graph.add_node("lib", "2.0.0")
+    graph.add_root(app)
+    graph.add_root(old)
+    graph.add_edge(app, lib1)
+    graph.add_edge(app, core)
+    graph.add_edge(core, parser)
+    graph.add_edge(parser, lib2)
+    graph.add_edge(old, lib1)
+    return graph
+
+
+def test_node_depths():
+    graph = build_tree()
+    assert list(node_depths(graph)) == [0, 0, 1, 1, 2, 3], "Ошибка в node_depths"
+    assert fit_depth(graph, 4) == 1 and fit_depth(graph, 1) == 0, "Ошибка в fit_depth"
+    assert fit_depth(graph, 6) is None, "Ошибка в fit_depth: граф помещается целиком"
+
+
+def test_reduce_graph():
+    graph = build_tree()
+    assert dict(reduce_graph(graph)) == dict(graph), "Ошибка в reduce_graph: граф без ограничений изменен"
+    assert dict(reduce_graph(graph, depth=1)) == {
+        "app@1.0.0": ["lib@1.0.0", "@babel/core@7.0.0"], "old@1.0.0": ["lib@1.0.0"],
+        "lib@1.0.0": [], "@babel/core@7.0.0": [],
+    }, "Ошибка в reduce_graph: ограничение глубины"
+    assert set(reduce_graph(graph, prune=["@babel/core"])) == {"app@1.0.0", "old@1.0.0", "lib@1.0.0"}, "Ошибка в reduce_graph: prune"
+    collapsed = reduce_graph(graph, collapse=["@babel/core"])
+    assert collapsed["app@1.0.0"] == ["lib@1.0.0", "@babel/core@7.0.0 (+2)"], "Ошибка в reduce_graph: collapse"
+    assert dict(reduce_graph(graph, group="versions"))["lib"] == [], "Ошибка в reduce_graph: объединение версий"
+    assert len(reduce_graph(graph, group="versions")) == 5
+    scopes = reduce_graph(graph, group="scopes")
+    assert scopes["@babel/*"] == ["lib@2.0.0"], "Ошибка в reduce_graph: объединение scope без петли"
+
+
+def test_json_round_trip():
+    graph = build_tree()
+    loaded = DependencyGraph().load_json(json.loads(json.dumps(graph.to_json())))
+    assert dict(loaded) == dict(graph) and loaded.roots == graph.roots, "Ошибка в to_json/load_json"
+
+
+# Запуск всех тестов
+if __name__ == "__main__":
+    test_add_node()
+    print("test_add_node пройден")
+
+    test_add_edge()
+    print("test_add_edge пройден")
+
+    test_scoped_package()
+    print("test_scoped_package пройден")
+
+    test_node_depths()
+    print("test_node_depths пройден")
+
+    test_reduce_graph()
+    print("test_reduce_graph пройден")
+
+    test_json_round_trip()
+    print("test_json_round_trip пройден")
@@ -1,15 +1,30 @@
 import json
 import os  # Добавляем импорт os
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from unittest.mock import patch, MagicMock
+import dependency_visualizer
 from dependency_visualizer import (
+    RegistryCache,
     load_dependencies,
     normalize_version,
+    resolve_version,
     fetch_dependencies,
     collect_dependencies,
+    collect_lockfile_dependencies,
+    collect_batch_dependencies,
     generate_graphviz_graph,
+    prepare_render_graph,
+    rebuild_dependencies,
     save_graph,
     load_config
 )
+from npm_semver import sort_versions
+from dependency_graph import DependencyGraph
+from instrumentation import Metrics
+from fetch_scheduler import FetchScheduler, RetryPolicy
 
 
 def test_load_dependencies():
@@ -46,8 +61,333 @@ def test_collect_dependencies(mock_fetch_dependencies):
     dependencies = {"express": "4.17.1"}
     all_dependencies = collect_dependencies(dependencies, "https://registry.npmjs.org", max_depth=2)
     
-    assert "express" in all_dependencies, "Ошибка в collect_dependencies: 'express' не найдена"
-    assert "lodash" in all_dependencies["express"], "Ошибка в collect_dependencies: 'lodash' не найдена в 'express'"
+    assert "express@4.17.1" in all_dependencies, "Ошибка в collect_dependencies: 'express' не найдена"
+    assert "lodash@4.17.20" in all_dependencies["express@4.17.1"], "Ошибка в collect_dependencies: 'lodash' не найдена в 'express'"
+
+
+class FakeRegistry:
+    # Локальная замена репозитория npm: отдает /<пакет>/<версия> и /<пакет> из словаря packages.
+    # faults - путь -> список ответов (статус, заголовки), которые отдаются до настоящего,
+    # latency - путь -> задержка ответа в секундах
+    def __init__(self, packages, faults=None, latency=None):
+        self.packages = packages
+        self.faults = {path: list(responses) for path, responses in (faults or {}).items()}
+        self.latency = latency or {}
+        self.requests = []
+        self.connections = set()
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                registry.requests.append(self.path)
+                registry.connections.add(self.client_address)
+                if self.path in registry.latency:
+                    time.sleep(registry.latency[self.path])
+                if registry.faults.get(self.path):
+                    status, headers = registry.faults[self.path].pop(0)
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                pkg, _, version = self.path.strip("/").rpartition("/")
+                if not pkg:
+                    # Запрос /<пакет> возвращает packument со всеми версиями
+                    versions = registry.packages.get(version)
+                    data = {"dist-tags": {"latest": sort_versions(versions)[-1][1]}, "versions": versions} if versions else None
+                else:
+                    data = registry.packages.get(pkg, {}).get(version)
+                body = json.dumps(data).encode() if data is not None else b"{}"
+                etag = f'"{hash(body)}"'
+                if data is not None and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200 if data is not None else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            def handle_error(self, request, client_address):
+                # Клиент, не дождавшийся ответа по таймауту, уже закрыл соединение
+                pass
+
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_collect_dependencies_parallel():
+    registry = FakeRegistry({
+        "a": {"1.0.0": {"dependencies": {"c": "1.0.0", "d": "1.0.0"}}},
+        "b": {"1.0.0": {"dependencies": {"c": "1.0.0"}}},
+        "c": {"1.0.0": {"dependencies": {"e": "1.0.0"}}},
+        "d": {"1.0.0": {"dependencies": {}}},
+        "e": {"1.0.0": {"dependencies": {"f": "1.0.0"}}},
+    })
+    try:
+        all_dependencies = collect_dependencies({"a": "^1.0.0", "b": "1.0.0"}, registry.url, max_depth=3, workers=2)
+    finally:
+        registry.close()
+
+    assert dict(all_dependencies) == {
+        "a@1.0.0": ["c@1.0.0", "d@1.0.0"],
+        "b@1.0.0": ["c@1.0.0"],
+        "c@1.0.0": ["e@1.0.0"],
+        "d@1.0.0": [],
+        "e@1.0.0": ["f@1.0.0"],
+        "f@1.0.0": [],
+    }, "Ошибка в collect_dependencies: неверный граф"
+    # Диапазон ^1.0.0 разрешается по packument пакета a, его зависимости берутся оттуда же
+    assert sorted(registry.requests) == ["/a", "/b/1.0.0", "/c/1.0.0", "/d/1.0.0", "/e/1.0.0"], "Ошибка в collect_dependencies: пакет запрошен повторно"
+    assert len(registry.connections) <= 2, "Ошибка в collect_dependencies: соединения не переиспользуются"
+
+
+def test_collect_dependencies_versions():
+    registry = FakeRegistry({
+        "app": {"1.0.0": {"dependencies": {"lib": "^1.0.0", "old": "1.0.0", "helper": "~1.1.0"}}},
+        "old": {"1.0.0": {"dependencies": {"lib": "0.9.0", "helper": "^1.0.0"}}},
+        "helper": {"1.0.0": {"dependencies": {}}, "1.1.2": {"dependencies": {"lib": "^1.2.0"}}},
+        "lib": {"0.9.0": {"dependencies": {}}, "1.2.0": {"dependencies": {}}, "1.3.1": {"dependencies": {}}},
+    })
+    try:
+        graph = collect_dependencies({"app": "1.0.0"}, registry.url, max_depth=4, workers=2)
+    finally:
+        registry.close()
+
+    # Разные версии lib остаются разными узлами, а диапазоны ~1.1.0 и ^1.0.0 сходятся к одному helper
+    assert sorted(graph.versions("lib")) == ["0.9.0", "1.3.1"], "Ошибка в collect_dependencies: потеряна версия пакета"
+    assert graph["old@1.0.0"] == ["lib@0.9.0", "helper@1.1.2"], "Ошибка в collect_dependencies: неверные ребра"
+    assert graph["helper@1.1.2"] == ["lib@1.3.1"], "Ошибка в collect_dependencies: неверные ребра"
+    assert len(graph) == 5 and graph.edge_count == 6, "Ошибка в collect_dependencies: дубликаты узлов или ребер"
+
+
+def test_collect_lockfile_dependencies():
+    registry = FakeRegistry({
+        "missing": {"1.0.0": {"dependencies": {"b": "1.5.0"}}},
+        "b": {"1.5.0": {"dependencies": {}}},
+    })
+    lock = {
+        "lockfileVersion": 3,
+        "packages": {
+            "": {"dependencies": {"a": "^1.0.0", "b": "^2.0.0"}},
+            "node_modules/a": {"version": "1.2.0", "dependencies": {"b": "^1.0.0", "missing": "1.0.0"},
+                               "optionalDependencies": {"fsevents": "^2"}},
+            "node_modules/a/node_modules/b": {"version": "1.5.0"},
+            "node_modules/b": {"version": "2.1.0", "dependencies": {"a": "^1.0.0"}},
+        },
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "package-lock.json")
+        with open(path, "w") as f:
+            json.dump(lock, f)
+        try:
+            graph = collect_lockfile_dependencies(path, registry.url, max_depth=5, workers=2)
+        finally:
+            registry.close()
+
+    assert dict(graph) == {
+        "a@1.2.0": ["b@1.5.0", "missing@1.0.0"],
+        "b@2.1.0": ["a@1.2.0"],
+        "b@1.5.0": [],
+        "missing@1.0.0": ["b@1.5.0"],
+    }, "Ошибка в collect_lockfile_dependencies: неверный граф"
+    # В репозиторий запрашивается только отсутствующий в lock-файле пакет, необязательный fsevents пропускается
+    assert registry.requests == ["/missing/1.0.0"], "Ошибка в collect_lockfile_dependencies: лишние запросы"
+
+
+def test_rebuild_dependencies():
+    registry = FakeRegistry({
+        "a": {"1.0.0": {"dependencies": {"c": "^1.0.0"}}},
+        "b": {"1.1.0": {"dependencies": {"d": "1.0.0"}}, "2.0.0": {"dependencies": {"c": "^1.0.0"}}},
+        "c": {"1.0.0": {"dependencies": {}}},
+        "d": {"1.0.0": {"dependencies": {}}},
+    })
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_path = os.path.join(directory, "graph_snapshot.json")
+
+        def rebuild(dependencies):
+            # Каждый запуск - как новый процесс: packument-ы в памяти не сохраняются
+            dependency_visualizer._packuments.clear()
+            registry.requests.clear()
+            return rebuild_dependencies(dependencies, registry.url, 3, snapshot_path, workers=2)
+
+        try:
+            first = rebuild({"a": "1.0.0", "b": "^1.0.0", "x": "1.0.0"})
+            assert sorted(registry.requests) == ["/a/1.0.0", "/b", "/c", "/d/1.0.0", "/x/1.0.0"]
+            # Пакет x недоступен, поэтому граф из снимка не используется и x запрашивается снова
+            second = rebuild({"a": "1.0.0", "b": "^1.0.0", "x": "1.0.0"})
+            assert registry.requests == ["/x/1.0.0"], "Ошибка в rebuild_dependencies: неудачный запрос не повторен"
+            assert dict(second) == dict(first)
+
+            third = rebuild({"a": "1.0.0", "b": "^1.0.0"})
+            assert registry.requests == [], "Ошибка в rebuild_dependencies: лишние запросы для неизмененных поддеревьев"
+            assert "x@1.0.0" not in third
+            # Входные данные не изменились и граф полный: он берется из снимка целиком
+            assert dict(rebuild({"a": "1.0.0", "b": "^1.0.0"})) == dict(third) and registry.requests == []
+
+            # Изменился диапазон b: запрашивается только packument b, зависимость c берется из снимка
+            fourth = rebuild({"a": "1.0.0", "b": "^2.0.0"})
+            assert registry.requests == ["/b"], "Ошибка в rebuild_dependencies: пересчитано неизмененное поддерево"
+            assert dict(fourth) == {"a@1.0.0": ["c@1.0.0"], "b@2.0.0": ["c@1.0.0"], "c@1.0.0": []}
+        finally:
+            registry.close()
+
+
+def test_collect_batch_dependencies():
+    registry = FakeRegistry({
+        "web": {"1.0.0": {"dependencies": {"lodash": "^4.0.0", "react": "18.2.0"}}},
+        "react": {"18.2.0": {"dependencies": {"loose-envify": "^1.1.0"}}},
+        "loose-envify": {"1.4.0": {"dependencies": {"js-tokens": "^4.0.0"}}},
+        "js-tokens": {"4.0.0": {"dependencies": {}}},
+        "lodash": {"4.17.21": {"dependencies": {}}},
+    })
+    projects = {
+        "site": {"web": "1.0.0"},
+        "admin": {"react": "18.2.0", "lodash": "^4.17.0"},
+    }
+    try:
+        merged, graphs = collect_batch_dependencies(projects, registry.url, max_depth=2, workers=4)
+        # Общие пакеты запрашиваются один раз на все проекты
+        assert sorted(registry.requests) == ["/lodash", "/loose-envify", "/react/18.2.0", "/web/1.0.0"], "Ошибка в пакетном режиме: повторные запросы"
+        # Граф проекта совпадает с графом отдельного запуска, хотя react в site глубже, чем в admin
+        for name, dependencies in projects.items():
+            assert dict(graphs[name]) == dict(collect_dependencies(dependencies, registry.url, 2)), f"Ошибка в пакетном режиме: граф проекта {name}"
+    finally:
+        registry.close()
+
+    assert dict(graphs["site"]) == {
+        "web@1.0.0": ["lodash@4.17.21", "react@18.2.0"],
+        "lodash@4.17.21": [],
+        "react@18.2.0": ["loose-envify@1.4.0"],
+        "loose-envify@1.4.0": [],
+    }, "Ошибка в пакетном режиме: граф проекта site"
+    assert graphs["admin"]["loose-envify@1.4.0"] == ["js-tokens@^4.0.0"], "Ошибка в пакетном режиме: граф проекта admin"
+    assert set(merged) == set(graphs["site"]) | set(graphs["admin"]), "Ошибка в пакетном режиме: общий граф"
+
+
+def test_metrics():
+    registry = FakeRegistry({
+        "a": {"1.0.0": {"dependencies": {"b": "^1.0.0"}}},
+        "b": {"1.0.0": {"dependencies": {}}, "1.1.0": {"dependencies": {}}},
+    })
+    previous = dependency_visualizer.metrics
+    dependency_visualizer.metrics = metrics = Metrics(trace=True)
+    try:
+        collect_dependencies({"a": "1.0.0", "missing": "1.0.0"}, registry.url, 3, workers=2)
+    finally:
+        dependency_visualizer.metrics = previous
+        registry.close()
+
+    summary = metrics.summary()
+    counters = summary["counters"]
+    assert counters["requests"] == 3 and counters["failures"] == 1, "Ошибка в метриках: число запросов"
+    assert counters["packument_hits"] == 1, "Ошибка в метриках: попадания в packument"
+    assert counters["bytes_received"] > 0 and summary["latency_ms"]["count"] == 3
+    assert 1 <= summary["max_concurrency"] <= 2
+    assert set(summary["phases_seconds"]) == {"resolve versions", "fetch dependencies"}
+    fetches = sorted(event["name"] for event in metrics.events if event["cat"] == "fetch")
+    assert fetches == ["a@1.0.0", "b", "missing@1.0.0"], "Ошибка в метриках: события трассировки"
+
+
+def test_fetch_retries():
+    # 5xx повторяются, 429 с Retry-After приостанавливает запросы, после исчерпания повторов
+    # и таймаутов зависимости пакета недоступны, но обход продолжается
+    registry = FakeRegistry({
+        "a": {"1.0.0": {"dependencies": {"b": "1.0.0", "c": "1.0.0"}}},
+        "b": {"1.0.0": {"dependencies": {}}},
+        "c": {"1.0.0": {"dependencies": {}}},
+        "slow": {"1.0.0": {"dependencies": {}}},
+    }, faults={
+        "/a/1.0.0": [(503, {}), (502, {})],
+        "/b/1.0.0": [(429, {"Retry-After": "0.2"})],
+        "/c/1.0.0": [(500, {})] * 3,
+    }, latency={"/slow/1.0.0": 0.5})
+    saved_metrics, saved_scheduler = dependency_visualizer.metrics, dependency_visualizer.scheduler
+    dependency_visualizer.metrics = Metrics()
+    dependency_visualizer.scheduler = FetchScheduler(RetryPolicy(retries=2, backoff=0.01, timeout=0.1), limit=4)
+    try:
+        started = time.monotonic()
+        graph = collect_dependencies({"a": "1.0.0"}, registry.url, max_depth=2, workers=2)
+        elapsed = time.monotonic() - started
+        slow = fetch_dependencies("slow", "1.0.0", registry.url)
+        counters = dependency_visualizer.metrics.counters
+    finally:
+        dependency_visualizer.metrics, dependency_visualizer.scheduler = saved_metrics, saved_scheduler
+        registry.close()
+
+    assert dict(graph) == {"a@1.0.0": ["b@1.0.0", "c@1.0.0"], "b@1.0.0": [], "c@1.0.0": []}, "Ошибка в collect_dependencies: неверный граф после повторов"
+    assert registry.requests.count("/a/1.0.0") == 3, "Ошибка в FetchScheduler: 5xx не повторяется"
+    assert registry.requests.count("/b/1.0.0") == 2, "Ошибка в FetchScheduler: 429 не повторяется"
+    assert elapsed >= 0.2, "Ошибка в FetchScheduler: Retry-After не соблюдается"
+    assert registry.requests.count("/c/1.0.0") == 3, "Ошибка в FetchScheduler: неверное число попыток"
+    assert slow is dependency_visualizer.UNAVAILABLE, "Ошибка в fetch_dependencies: таймаут не считается неудачей"
+    assert registry.requests.count("/slow/1.0.0") == 3, "Ошибка в FetchScheduler: таймаут не повторяется"
+    assert counters["retries"] == 2 + 1 + 2 + 2, "Ошибка в FetchScheduler: неверное число повторов"
+    assert counters["throttled"] == 2, "Ошибка в FetchScheduler: не учтены ответы 503 и 429"
+    assert counters["failures"] == 2, "Ошибка в FetchScheduler: неверное число неудач"
+
+
+def test_registry_cache():
+    registry = FakeRegistry({
+        "express": {"4.17.1": {"dependencies": {"qs": "6.7.0"}}, "latest": {"dependencies": {"qs": "6.13.0"}}},
+    })
+    with tempfile.TemporaryDirectory() as cache_dir:
+        try:
+            cache = RegistryCache(cache_dir, latest_ttl=3600)
+            assert fetch_dependencies("express", "4.17.1", registry.url, cache) == {"qs": "6.7.0"}
+            assert fetch_dependencies("express", "latest", registry.url, cache) == {"qs": "6.13.0"}
+            # Точная версия и свежая запись latest берутся из кэша без запросов
+            assert fetch_dependencies("express", "4.17.1", registry.url, cache) == {"qs": "6.7.0"}
+            assert fetch_dependencies("express", "latest", registry.url, cache) == {"qs": "6.13.0"}
+            assert len(registry.requests) == 2, "Ошибка в RegistryCache: запрос к кэшированной версии"
+
+            # Устаревшая запись latest перепроверяется условным запросом
+            cache = RegistryCache(cache_dir, latest_ttl=0)
+            assert fetch_dependencies("express", "latest", registry.url, cache) == {"qs": "6.13.0"}
+            assert len(registry.requests) == 3, "Ошибка в RegistryCache: устаревшая запись не перепроверена"
+        finally:
+            registry.close()
+
+        # В автономном режиме сеть не используется
+        cache = RegistryCache(cache_dir, latest_ttl=0, offline=True)
+        assert fetch_dependencies("express", "latest", registry.url, cache) == {"qs": "6.13.0"}, "Ошибка в RegistryCache: автономный режим не использует кэш"
+        assert fetch_dependencies("lodash", "4.17.21", registry.url, cache) == {}, "Ошибка в RegistryCache: автономный режим не должен обращаться к сети"
+
+
+def test_resolve_version():
+    registry = FakeRegistry({
+        "qs": {
+            "6.5.2": {"dependencies": {}},
+            "6.7.0": {"dependencies": {}},
+            "6.13.0": {"dependencies": {"side-channel": "^1.0.6"}},
+        },
+    })
+    try:
+        assert resolve_version("qs", "6.7.0", registry.url) == "6.7.0"
+        assert registry.requests == [], "Ошибка в resolve_version: точная версия не требует запросов"
+        assert resolve_version("qs", "~6.5.0", registry.url) == "6.5.2"
+        assert resolve_version("qs", "^6.5.0", registry.url) == "6.13.0"
+        assert resolve_version("qs", ">=6 <6.10", registry.url) == "6.7.0"
+        assert resolve_version("qs", "latest", registry.url) == "6.13.0"
+        assert fetch_dependencies("qs", "6.13.0", registry.url) == {"side-channel": "^1.0.6"}
+        assert registry.requests == ["/qs"], "Ошибка в resolve_version: packument должен загружаться один раз"
+    finally:
+        registry.close()
 
 
 def test_generate_graphviz_graph():
@@ -56,6 +396,21 @@ def test_generate_graphviz_graph():
     assert "express -> lodash" in graph.source, "Ошибка в generate_graphviz_graph: 'express -> lodash' отсутствует"
 
 
+def test_prepare_render_graph():
+    graph = DependencyGraph()
+    previous = graph.add_node("p0", "1.0.0")
+    graph.add_root(previous)
+    for i in range(1, 10):
+        node = graph.add_node(f"p{i}", "1.0.0")
+        graph.add_edge(previous, node)
+        previous = node
+
+    assert len(prepare_render_graph(graph, max_nodes=None)) == 10
+    # Слишком большой граф обрезается по глубине до max_nodes узлов
+    assert list(prepare_render_graph(graph, max_nodes=4)) == ["p0@1.0.0", "p1@1.0.0", "p2@1.0.0", "p3@1.0.0"]
+    assert len(prepare_render_graph(graph, depth=2)) == 3, "Ошибка в prepare_render_graph: глубина не учтена"
+
+
 def test_save_graph():
     from graphviz import Digraph
     graph = Digraph(comment="Test Graph")
@@ -98,10 +453,40 @@ if __name__ == "__main__":
     
     test_collect_dependencies()
     print("test_collect_dependencies пройден")
+
+    test_collect_dependencies_parallel()
+    print("test_collect_dependencies_parallel пройден")
+
+    test_collect_dependencies_versions()
+    print("test_collect_dependencies_versions пройден")
+
+    test_collect_lockfile_dependencies()
+    print("test_collect_lockfile_dependencies пройден")
+
+    test_rebuild_dependencies()
+    print("test_rebuild_dependencies пройден")
+
+    test_collect_batch_dependencies()
+    print("test_collect_batch_dependencies пройден")
+
+    test_metrics()
+    print("test_metrics пройден")
+
+    test_fetch_retries()
+    print("test_fetch_retries пройден")
+
+    test_registry_cache()
+    print("test_registry_cache пройден")
+
+    test_resolve_version()
+    print("test_resolve_version пройден")
     
     test_generate_graphviz_graph()
     print("test_generate_graphviz_graph пройден")
     
+    test_prepare_render_graph()
+    print("test_prepare_render_graph пройден")
+
     test_save_graph()
     print("test_save_graph пройден")
     
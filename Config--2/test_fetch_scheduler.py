@@ -0,0 +1,95 @@
+import threading
+import time
+from email.utils import formatdate
+
+from fetch_scheduler import AdaptiveLimiter, FetchScheduler, RetryPolicy, parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0, "Ошибка в parse_retry_after: число секунд"
+    assert parse_retry_after(None) is None, "Ошибка в parse_retry_after: пустой заголовок"
+    assert parse_retry_after("soon") is None, "Ошибка в parse_retry_after: неверный заголовок"
+    delay = parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+    assert 25 <= delay <= 30, "Ошибка в parse_retry_after: дата HTTP"
+    assert parse_retry_after(formatdate(time.time() - 30, usegmt=True)) == 0.0, "Ошибка в parse_retry_after: дата в прошлом"
+
+
+def test_retry_policy():
+    policy = RetryPolicy(backoff=1, max_delay=10)
+    for attempt in range(8):
+        assert 0 <= policy.delay(attempt) <= min(10, 2 ** attempt), "Ошибка в RetryPolicy: задержка вне границ"
+    assert policy.delay(0, retry_after=5) == 5, "Ошибка в RetryPolicy: Retry-After не учитывается"
+    assert policy.delay(0, retry_after=100) == 10, "Ошибка в RetryPolicy: задержка больше max_delay"
+
+
+def test_adaptive_limiter():
+    limiter = AdaptiveLimiter(4)
+    limiter.acquire()
+    limiter.release(congested=True)
+    assert limiter.limit == 2, "Ошибка в AdaptiveLimiter: предел не уменьшен"
+    limiter.acquire()
+    limiter.release(succeeded=False)
+    assert limiter.limit == 2, "Ошибка в AdaptiveLimiter: ошибка изменила предел"
+    for _ in range(2):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 3, "Ошибка в AdaptiveLimiter: предел не восстанавливается"
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 4, "Ошибка в AdaptiveLimiter: предел выше начального"
+
+    # Одновременно выполняется не больше limit запросов
+    limiter = AdaptiveLimiter(2)
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def work():
+        limiter.acquire()
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        limiter.release()
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2, "Ошибка в AdaptiveLimiter: превышен предел одновременных запросов"
+
+    # Пауза после 429 задерживает следующие запросы
+    limiter.acquire()
+    limiter.release(congested=True, pause=0.1)
+    started = time.monotonic()
+    limiter.acquire()
+    limiter.release()
+    assert time.monotonic() - started >= 0.09, "Ошибка в AdaptiveLimiter: пауза не соблюдается"
+
+
+def test_send_without_metrics():
+    class Response:
+        status_code = 200
+        content = b"{}"
+        headers = {}
+
+    scheduler = FetchScheduler(RetryPolicy(retries=0))
+    response = scheduler.send(lambda url, headers=None, timeout=None: Response(), "https://registry/x")
+    assert response.status_code == 200, "Ошибка в FetchScheduler.send: не работает без metrics"
+
+
+# Запуск всех тестов
+if __name__ == "__main__":
+    test_parse_retry_after()
+    print("test_parse_retry_after пройден")
+
+    test_retry_policy()
+    print("test_retry_policy пройден")
+
+    test_adaptive_limiter()
+    print("test_adaptive_limiter пройден")
+
+    test_send_without_metrics()
+    print("test_send_without_metrics пройден")
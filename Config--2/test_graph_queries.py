@@ -0,0 +1,127 @@
+import json
+import os
+import tempfile
+
+from dependency_graph import DependencyGraph
+from graph_queries import (GraphIndex, closure_size, fan_ranking, find_cycles, find_nodes, load_graph, longest_path,
+                           reverse_dependencies, shortest_path, strongly_connected_components)
+
+
+def build_graph(edges):
+    graph = DependencyGraph()
+    for source, target in edges:
+        graph.add_edge(graph.add_label(source), graph.add_label(target))
+    return graph
+
+
+# app -> express -> body-parser -> qs -> side-channel, app -> qs@6.5.0, express -> qs;
+# цикл es-abstract <-> es-to-primitive
+EDGES = [
+    ("app@1.0.0", "express@4.18.2"),
+    ("express@4.18.2", "body-parser@1.20.1"),
+    ("body-parser@1.20.1", "qs@6.11.0"),
+    ("express@4.18.2", "qs@6.11.0"),
+    ("qs@6.11.0", "side-channel@1.0.4"),
+    ("app@1.0.0", "qs@6.5.0"),
+    ("side-channel@1.0.4", "es-abstract@1.22.0"),
+    ("es-abstract@1.22.0", "es-to-primitive@1.2.1"),
+    ("es-to-primitive@1.2.1", "es-abstract@1.22.0"),
+]
+
+
+def test_graph_index():
+    graph = build_graph(EDGES)
+    index = GraphIndex(graph)
+    express = graph.node("express@4.18.2")
+    assert index.labels(index.successors(express)) == ["body-parser@1.20.1", "qs@6.11.0"], "Ошибка в GraphIndex: прямая смежность"
+    assert index.labels(index.predecessors(graph.node("qs@6.11.0"))) == ["express@4.18.2", "body-parser@1.20.1"], "Ошибка в GraphIndex: обратная смежность"
+    assert index.fan_out(express) == 2 and index.fan_in(express) == 1
+
+
+def test_reverse_dependencies():
+    graph = build_graph(EDGES)
+    index = GraphIndex(graph)
+    qs = find_nodes(graph, "qs")
+    assert sorted(index.labels(qs)) == ["qs@6.11.0", "qs@6.5.0"], "Ошибка в find_nodes: все версии пакета"
+    assert sorted(index.labels(reverse_dependencies(index, qs))) == ["app@1.0.0", "body-parser@1.20.1", "express@4.18.2"]
+    assert sorted(index.labels(reverse_dependencies(index, find_nodes(graph, "side-channel@1.0.4"), transitive=True))) == [
+        "app@1.0.0", "body-parser@1.20.1", "express@4.18.2", "qs@6.11.0",
+    ], "Ошибка в reverse_dependencies: транзитивные зависимые"
+    try:
+        find_nodes(graph, "left-pad")
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("Ошибка в find_nodes: отсутствующий пакет найден")
+
+
+def test_paths():
+    graph = build_graph(EDGES)
+    index = GraphIndex(graph)
+    path = shortest_path(index, find_nodes(graph, "app"), find_nodes(graph, "side-channel"))
+    assert index.labels(path) == ["app@1.0.0", "express@4.18.2", "qs@6.11.0", "side-channel@1.0.4"], "Ошибка в shortest_path"
+    assert shortest_path(index, find_nodes(graph, "qs@6.5.0"), find_nodes(graph, "app")) is None
+    # Ребро внутри цикла не удлиняет цепочку
+    assert index.labels(longest_path(index)) == [
+        "app@1.0.0", "express@4.18.2", "body-parser@1.20.1", "qs@6.11.0", "side-channel@1.0.4", "es-abstract@1.22.0",
+    ], "Ошибка в longest_path"
+
+
+def test_cycles():
+    graph = build_graph(EDGES + [("qs@6.5.0", "qs@6.5.0")])
+    index = GraphIndex(graph)
+    assert sorted(sorted(index.labels(cycle)) for cycle in find_cycles(index)) == [
+        ["es-abstract@1.22.0", "es-to-primitive@1.2.1"], ["qs@6.5.0"],
+    ], "Ошибка в find_cycles"
+    # Компоненты выдаются после всех достижимых из них
+    components = strongly_connected_components(index)
+    position = {node: number for number, component in enumerate(components) for node in component}
+    assert all(position[target] <= position[source] for source, target in graph.edges()), "Ошибка в порядке компонент"
+
+
+def test_long_chain():
+    # Обход без рекурсии: цепочка длиннее предела рекурсии Python
+    graph = build_graph([(f"p{i}@1.0.0", f"p{i + 1}@1.0.0") for i in range(5000)] + [("p5000@1.0.0", "p0@1.0.0")])
+    index = GraphIndex(graph)
+    assert len(find_cycles(index)) == 1 and len(find_cycles(index)[0]) == 5001
+
+
+def test_fan_and_closure():
+    graph = build_graph(EDGES)
+    index = GraphIndex(graph)
+    assert fan_ranking(index, 2) == [(2, "express@4.18.2"), (2, "app@1.0.0")], "Ошибка в fan_ranking"
+    assert fan_ranking(index, 1, reverse=True) == [(2, "qs@6.11.0")], "Ошибка в fan_ranking по зависимым"
+    assert closure_size(index, find_nodes(graph, "express@4.18.2")) == 5, "Ошибка в closure_size"
+    assert closure_size(index, find_nodes(graph, "express@4.18.2"), reverse=True) == 1
+
+
+def test_load_graph():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "graph.json")
+        with open(path, "w") as f:
+            json.dump({"edges": [["a@1.0.0", "b@1.0.0"]], "nodes": ["a@1.0.0", "b@1.0.0", "c@1.0.0"]}, f)
+        assert dict(load_graph(path)) == {"a@1.0.0": ["b@1.0.0"], "b@1.0.0": [], "c@1.0.0": []}, "Ошибка в load_graph"
+
+
+# Запуск всех тестов
+if __name__ == "__main__":
+    test_graph_index()
+    print("test_graph_index пройден")
+
+    test_reverse_dependencies()
+    print("test_reverse_dependencies пройден")
+
+    test_paths()
+    print("test_paths пройден")
+
+    test_cycles()
+    print("test_cycles пройден")
+
+    test_long_chain()
+    print("test_long_chain пройден")
+
+    test_fan_and_closure()
+    print("test_fan_and_closure пройден")
+
+    test_load_graph()
+    print("test_load_graph пройден")
@@ -0,0 +1,81 @@
+import csv
+import json
+import os
+import tempfile
+import xml.etree.ElementTree as ElementTree
+
+from dependency_graph import DependencyGraph
+from graph_writers import open_graph_writer, write_graph
+
+
+def build_graph(listeners=()):
+    graph = DependencyGraph(listeners)
+    express = graph.add_node("express", "4.17.1")
+    qs = graph.add_node("qs", "6.7.0")
+    graph.add_root(express)
+    graph.add_edge(express, qs)
+    graph.add_edge(express, graph.add_node("@types/node", "20.1.0"))
+    graph.add_node("isolated", "1.0.0")
+    return graph
+
+
+def test_streaming_writers():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {graph_format: os.path.join(directory, f"graph.{graph_format}") for graph_format in ("dot", "json", "graphml", "csv")}
+        writers = [open_graph_writer(path) for path in paths.values()]
+        graph = build_graph(writers)
+        # Ребро записано в файл сразу при добавлении, до закрытия writer-а
+        writers[0].file.flush()
+        with open(paths["dot"], encoding="utf-8") as f:
+            assert '"express@4.17.1" -> "qs@6.7.0"' in f.read(), "Ошибка в DotWriter: ребро не записано сразу"
+        for writer in writers:
+            writer.close()
+
+        with open(paths["dot"], encoding="utf-8") as f:
+            dot = f.read()
+        assert dot.startswith("// Dependency Graph\ndigraph {") and dot.endswith("}\n"), "Ошибка в DotWriter"
+        assert '\t"isolated@1.0.0"\n' in dot, "Ошибка в DotWriter: узел без ребер потерян"
+
+        with open(paths["json"], encoding="utf-8") as f:
+            data = json.load(f)
+        assert data["edges"] == [["express@4.17.1", "qs@6.7.0"], ["express@4.17.1", "@types/node@20.1.0"]], "Ошибка в JsonWriter"
+        assert data["nodes"] == list(graph), "Ошибка в JsonWriter: неверный список узлов"
+
+        root = ElementTree.parse(paths["graphml"]).getroot()
+        namespace = "{http://graphml.graphdrawing.org/xmlns}"
+        assert [node.get("id") for node in root.iter(namespace + "node")] == list(graph), "Ошибка в GraphMLWriter"
+        assert len(list(root.iter(namespace + "edge"))) == 2, "Ошибка в GraphMLWriter: неверное число ребер"
+
+        with open(paths["csv"], encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows == [["source", "target"], ["express@4.17.1", "qs@6.7.0"], ["express@4.17.1", "@types/node@20.1.0"]], "Ошибка в CsvWriter"
+
+
+def test_write_graph():
+    graph = build_graph()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "graph.json")
+        write_graph(graph, path)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    assert len(data["nodes"]) == 4 and len(data["edges"]) == 2, "Ошибка в write_graph"
+
+
+def test_empty_graph():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "graph.json")
+        open_graph_writer(path).close()
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f) == {"edges": [], "nodes": []}, "Ошибка в JsonWriter: пустой граф"
+
+
+# Запуск всех тестов
+if __name__ == "__main__":
+    test_streaming_writers()
+    print("test_streaming_writers пройден")
+
+    test_write_graph()
+    print("test_write_graph пройден")
+
+    test_empty_graph()
+    print("test_empty_graph пройден")
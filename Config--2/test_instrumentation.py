@@ -0,0 +1,71 @@
+import json
+import os
+import tempfile
+import threading
+
+from instrumentation import Metrics
+
+
+def test_counters_and_latency():
+    metrics = Metrics()
+    for size in (100, 200, 300):
+        with metrics.request("pkg@1.0.0") as info:
+            info["bytes"] = size
+    metrics.count("cache_hits", 2)
+    summary = metrics.summary()
+    assert summary["counters"] == {"requests": 3, "bytes_received": 600, "cache_hits": 2}, "Ошибка в Metrics: счетчики"
+    assert summary["latency_ms"]["count"] == 3
+    assert sum(summary["latency_ms"]["histogram"].values()) == 3, "Ошибка в Metrics: гистограмма задержек"
+    assert summary["max_concurrency"] == 1
+
+
+def test_concurrency():
+    metrics = Metrics()
+    barrier = threading.Barrier(4)
+
+    def fetch():
+        with metrics.request("pkg"):
+            barrier.wait()
+
+    threads = [threading.Thread(target=fetch) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert metrics.max_in_flight == 4 and metrics.in_flight == 0, "Ошибка в Metrics: число одновременных запросов"
+
+
+def test_trace_export():
+    metrics = Metrics(trace=True, settings={"workers": 2})
+    with metrics.phase("build graph"):
+        with metrics.request("pkg@1.0.0") as info:
+            info["status"] = 200
+    with tempfile.TemporaryDirectory() as directory:
+        trace_path = os.path.join(directory, "trace.json")
+        summary_path = os.path.join(directory, "metrics.json")
+        metrics.write_trace(trace_path)
+        metrics.write_json(summary_path)
+        with open(trace_path) as f:
+            trace = json.load(f)
+        with open(summary_path) as f:
+            summary = json.load(f)
+
+    events = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    assert [(event["name"], event["cat"]) for event in events] == [("pkg@1.0.0", "fetch"), ("build graph", "phase")], "Ошибка в write_trace"
+    assert events[0]["args"] == {"status": 200}
+    # Запрос вложен в этап по времени
+    assert events[1]["ts"] <= events[0]["ts"] and events[0]["ts"] + events[0]["dur"] <= events[1]["ts"] + events[1]["dur"]
+    assert any(event["ph"] == "M" and event["name"] == "thread_name" for event in trace["traceEvents"])
+    assert summary["settings"] == {"workers": 2} and "build graph" in summary["phases_seconds"], "Ошибка в write_json"
+
+
+# Запуск всех тестов
+if __name__ == "__main__":
+    test_counters_and_latency()
+    print("test_counters_and_latency пройден")
+
+    test_concurrency()
+    print("test_concurrency пройден")
+
+    test_trace_export()
+    print("test_trace_export пройден")
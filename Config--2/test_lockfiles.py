@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+
+from lockfiles import PackageLock, YarnLock, load_lockfile
+
+
+PACKAGE_LOCK = {
+    "name": "app",
+    "lockfileVersion": 3,
+    "packages": {
+        "": {"name": "app", "dependencies": {"a": "^1.0.0", "ui": "*"}, "devDependencies": {"b": "^2.0.0"}},
+        "node_modules/a": {"version": "1.2.0", "dependencies": {"b": "^1.0.0"}, "optionalDependencies": {"fsevents": "^2"}},
+        "node_modules/a/node_modules/b": {"version": "1.5.0"},
+        "node_modules/b": {"version": "2.1.0", "dependencies": {"@scope/c": "^3.0.0"}},
+        "node_modules/@scope/c": {"version": "3.0.1"},
+        "node_modules/ui": {"resolved": "packages/ui", "link": True},
+        "packages/ui": {"name": "ui", "version": "0.1.0", "dependencies": {"a": "^1.0.0"}},
+        "node_modules/legacy": {"name": "real-legacy", "version": "0.9.0"},
+    },
+}
+
+YARN_V1 = '''# THIS IS AN AUTOGENERATED FILE. DO NOT EDIT THIS FILE DIRECTLY.
+# yarn lockfile v1
+
+
+"@scope/c@^3.0.0":
+  version "3.0.1"
+  resolved "https://registry.yarnpkg.com/@scope/c/-/c-3.0.1.tgz"
+
+a@^1.0.0, a@^1.1.0:
+  version "1.2.0"
+  dependencies:
+    "@scope/c" "^3.0.0"
+  optionalDependencies:
+    fsevents "^2"
+'''
+
+YARN_BERRY = '''# This file is generated by running "yarn install" inside your project.
+
+__metadata:
+  version: 8
+  cacheKey: 10c0
+
+"a@npm:^1.0.0, a@npm:^1.1.0":
+  version: 1.2.0
+  resolution: "a@npm:1.2.0"
+  dependencies:
+    "@scope/c": "npm:^3.0.0"
+  languageName: node
+  linkType: hard
+
+"@scope/c@npm:^3.0.0":
+  version: 3.0.1
+  resolution: "@scope/c@npm:3.0.1"
+  languageName: node
+  linkType: hard
+
+"app@workspace:.":
+  version: 0.0.0-use.local
+  resolution: "app@workspace:."
+  dependencies:
+    a: "npm:^1.1.0"
+  languageName: unknown
+  linkType: soft
+'''
+
+
+def write_temp(directory, name, content):
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def test_package_lock():
+    with tempfile.TemporaryDirectory() as directory:
+        lockfile = load_lockfile(write_temp(directory, "package-lock.json", json.dumps(PACKAGE_LOCK)))
+    assert isinstance(lockfile, PackageLock)
+    assert lockfile.root_dependencies() == {"a": "^1.0.0", "ui": "*", "b": "^2.0.0"}, "Ошибка в root_dependencies"
+    # Вложенная копия в node_modules родителя важнее копии верхнего уровня
+    assert lockfile.find("node_modules/a", "b", "^1.0.0") == "node_modules/a/node_modules/b", "Ошибка в find: вложенный пакет"
+    assert lockfile.find("node_modules/b", "@scope/c", "^3.0.0") == "node_modules/@scope/c", "Ошибка в find: пакет предка"
+    assert lockfile.find(None, "ui", "*") == "packages/ui", "Ошибка в find: ссылка на рабочее пространство"
+    assert lockfile.find("packages/ui", "a", "^1.0.0") == "node_modules/a", "Ошибка в find: зависимость рабочего пространства"
+    assert lockfile.find("node_modules/a", "fsevents", "^2") is None
+    assert lockfile.entries["node_modules/a"].optional == {"fsevents"}
+    assert lockfile.entries["node_modules/legacy"].name == "real-legacy", "Ошибка в PackageLock: псевдоним пакета"
+
+
+def test_package_lock_v1():
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_temp(directory, "package-lock.json", json.dumps({"lockfileVersion": 1, "dependencies": {}}))
+        try:
+            PackageLock(path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Ошибка в PackageLock: lock-файл версии 1 не отклонен")
+
+
+def test_yarn_v1():
+    with tempfile.TemporaryDirectory() as directory:
+        lockfile = load_lockfile(write_temp(directory, "yarn.lock", YARN_V1))
+    assert isinstance(lockfile, YarnLock)
+    assert lockfile.root_dependencies() is None, "Ошибка в YarnLock: в yarn.lock v1 нет корневого проекта"
+    assert lockfile.find(None, "a", "^1.1.0") == lockfile.find(None, "a", "^1.0.0") == "a@^1.0.0"
+    entry = lockfile.entries["a@^1.0.0"]
+    assert (entry.name, entry.version) == ("a", "1.2.0"), "Ошибка в YarnLock: неверная версия"
+    assert entry.dependencies == {"@scope/c": "^3.0.0", "fsevents": "^2"}, "Ошибка в YarnLock: неверные зависимости"
+    assert entry.optional == {"fsevents"}
+    assert lockfile.entries[lockfile.find(None, "@scope/c", "^3.0.0")].version == "3.0.1"
+
+
+def test_yarn_berry():
+    with tempfile.TemporaryDirectory() as directory:
+        lockfile = load_lockfile(write_temp(directory, "yarn.lock", YARN_BERRY))
+    assert lockfile.root_dependencies() == {"a": "npm:^1.1.0"}, "Ошибка в YarnLock: корневое рабочее пространство"
+    assert lockfile.find(None, "a", "npm:^1.1.0") == "a@npm:^1.0.0"
+    # Диапазоны без протокола ищутся как npm:<диапазон>
+    assert lockfile.find(None, "a", "^1.0.0") == "a@npm:^1.0.0"
+    assert lockfile.entries["a@npm:^1.0.0"].dependencies == {"@scope/c": "npm:^3.0.0"}
+    assert lockfile.entries["@scope/c@npm:^3.0.0"].version == "3.0.1"
+    assert "__metadata" not in lockfile.entries
+
+
+# Запуск всех тестов
+if __name__ == "__main__":
+    test_package_lock()
+    print("test_package_lock пройден")
+
+    test_package_lock_v1()
+    print("test_package_lock_v1 пройден")
+
+    test_yarn_v1()
+    print("test_yarn_v1 пройден")
+
+    test_yarn_berry()
+    print("test_yarn_berry пройден")
@@ -0,0 +1,56 @@
+from npm_semver import parse_version, max_satisfying, pick_version, sort_versions
+
+
+VERSIONS = sort_versions([
+    "0.0.3", "0.0.4", "0.2.3", "0.2.9", "0.3.0", "1.0.0", "1.2.3", "1.2.9",
+    "1.3.0-beta", "1.3.0", "1.9.9", "2.0.0-rc.1", "2.0.0", "2.4.1", "3.0.0", "not-a-version",
+])
+
+
+def test_parse_version():
+    assert parse_version("1.2.3") == (1, 2, 3, None), "Ошибка в parse_version: 1.2.3"
+    assert parse_version("v1.2.3+build.5") == (1, 2, 3, None), "Ошибка в parse_version: v1.2.3+build.5"
+    assert parse_version("1.2") is None, "Ошибка в parse_version: частичная версия не является точной"
+    assert [version for _, version in sort_versions(["1.0.0", "1.0.0-rc.10", "1.0.0-rc.2", "1.0.0-beta"])] == \
+        ["1.0.0-beta", "1.0.0-rc.2", "1.0.0-rc.10", "1.0.0"], "Ошибка в sort_versions: неверный порядок pre-release"
+
+
+def test_max_satisfying():
+    cases = {
+        "^1.2.3": "1.9.9",
+        "~1.2.3": "1.2.9",
+        "^0.2.3": "0.2.9",
+        "^0.0.3": "0.0.3",
+        ">=2 <3": "2.4.1",
+        "*": "3.0.0",
+        "": "3.0.0",
+        "1.x": "1.9.9",
+        "1.2": "1.2.9",
+        "<=1.3": "1.3.0",
+        ">1.2": "3.0.0",
+        "1.2.3 - 2": "2.4.1",
+        ">= 1.0.0 < 1.3": "1.2.9",
+        "1.0.0 || ^3": "3.0.0",
+        "^1.3.0-beta": "1.9.9",
+        ">=2.0.0-rc.0 <2.0.0": "2.0.0-rc.1",
+        "^4": None,
+    }
+    for spec, expected in cases.items():
+        assert max_satisfying(VERSIONS, spec) == expected, f"Ошибка в max_satisfying для '{spec}'"
+
+
+def test_pick_version():
+    assert pick_version(VERSIONS, "^1.0.0", "1.2.3") == "1.2.3", "Ошибка в pick_version: подходящий latest должен выбираться"
+    assert pick_version(VERSIONS, "^2.0.0", "1.2.3") == "2.4.1", "Ошибка в pick_version: неподходящий latest выбран"
+
+
+# Запуск всех тестов
+if __name__ == "__main__":
+    test_parse_version()
+    print("test_parse_version пройден")
+
+    test_max_satisfying()
+    print("test_max_satisfying пройден")
+
+    test_pick_version()
+    print("test_pick_version пройден")
@@ -1,8 +1,16 @@
 import argparse
+import contextlib
+import glob
+import hashlib
+import io
 import json
+import os
 import sys
 import re
 import operator
+import functools
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
 # Регулярное выражение для проверки идентификаторов
 IDENTIFIER_REGEX = re.compile(r'^[_A-Z][_a-zA-Z0-9]*$')
@@ -13,6 +21,25 @@ EXPR_REGEX = re.compile(r'^\$\{(.+)\}$')
 # Регулярное выражение для токенизации выражений
 EXPR_TOKEN_REGEX = re.compile(r'\[\[[^\]]*\]\]|\S+')
 
+# Пробельные символы JSON между лексемами
+JSON_WHITESPACE = ' \t\n\r'
+JSON_WHITESPACE_REGEX = re.compile(r'[ \t\n\r]*')
+
+# Символы, которыми может заканчиваться число в JSON
+JSON_DELIMITERS = frozenset(',]}' + JSON_WHITESPACE)
+
+# Размер блока, которым потоковый режим читает входной файл
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Манифест пакетного режима по умолчанию: хэши входных и выходных файлов прошлого запуска
+DEFAULT_MANIFEST = '.config_manifest.json'
+
+# Расширение файлов, которые пакетный режим пишет рядом с входными
+OUTPUT_SUFFIX = '.txt'
+
+# Версия манифеста; при изменении формата вывода все файлы преобразуются заново
+MANIFEST_VERSION = 1
+
 # Поддерживаемые операции
 OPERATIONS = {
     '+': operator.add,
@@ -29,6 +56,10 @@ def parse_arguments():
     parser = argparse.ArgumentParser(description='Преобразователь JSON в учебный конфигурационный язык.')
     # Устанавливаем config.json как файл по умолчанию
     parser.add_argument('input_file', nargs='?', default='config.json', help='Путь к входному JSON файлу (по умолчанию: config.json).')
+    parser.add_argument('--stream', action='store_true', help='Читать JSON по ключам и выводить каждую запись сразу после вычисления.')
+    parser.add_argument('--workers', type=int, help='Число процессов: для вычисления независимых групп констант (по умолчанию: 1) или для файлов пакетного режима (по умолчанию: число ядер).')
+    parser.add_argument('--batch', nargs='+', metavar='PATH', help='Пакетный режим: каталоги, файлы или шаблоны (**/*.json); результат пишется рядом с каждым файлом.')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST, help=f'Манифест пакетного режима с хэшами файлов (по умолчанию: {DEFAULT_MANIFEST}).')
     return parser.parse_args()
 
 def read_json(file_path):
@@ -42,6 +73,96 @@ def read_json(file_path):
         sys.stderr.write(f"Ошибка: Неверный JSON формат. {e}\n")
         sys.exit(1)
 
+class JsonObjectReader:
+    # Поблочное чтение JSON-объекта: в буфере хранится только необработанный хвост файла,
+    # поэтому память ограничена самым большим значением, а не размером документа
+    def __init__(self, f, chunk_size=STREAM_CHUNK_SIZE):
+        self.file = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _read(self, size):
+        chunk = self.file.read(size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+
+    def error(self, message):
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def peek(self):
+        # Следующий значащий символ или '' в конце файла
+        if self.pos < len(self.buffer) and self.buffer[self.pos] not in JSON_WHITESPACE:
+            return self.buffer[self.pos]
+        while True:
+            self.pos = JSON_WHITESPACE_REGEX.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._read(self.chunk_size)
+
+    def expect(self, char, message):
+        if self.peek() != char:
+            raise self.error(message)
+        self.pos += 1
+
+    def value(self):
+        # Значение, которое не поместилось в буфер, разбирается заново после дочитывания;
+        # размер дочитываемого блока удваивается, так что общая работа линейна
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # Число, за которым в буфере нет разделителя, может продолжаться в следующем блоке
+                if self.eof or (end < len(self.buffer) and (
+                        not isinstance(value, (int, float)) or self.buffer[end] in JSON_DELIMITERS)):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._read(size)
+            size *= 2
+
+    def items(self):
+        # Пары ключ-значение объекта верхнего уровня в порядке файла
+        if self.peek() != '{':
+            sys.stderr.write("Ошибка: Входной JSON должен быть объектом.\n")
+            sys.exit(1)
+        self.pos += 1
+        if self.peek() == '}':
+            self.pos += 1
+        else:
+            while True:
+                if self.peek() != '"':
+                    raise self.error("Expecting property name enclosed in double quotes")
+                key = self.value()
+                self.expect(':', "Expecting ':' delimiter")
+                self.peek()
+                yield key, self.value()
+                if self.peek() == '}':
+                    self.pos += 1
+                    break
+                self.expect(',', "Expecting ',' delimiter")
+        if self.peek():
+            raise self.error("Extra data")
+
+def iter_json_items(file_path, chunk_size=STREAM_CHUNK_SIZE):
+    try:
+        f = open(file_path, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        sys.stderr.write(f"Ошибка: Файл '{file_path}' не найден.\n")
+        sys.exit(1)
+    with f:
+        try:
+            yield from JsonObjectReader(f, chunk_size).items()
+        except json.JSONDecodeError as e:
+            sys.stderr.write(f"Ошибка: Неверный JSON формат. {e}\n")
+            sys.exit(1)
+
 def validate_identifier(identifier):
     if not IDENTIFIER_REGEX.match(identifier):
         sys.stderr.write(f"Ошибка: Недопустимый идентификатор '{identifier}'.\n")
@@ -51,122 +172,451 @@ def escape_string(s):
     # Экранируем символы, если необходимо
     return s.replace(']]', ']]]]')  # Пример экранирования
 
-def evaluate_expression(expr, constants):
+# Требования к числу операндов: (наименьшее, наибольшее или None)
+ARITY = {
+    '+': (2, None),
+    '-': (2, None),
+    '*': (2, None),
+    '/': (2, None),
+    'concat': (1, None),
+    'ord': (1, 1),
+}
+
+class DeclaredBefore:
+    # Константы, объявленные в JSON раньше ключа с номером limit: только их подставляют операнды [[Имя]]
+    __slots__ = ('constants', 'positions', 'limit')
+
+    def __init__(self, constants, positions, limit):
+        self.constants = constants
+        self.positions = positions
+        self.limit = limit
+
+    def get(self, name, default=None):
+        if self.positions.get(name, self.limit) < self.limit:
+            return self.constants.get(name, default)
+        return default
+
+class Expression:
+    # Разобранное выражение: функция операции и список операндов-замыканий (constants, strings) -> значение.
+    # strings - константы, видимые операндам [[Имя]] (по умолчанию те же constants).
+    # references - имена констант, на которые ссылается выражение
+    __slots__ = ('source', 'operator', 'function', 'operands', 'references')
+
+    def __init__(self, source, operator_token, operands, references):
+        self.source = source
+        self.operator = operator_token
+        self.function = OPERATIONS[operator_token]
+        self.operands = operands
+        self.references = references
+
+    def evaluate(self, constants, strings=None):
+        if strings is None:
+            strings = constants
+        try:
+            return self.function(*[operand(constants, strings) for operand in self.operands])
+        except Exception as e:
+            sys.stderr.write(f"Ошибка при выполнении операции '{self.operator}': {e}\n")
+            sys.exit(1)
+
+def _constant_operand(name):
+    def operand(constants, strings):
+        if name not in constants:
+            sys.stderr.write(f"Ошибка: Неопределенная константа '{name}'.\n")
+            sys.exit(1)
+        return constants[name]
+    return operand
+
+def _string_operand(inner):
+    # [[Имя]] подставляет строковую константу с таким именем, иначе это строковый литерал
+    def operand(constants, strings):
+        value = strings.get(inner, inner)
+        return value if isinstance(value, str) else inner
+    return operand
+
+def _literal_operand(value):
+    return lambda constants, strings: value
+
+def operand_reference(operand):
+    # Имя константы, на которую ссылается операнд, или None для числа
+    if IDENTIFIER_REGEX.match(operand):
+        return operand
+    if operand.startswith('[[') and operand.endswith(']]'):
+        return operand[2:-2]
+    return None
+
+def expression_references(expr):
+    # Ссылки выражения без полного разбора: только токенизация
+    return [name for name in map(operand_reference, EXPR_TOKEN_REGEX.findall(expr)[1:]) if name is not None]
+
+def required_references(expr):
+    # Ссылки по имени без [[...]]: без этих констант выражение не вычислить
+    return [token for token in EXPR_TOKEN_REGEX.findall(expr)[1:] if IDENTIFIER_REGEX.match(token)]
+
+def _compile_operand(operand, references):
+    name = operand_reference(operand)
+    if name is not None:
+        references.append(name)
+        return _constant_operand(name) if name == operand else _string_operand(name)
+    try:
+        return _literal_operand(float(operand) if '.' in operand else int(operand))
+    except ValueError:
+        sys.stderr.write(f"Ошибка: Недопустимый операнд '{operand}'. Ожидалась константа, число или строка в формате [[строка]].\n")
+        sys.exit(1)
+
+@functools.lru_cache(maxsize=None)
+def compile_expression(expr):
+    # Выражение разбирается один раз; повторы того же текста берут готовый результат из кэша
     tokens = EXPR_TOKEN_REGEX.findall(expr)
     if not tokens:
         sys.stderr.write("Ошибка: Пустое выражение.\n")
         sys.exit(1)
-    
+
     operator_token = tokens[0]
-    operands = tokens[1:]
-    
     if operator_token not in OPERATIONS:
         sys.stderr.write(f"Ошибка: Неизвестный оператор или функция '{operator_token}'.\n")
         sys.exit(1)
-    
-    # Подготовка операндов
-    evaluated_operands = []
-    for operand in operands:
-        operand = operand.strip()
-        # Проверка, является ли операнд идентификатором
-        if IDENTIFIER_REGEX.match(operand):
-            if operand not in constants:
-                sys.stderr.write(f"Ошибка: Неопределенная константа '{operand}'.\n")
-                sys.exit(1)
-            evaluated_operands.append(constants[operand])
-        else:
-            # Попытка интерпретировать как число или строку
-            try:
-                if operand.startswith('[[') and operand.endswith(']]'):
-                    # Строковый операнд
-                    inner = operand[2:-2]
-                    if inner in constants and isinstance(constants[inner], str):
-                        evaluated_operands.append(constants[inner])
-                    else:
-                        evaluated_operands.append(inner)
-                elif '.' in operand:
-                    evaluated_operands.append(float(operand))
-                else:
-                    evaluated_operands.append(int(operand))
-            except ValueError:
-                sys.stderr.write(f"Ошибка: Недопустимый операнд '{operand}'. Ожидалась константа, число или строка в формате [[строка]].\n")
-                sys.exit(1)
-    
+
+    references = []
+    operands = [_compile_operand(operand, references) for operand in tokens[1:]]
+
     # Проверка количества операндов
-    if operator_token in ['+', '-', '*', '/']:
-        if len(evaluated_operands) < 2:
-            sys.stderr.write(f"Ошибка: Оператор '{operator_token}' требует как минимум два операнда.\n")
-            sys.exit(1)
-    elif operator_token == 'concat':
-        if len(evaluated_operands) < 1:
-            sys.stderr.write(f"Ошибка: Функция '{operator_token}' требует как минимум один аргумент.\n")
-            sys.exit(1)
-    elif operator_token == 'ord':
-        if len(evaluated_operands) != 1:
+    least, most = ARITY[operator_token]
+    if len(operands) < least or (most is not None and len(operands) > most):
+        if most == least:
             sys.stderr.write(f"Ошибка: Функция '{operator_token}' требует ровно один аргумент.\n")
-            sys.exit(1)
-    
-    # Выполнение операции
-    try:
-        result = OPERATIONS[operator_token](*evaluated_operands)
-        return result
-    except Exception as e:
-        sys.stderr.write(f"Ошибка при выполнении операции '{operator_token}': {e}\n")
+        elif operator_token == 'concat':
+            sys.stderr.write(f"Ошибка: Функция '{operator_token}' требует как минимум один аргумент.\n")
+        else:
+            sys.stderr.write(f"Ошибка: Оператор '{operator_token}' требует как минимум два операнда.\n")
         sys.exit(1)
+    return Expression(expr, operator_token, operands, tuple(references))
+
+def evaluate_expression(expr, constants, strings=None):
+    return compile_expression(expr).evaluate(constants, strings)
 
-def convert_value(value, constants):
+def match_expression(value):
+    # Текст выражения внутри ${...} или None, если значение не выражение
+    if not isinstance(value, str) or '${' not in value:
+        return None
+    expr_match = EXPR_REGEX.match(value.strip())
+    return expr_match.group(1).strip() if expr_match else None
+
+def format_result(value):
+    # Результат выражения: строки заключаются в [[...]], остальное выводится как есть
+    if isinstance(value, str):
+        return f"[[{escape_string(value)}]]"
+    return str(value)
+
+def convert_value(value, constants, strings=None):
     if isinstance(value, str):
-        expr_match = EXPR_REGEX.match(value.strip())
-        if expr_match:
-            # Проверка на строку и заключение в [[...]]
-            evaluated_value = evaluate_expression(expr_match.group(1).strip(), constants)
-            if isinstance(evaluated_value, str):
-                return f"[[{escape_string(evaluated_value)}]]"
-            return str(evaluated_value)
+        expr = match_expression(value)
+        if expr is not None:
+            return format_result(evaluate_expression(expr, constants, strings))
         return f"[[{escape_string(value)}]]"
     elif isinstance(value, (int, float)):
         return str(value)
     elif isinstance(value, list):
         # Рекурсивно обрабатываем массивы для поддержки вложенности
-        return f"#( {', '.join(str(convert_value(elem, constants)) for elem in value)} )"
+        return f"#( {', '.join(str(convert_value(elem, constants, strings)) for elem in value)} )"
     else:
         sys.stderr.write(f"Ошибка: Недопустимый тип значения '{value}'.\n")
         sys.exit(1)
 
-def convert_json_to_config(json_data):
-    if not isinstance(json_data, dict):
-        sys.stderr.write("Ошибка: Входной JSON должен быть объектом.\n")
-        sys.exit(1)
-    
-    constants = {}
-    config_lines = ["#("]
+def iter_config_lines(items, constants=None):
+    # Строки конфигурации по мере вычисления пар ключ-значение. Если constants уже вычислены
+    # (convert_json_to_config), выражения берутся из них, иначе вычисляются по порядку ключей.
+    # declared - константы ключей выше текущего, их видят операнды [[Имя]] в массивах
+    evaluated = constants is not None
+    if not evaluated:
+        constants = {}
+    declared = {} if evaluated else constants
+    yield "#("
     first = True
-    for key, value in json_data.items():
+    for key, value in items:
         if not first:
-            config_lines.append(",")
+            yield ","
         else:
             first = False
-        
-        # Преобразуем значение с учетом вложенных массивов и выражений
-        converted_value = convert_value(value, constants)
-        
-        # Проверка выражений и их вычисление
-        if isinstance(value, str) and EXPR_REGEX.match(value.strip()):
-            expr = EXPR_REGEX.match(value.strip()).group(1).strip()
-            evaluated_value = evaluate_expression(expr, constants)
-            constants[key] = evaluated_value
-            config_lines.append(f"#([[{key}]], {converted_value})")
+
+        # Выражение вычисляется один раз: результат идет и в вывод, и в константы
+        expr = match_expression(value)
+        if expr is not None:
+            if not evaluated:
+                constants[key] = evaluate_expression(expr, constants)
+            converted_value = format_result(constants[key])
+        else:
+            converted_value = convert_value(value, constants, declared)
+            # На массив можно сослаться только по имени-идентификатору, остальные не хранятся
+            if not evaluated and (not isinstance(value, list) or IDENTIFIER_REGEX.match(key)):
+                constants[key] = value
+        if evaluated and key in constants:
+            declared[key] = constants[key]
+        yield f"#([[{escape_string(key)}]], {converted_value})"
+    yield ")"
+
+def expression_dependencies(json_data, compile=True):
+    # Выражения верхнего уровня (ключ -> текст) и граф ссылок между ними: ключ -> ключи-выражения,
+    # от которых он зависит, и required - только обязательные из них (ссылки по имени).
+    # Ссылки на обычные значения не ограничивают порядок, они известны сразу. [[Ключ]] видит только
+    # ключи, объявленные выше, как и при вычислении по порядку; такая зависимость лишь задает порядок
+    # и в цикле отбрасывается. С compile=False ссылки находятся одной токенизацией,
+    # а разбор остается рабочим процессам
+    positions = {key: position for position, key in enumerate(json_data)}
+    expressions = {}
+    for key, value in json_data.items():
+        expr = match_expression(value)
+        if expr is not None:
+            expressions[key] = expr
+    references = {key: compile_expression(expr).references if compile else expression_references(expr)
+                  for key, expr in expressions.items()}
+    required = {key: [name for name in dict.fromkeys(required_references(expr)) if name in expressions]
+                for key, expr in expressions.items()}
+    dependencies = {key: [name for name in dict.fromkeys(names)
+                          if name in expressions and (name in required[key] or positions[name] < positions[key])]
+                    for key, names in references.items()}
+    return expressions, references, dependencies, required
+
+def find_cycle(start, dependencies, remaining):
+    # Идем по зависимостям, оставшимся невычисленными, пока не встретим узел повторно
+    path, positions = [], {}
+    node = start
+    while node not in positions:
+        positions[node] = len(path)
+        path.append(node)
+        node = next(name for name in dependencies[node] if name in remaining)
+    return path[positions[node]:] + [node]
+
+def topological_levels(dependencies, required=None):
+    # Алгоритм Кана по уровням: выражения одного уровня не зависят друг от друга.
+    # required - обязательные зависимости; остальные только задают порядок и отбрасываются
+    # у выражений, застрявших в цикле. Если остались невычислимые выражения, сообщаем о каждом
+    # цикле из обязательных ссылок (без required обязательны все)
+    dependents = {key: [] for key in dependencies}
+    missing = {}
+    for key, names in dependencies.items():
+        missing[key] = len(names)
+        for name in names:
+            dependents[name].append(key)
+    level = [key for key, count in missing.items() if count == 0]
+    levels = []
+    relaxed = required is None
+    while True:
+        while level:
+            levels.append(level)
+            next_level = []
+            for key in level:
+                for dependent in dependents[key]:
+                    missing[dependent] -= 1
+                    if missing[dependent] == 0:
+                        next_level.append(dependent)
+            level = next_level
+
+        remaining = {key for key, count in missing.items() if count > 0}
+        if not remaining or relaxed:
+            break
+        # Оставшиеся выражения ждут только обязательных зависимостей
+        relaxed = True
+        for key in remaining:
+            missing[key] = sum(name in remaining for name in required[key])
+            dependents[key] = [dependent for dependent in dependents[key] if key in required[dependent]]
+        level = [key for key in dependencies if key in remaining and missing[key] == 0]
+
+    if remaining:
+        # Из выражения, зависящего от цикла, путь приводит к уже найденному циклу
+        required = dependencies if required is None else required
+        reported = set()
+        for key in dependencies:
+            if key in remaining and key not in reported:
+                cycle = find_cycle(key, required, remaining)
+                if reported.isdisjoint(cycle):
+                    sys.stderr.write(f"Ошибка: Циклическая зависимость констант: {' -> '.join(cycle)}.\n")
+                reported.update(cycle)
+        sys.exit(1)
+    return levels
+
+def _evaluate_group(items, constants, positions):
+    # Вычисление группы выражений в рабочем процессе; items упорядочены топологически
+    results = {}
+    for key, expr in items:
+        strings = DeclaredBefore(constants, positions, positions[key])
+        results[key] = constants[key] = evaluate_expression(expr, constants, strings)
+    return results
+
+def _expression_groups(expressions, dependencies, levels):
+    # Слабо связные компоненты графа ссылок: независимые друг от друга группы выражений
+    parent = {key: key for key in expressions}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    for key, names in dependencies.items():
+        for name in names:
+            parent[find(key)] = find(name)
+    groups = {}
+    for level in levels:
+        for key in level:
+            groups.setdefault(find(key), []).append(key)
+    return list(groups.values())
+
+def evaluate_constants(json_data, workers=1):
+    # Все константы документа: выражения вычисляются в топологическом порядке ссылок,
+    # поэтому по имени можно ссылаться и на ключи, объявленные ниже. С workers > 1 независимые группы
+    # выражений разбираются и вычисляются в разных процессах
+    expressions, references, dependencies, required = expression_dependencies(json_data, compile=workers <= 1)
+    levels = topological_levels(dependencies, required)
+    positions = {key: position for position, key in enumerate(json_data)}
+    constants = {key: value for key, value in json_data.items() if key not in expressions}
+    groups = _expression_groups(expressions, dependencies, levels) if workers > 1 else []
+    if len(groups) < 2:
+        for level in levels:
+            for key in level:
+                strings = DeclaredBefore(constants, positions, positions[key])
+                constants[key] = evaluate_expression(expressions[key], constants, strings)
+        return constants
+
+    # Группы объединяются в пакеты, чтобы не пересылать по одной маленькой группе на процесс
+    batch_count = min(len(groups), workers * 4)
+    batches = [[] for _ in range(batch_count)]
+    for number, group in enumerate(sorted(groups, key=len, reverse=True)):
+        batches[number % batch_count].extend(group)
+    tasks = []
+    for batch in batches:
+        items = [(key, expressions[key]) for key in batch]
+        names = {name for key in batch for name in references[key] if name in constants}
+        tasks.append((items, {name: constants[name] for name in names},
+                       {name: positions[name] for name in names.union(batch)}))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(_evaluate_group, *zip(*tasks)):
+            constants.update(results)
+    return constants
+
+def convert_json_to_config(json_data, workers=1):
+    if not isinstance(json_data, dict):
+        sys.stderr.write("Ошибка: Входной JSON должен быть объектом.\n")
+        sys.exit(1)
+    constants = evaluate_constants(json_data, workers)
+    return '\n'.join(iter_config_lines(json_data.items(), constants))
+
+def write_config_stream(file_path, out):
+    # Потоковое преобразование: каждая запись выводится сразу после вычисления
+    for line in iter_config_lines(iter_json_items(file_path)):
+        out.write(line + '\n')
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def output_path(input_path):
+    return os.path.splitext(input_path)[0] + OUTPUT_SUFFIX
+
+def find_inputs(patterns, exclude=()):
+    # JSON-файлы из каталогов (рекурсивно), шаблонов и явно указанных путей, без повторов
+    exclude = {os.path.abspath(path) for path in exclude}
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(glob.glob(os.path.join(glob.escape(pattern), '**', '*.json'), recursive=True))
+        elif glob.has_magic(pattern):
+            paths.extend(glob.glob(pattern, recursive=True))
         else:
-            constants[key] = value
-            config_lines.append(f"#([[{key}]], {converted_value})")
+            paths.append(pattern)
+    paths = (os.path.abspath(path) for path in paths)
+    return sorted(set(path for path in paths if path not in exclude))
 
-    config_lines.append(")")
-    return '\n'.join(config_lines)
+def _write_atomic(path, text):
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def _convert_file(path):
+    # Преобразование одного файла в рабочем процессе. Ошибки конвертера завершают процесс через
+    # sys.exit, поэтому они перехватываются вместе с сообщением и возвращаются вызывающему;
+    # так же возвращаются ошибки чтения и записи (нет файла, не UTF-8), чтобы не прерывать весь пакет.
+    # Хэш берется до чтения: если файл изменится во время преобразования, следующий запуск это заметит
+    errors = io.StringIO()
+    try:
+        input_hash = file_hash(path)
+        with contextlib.redirect_stderr(errors):
+            text = convert_json_to_config(read_json(path)) + '\n'
+        _write_atomic(output_path(path), text)
+    except SystemExit:
+        return path, None, None, errors.getvalue().strip()
+    except Exception as e:
+        return path, None, None, f"Ошибка: {type(e).__name__}: {e}"
+    return path, input_hash, hashlib.sha256(text.encode('utf-8')).hexdigest(), None
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest['files']
+
+def _is_unchanged(path, entry):
+    # Файл пропускается, если не изменились ни он сам, ни записанный по нему результат.
+    # Недоступный файл считается измененным: ошибку сообщит его преобразование
+    try:
+        if entry is None or entry['input'] != file_hash(path):
+            return False
+        target = output_path(path)
+        return os.path.exists(target) and file_hash(target) == entry['output']
+    except OSError:
+        return False
+
+def convert_batch(patterns, workers=None, manifest_path=DEFAULT_MANIFEST):
+    # Пакетное преобразование в пуле процессов: результат каждого файла пишется рядом с ним,
+    # неизмененные с прошлого запуска файлы пропускаются по хэшам из манифеста
+    manifest = {path: entry for path, entry in load_manifest(manifest_path).items() if os.path.exists(path)}
+    paths = find_inputs(patterns, exclude=[manifest_path])
+    pending = [path for path in paths if not _is_unchanged(path, manifest.get(path))]
+    result = {'converted': [], 'skipped': sorted(set(paths) - set(pending)), 'failed': {}}
+    if pending:
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for path, input_hash, output_hash, error in executor.map(_convert_file, pending, chunksize=8):
+                if error is not None:
+                    result['failed'][path] = error
+                    manifest.pop(path, None)
+                else:
+                    result['converted'].append(path)
+                    manifest[path] = {'input': input_hash, 'output': output_hash}
+    _write_atomic(manifest_path, json.dumps({'version': MANIFEST_VERSION, 'files': manifest}, indent=2))
+    return result
+
+def run_batch(args):
+    result = convert_batch(args.batch, args.workers, args.manifest)
+    for path, error in result['failed'].items():
+        sys.stderr.write(f"{path}: {error}\n")
+    print(f"Преобразовано: {len(result['converted'])}, пропущено без изменений: {len(result['skipped'])}, "
+          f"с ошибками: {len(result['failed'])}")
+    if result['failed']:
+        sys.exit(1)
 
 def main():
     args = parse_arguments()
+    if args.batch:
+        run_batch(args)
+        return
+    if args.stream:
+        write_config_stream(args.input_file, sys.stdout)
+        return
     json_data = read_json(args.input_file)
-    config_output = convert_json_to_config(json_data)
+    config_output = convert_json_to_config(json_data, args.workers or 1)
     print(config_output)
 
 if __name__ == "__main__":
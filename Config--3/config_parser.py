@@ -0,0 +1,308 @@
+import argparse
+import json
+import random
+import re
+import sys
+import time
+
+# Пробельные символы между лексемами
+SPACE_REGEX = re.compile(r'[ \t\r\n]*')
+
+# Числа в том виде, в каком их выводит str(): целые, вещественные, inf и nan, а также True и False
+SCALAR_REGEX = re.compile(r'[-+]?(?:\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|inf|nan)|True|False')
+
+# Начало значения после пробелов: пустой массив, открытие массива, начало строки или число
+VALUE_REGEX = re.compile(r'[ \t\r\n]*(?:(#\([ \t\r\n]*\))|(#\()|(\[\[)|(' + SCALAR_REGEX.pattern + r'))')
+
+# Разделитель элементов массива или его конец
+SEPARATOR_REGEX = re.compile(r'[ \t\r\n]*([,)])')
+
+# Символы, из которых состоят числа, True и False
+SCALAR_CHARS_REGEX = re.compile(r'[-+.0-9a-zA-Z]*')
+
+# Размер блока, которым потоковый режим читает входной файл
+CHUNK_SIZE = 1 << 16
+
+class ConfigSyntaxError(ValueError):
+    # offset - позиция text в файле, если text - только прочитанный блок (потоковый режим)
+    def __init__(self, message, text, pos, offset=None):
+        if offset is None:
+            line = text.count('\n', 0, pos) + 1
+            column = pos - text.rfind('\n', 0, pos)
+            super().__init__(f"{message}: строка {line}, столбец {column}")
+        else:
+            super().__init__(f"{message}: символ {offset + pos + 1}")
+        self.message = message
+        self.pos = pos
+
+class _Incomplete(Exception):
+    # Разбор дошел до конца прочитанной части файла, нужно дочитать
+    pass
+
+def _scalar(token):
+    if token == 'True':
+        return True
+    if token == 'False':
+        return False
+    if '.' in token or 'e' in token or 'E' in token or 'n' in token:
+        return float(token)
+    return int(token)
+
+def _parse_string(text, pos, end, final=True):
+    # Строка [[...]]: escape_string удваивает каждую пару ]], поэтому серия из r скобок
+    # внутри строки имеет длину 4m или 4m + 1, а серия, которая закрывает строку, - 4m + 2 или 4m + 3.
+    # Серия у края блока может продолжаться в следующем блоке; в конце файла она окончательная
+    start = pos
+    parts = []
+    while True:
+        close = text.find(']]', pos, end)
+        if close < 0:
+            raise _Incomplete
+        run_end = close + 2
+        while run_end < end and text[run_end] == ']':
+            run_end += 1
+        if run_end >= end and not final:
+            raise _Incomplete
+        run = run_end - close
+        if run & 3 >= 2:
+            run -= 2
+            parts.append(text[start:close])
+            if run:
+                parts.append(']' * (run // 4 * 2 + (run & 3)))
+            return ''.join(parts), run_end
+        parts.append(text[start:close])
+        parts.append(']' * (run // 4 * 2 + (run & 3)))
+        start = pos = run_end
+
+def _value_error(text, pos, end, final):
+    # Значение не распознано: либо блок закончился посреди лексемы, либо это ошибка
+    pos = SPACE_REGEX.match(text, pos, end).end()
+    if pos >= end:
+        raise _Incomplete
+    # Число у края блока (или его начало, например '-') может продолжаться в следующем блоке
+    if not final and (text[pos] in '#[' and pos + 1 >= end or SCALAR_CHARS_REGEX.match(text, pos, end).end() >= end):
+        raise _Incomplete
+    raise ConfigSyntaxError("Ожидалось значение", text, pos)
+
+def parse_value(text, pos=0, end=None, final=True):
+    # Одно значение начиная с pos: число, строка [[...]] или массив #( ... ) любой вложенности.
+    # Текст просматривается один раз: каждая лексема распознается одним регулярным выражением,
+    # вложенность обрабатывается явным стеком, без рекурсии. Возвращает (значение, позиция после него).
+    # С final=False конец текста считается концом прочитанного блока, а не файла
+    if end is None:
+        end = len(text)
+    stack = []
+    while True:
+        match = VALUE_REGEX.match(text, pos, end)
+        if match is None or (match.lastindex == 4 and not final and
+                             SCALAR_CHARS_REGEX.match(text, match.end(), end).end() >= end):
+            _value_error(text, pos, end, final)
+        kind = match.lastindex
+        pos = match.end()
+        if kind == 2:
+            stack.append([])
+            continue
+        if kind == 3:
+            value, pos = _parse_string(text, pos, end, final)
+        elif kind == 4:
+            value = _scalar(match.group(4))
+        else:
+            value = []
+
+        # Готовое значение добавляется в массив верхнего уровня стека; закрытые массивы - в свои родительские
+        while stack:
+            stack[-1].append(value)
+            match = SEPARATOR_REGEX.match(text, pos, end)
+            if match is None:
+                pos = SPACE_REGEX.match(text, pos, end).end()
+                if pos >= end:
+                    raise _Incomplete
+                raise ConfigSyntaxError("Ожидалась ',' или ')'", text, pos)
+            pos = match.end()
+            if match.group(1) == ',':
+                break
+            value = stack.pop()
+        else:
+            return value, pos
+
+def _entry(value, text, pos):
+    # Запись конфигурации #([[ключ]], значение)
+    if not isinstance(value, list) or len(value) != 2 or not isinstance(value[0], str):
+        raise ConfigSyntaxError("Ожидалась запись #([[ключ]], значение)", text, pos)
+    return value[0], value[1]
+
+def loads(text):
+    # Весь документ #( #([[ключ]], значение), ... ) -> словарь
+    end = len(text)
+    pos = SPACE_REGEX.match(text).end()
+    if not text.startswith('#(', pos):
+        raise ConfigSyntaxError("Ожидалось '#('", text, pos)
+    pos = SPACE_REGEX.match(text, pos + 2).end()
+    result = {}
+    try:
+        if text.startswith(')', pos):
+            pos += 1
+        else:
+            while True:
+                start = pos
+                value, pos = parse_value(text, pos, end)
+                key, value = _entry(value, text, start)
+                result[key] = value
+                pos = SPACE_REGEX.match(text, pos).end()
+                if pos >= end:
+                    raise _Incomplete
+                pos += 1
+                if text[pos - 1] == ')':
+                    break
+                if text[pos - 1] != ',':
+                    raise ConfigSyntaxError("Ожидалась ',' или ')'", text, pos - 1)
+    except _Incomplete:
+        raise ConfigSyntaxError("Неожиданный конец файла", text, end) from None
+    pos = SPACE_REGEX.match(text, pos).end()
+    if pos < end:
+        raise ConfigSyntaxError("Лишние данные после конфигурации", text, pos)
+    return result
+
+def load(f):
+    return loads(f.read())
+
+class ConfigReader:
+    # Потоковое чтение: записи разбираются по одной, в буфере хранится только необработанный хвост файла.
+    # Запись, не поместившаяся в буфер, разбирается заново после дочитывания вдвое большего блока
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.file = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.offset = 0
+        self.eof = False
+
+    def _read(self, size):
+        chunk = self.file.read(size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.offset += self.pos
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+
+    def _error(self, message, pos=None):
+        return ConfigSyntaxError(message, self.buffer, self.pos if pos is None else pos, self.offset)
+
+    def peek(self):
+        # Два следующих значащих символа ('' в конце файла), этого хватает, чтобы узнать '#('
+        while True:
+            self.pos = SPACE_REGEX.match(self.buffer, self.pos).end()
+            if self.pos + 2 <= len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 2]
+            self._read(self.chunk_size)
+
+    def value(self):
+        size = self.chunk_size
+        while True:
+            try:
+                value, self.pos = parse_value(self.buffer, self.pos, final=self.eof)
+                return value
+            except _Incomplete:
+                if self.eof:
+                    raise self._error("Неожиданный конец файла", len(self.buffer)) from None
+            except ConfigSyntaxError as e:
+                raise self._error(e.message, e.pos) from None
+            self._read(size)
+            size *= 2
+
+    def items(self):
+        if not self.peek().startswith('#('):
+            raise self._error("Ожидалось '#('")
+        self.pos += 2
+        if self.peek().startswith(')'):
+            self.pos += 1
+        else:
+            while True:
+                start = self.offset + self.pos
+                value = self.value()
+                try:
+                    entry = _entry(value, self.buffer, self.pos)
+                except ConfigSyntaxError as e:
+                    raise self._error(e.message, start - self.offset) from None
+                yield entry
+                separator = self.peek()[:1]
+                if separator == ')':
+                    self.pos += 1
+                    break
+                if not separator:
+                    raise self._error("Неожиданный конец файла")
+                if separator != ',':
+                    raise self._error("Ожидалась ',' или ')'")
+                self.pos += 1
+        if self.peek():
+            raise self._error("Лишние данные после конфигурации")
+
+def iter_items(f, chunk_size=CHUNK_SIZE):
+    # Пары (ключ, значение) по мере чтения файла
+    return ConfigReader(f, chunk_size).items()
+
+def _benchmark_data(count, seed=0):
+    # Конфигурация из чисел, строк и вложенных массивов
+    rng = random.Random(seed)
+    data = {}
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            data[f"Int{i}"] = rng.randint(-10 ** 6, 10 ** 6)
+        elif kind == 1:
+            data[f"Float{i}"] = rng.random() * 1000
+        elif kind == 2:
+            data[f"Text{i}"] = f"value {i} ]] " * rng.randint(1, 4)
+        else:
+            data[f"List{i}"] = [rng.randint(0, 100), "item", [rng.random(), [i]]]
+    return data
+
+def benchmark(count=100000, repeat=3):
+    # Время разбора одних и тех же данных в формате конфигурации и в JSON
+    from config_language import convert_json_to_config
+    data = _benchmark_data(count)
+    config_text = convert_json_to_config(data)
+    json_text = json.dumps(data)
+    results = {}
+    for name, function, text in (("config_parser.loads", loads, config_text), ("json.loads", json.loads, json_text)):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            parsed = function(text)
+            best = min(best, time.perf_counter() - started)
+        assert parsed == data, f"{name}: результат отличается от исходных данных"
+        results[name] = (best, len(text))
+    return results
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Чтение учебного конфигурационного языка в JSON.')
+    parser.add_argument('input_file', nargs='?', help='Файл конфигурации, результат config_language.py.')
+    parser.add_argument('--stream', action='store_true', help='Читать записи по одной и выводить JSON построчно (по объекту на запись).')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Сравнить скорость разбора с json.loads на N записях.')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    if args.benchmark:
+        for name, (seconds, size) in benchmark(args.benchmark).items():
+            print(f"{name}: {seconds:.3f} с, {size / seconds / 1e6:.1f} МБ/с")
+        return
+    if args.input_file is None:
+        sys.stderr.write("Ошибка: Не указан файл конфигурации.\n")
+        sys.exit(1)
+    try:
+        with open(args.input_file, 'r', encoding='utf-8') as f:
+            if args.stream:
+                for key, value in iter_items(f):
+                    print(json.dumps({key: value}, ensure_ascii=False))
+            else:
+                print(json.dumps(load(f), ensure_ascii=False, indent=2))
+    except FileNotFoundError:
+        sys.stderr.write(f"Ошибка: Файл '{args.input_file}' не найден.\n")
+        sys.exit(1)
+    except ConfigSyntaxError as e:
+        sys.stderr.write(f"Ошибка: Неверный формат конфигурации. {e}\n")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
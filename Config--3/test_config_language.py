@@ -1,9 +1,11 @@
 import json
+import os
 import sys
+import tempfile
 from io import StringIO
 
 # Импортируем основную функцию main из файла config_language.py
-from config_language import main
+from config_language import main, compile_expression, convert_batch, convert_json_to_config, iter_config_lines, iter_json_items, topological_levels, write_config_stream
 
 def run_test(json_input, expected_output):
     # Перенаправляем stdout для захвата выходных данных
@@ -184,6 +186,185 @@ def test_deeply_nested_arrays():
     print("Тест 8: Глубоко вложенные массивы с выражениями")
     run_test(json_input, expected_output)
 
+def test_compiled_expressions():
+    print("Тест 9: Однократный разбор выражений")
+    # Одинаковый текст выражения разбирается один раз и вычисляется с разными константами
+    expression = compile_expression("+ Base 1")
+    assert compile_expression("+ Base 1") is expression, "Ошибка в compile_expression: выражение разобрано повторно"
+    assert expression.references == ("Base",), "Ошибка в compile_expression: неверные ссылки на константы"
+    assert expression.evaluate({"Base": 1}) == 2 and expression.evaluate({"Base": 10}) == 11, "Ошибка в Expression.evaluate"
+
+    # Каждое выражение верхнего уровня вычисляется один раз
+    compile_expression.cache_clear()
+    json_input = {"Base": 0}
+    for i in range(20000):
+        json_input[f"Key{i}"] = "${+ Base 1}"
+    output = convert_json_to_config(json_input)
+    assert output.count("#([[Key") == 20000, "Ошибка в convert_json_to_config: потеряны ключи"
+    assert compile_expression.cache_info().misses == 1, "Ошибка в convert_json_to_config: выражение разобрано повторно"
+    print("Тест пройден")
+
+def test_streaming_conversion():
+    print("Тест 10: Потоковое преобразование")
+    json_input = {
+        "Base": 12345,
+        "Ratio": 0.5,
+        "Name": "Склад ]] \"A\"",
+        "Sum": "${+ Base 1}",
+        "Scaled": "${* Ratio Base}",
+        "Values": [1, [2.5, "x"], "${concat [[Name]] [[!]]}"],
+        "Empty": [],
+    }
+    expected_output = convert_json_to_config(json_input)
+    fd, path = tempfile.mkstemp(suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(json_input, f, ensure_ascii=False, indent=2)
+        # Маленькие блоки проверяют значения и числа, разрезанные границей блока
+        for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+            output = '\n'.join(iter_config_lines(iter_json_items(path, chunk_size)))
+            assert output == expected_output, f"Ошибка в iter_json_items: неверный результат при блоке {chunk_size}"
+
+        for text in ('[1, 2]', '{"A": 1', '{"A": 1,}', '{"A" 1}', '{"A": 1} 2'):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            old_stderr, sys.stderr = sys.stderr, StringIO()
+            try:
+                list(iter_json_items(path, 2))
+                assert False, f"Ошибка в iter_json_items: не обнаружена ошибка в {text}"
+            except SystemExit as e:
+                assert e.code == 1, "Ошибка в iter_json_items: неверный код выхода"
+            finally:
+                sys.stderr = old_stderr
+    finally:
+        os.remove(path)
+    print("Тест пройден")
+
+def test_dependency_order():
+    print("Тест 11: Порядок вычисления по зависимостям")
+    # Ссылки по имени на ключи, объявленные ниже, вычисляются в топологическом порядке;
+    # [[Имя]] видит только ключи выше, как и при вычислении по порядку
+    json_input = {
+        "Total": "${+ Subtotal Tax}",
+        "Subtotal": "${* Price 3}",
+        "Tax": 5,
+        "Price": 10,
+        "Label": "${concat [[Name]] [[:]]}",
+        "Name": "${concat [[Item]]}",
+        "Caption": "${concat [[Name]] [[!]]}",
+        "Summary": ["${+ Total 1}", "${concat [[Label]]}"],
+    }
+    expected_output = """
+#(
+#([[Total]], 35),
+#([[Subtotal]], 30),
+#([[Tax]], 5),
+#([[Price]], 10),
+#([[Label]], [[Name:]]),
+#([[Name]], [[Item]]),
+#([[Caption]], [[Item!]]),
+#([[Summary]], #( 36, [[Name:]] ))
+)
+"""
+    output = convert_json_to_config(json_input)
+    assert output.replace("\n", "").replace(" ", "") == expected_output.replace("\n", "").replace(" ", ""), "Ошибка в convert_json_to_config: неверный порядок вычисления"
+    assert topological_levels({"A": ["B"], "B": [], "C": ["A", "B"]}) == [["B"], ["A"], ["C"]], "Ошибка в topological_levels"
+
+    # Каждый цикл указывается целиком, зависящие от цикла ключи не считаются отдельными циклами
+    old_stderr, sys.stderr = sys.stderr, StringIO()
+    try:
+        convert_json_to_config({"A": "${+ B 1}", "B": "${+ C 1}", "C": "${+ A 1}", "D": "${+ A 1}", "E": "${+ E 1}"})
+        assert False, "Ошибка в convert_json_to_config: цикл не обнаружен"
+    except SystemExit:
+        errors = sys.stderr.getvalue()
+    finally:
+        sys.stderr = old_stderr
+    assert errors.splitlines() == [
+        "Ошибка: Циклическая зависимость констант: A -> B -> C -> A.",
+        "Ошибка: Циклическая зависимость констант: E -> E.",
+    ], "Ошибка в convert_json_to_config: неверное сообщение о цикле"
+
+    # Строка [[Имя]] не обязательная ссылка: на себя и друг на друга она не образует цикла
+    output = convert_json_to_config({"name": "${concat [[name]] [[_x]]}"})
+    assert output.replace("\n", "") == "#(#([[name]], [[name_x]]))", "Ошибка в convert_json_to_config: строка с именем ключа принята за цикл"
+    output = convert_json_to_config({"A": "${concat [[B]] [[!]]}", "B": "${concat [[A]] [[?]]}", "C": "${concat B [[.]]}"})
+    assert output.replace("\n", "") == "#(#([[A]], [[B!]]),#([[B]], [[B!?]]),#([[C]], [[B!?.]]))", "Ошибка в convert_json_to_config: взаимные строки приняты за цикл"
+
+    # Обычный и потоковый режимы одинаково понимают [[Имя]] для ключа, объявленного ниже
+    json_input = {"Greeting": "${concat [[Hello]] [[World]]}", "World": "earth", "Nested": ["${concat [[World]] [[Later]]}"], "Later": "x"}
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as f:
+        json.dump(json_input, f)
+    try:
+        stream = StringIO()
+        write_config_stream(f.name, stream)
+    finally:
+        os.remove(f.name)
+    output = convert_json_to_config(json_input)
+    assert output + "\n" == stream.getvalue(), "Ошибка в convert_json_to_config: результат отличается от потокового режима"
+    assert "#([[Greeting]], [[HelloWorld]])" in output, "Ошибка в convert_json_to_config: [[Имя]] взял значение ключа ниже"
+
+    # Независимые группы выражений вычисляются в нескольких процессах с тем же результатом
+    json_input = {}
+    for i in range(200):
+        json_input[f"Base{i}"] = i
+        json_input[f"Double{i}"] = f"${{* Half{i} 4}}"
+        json_input[f"Half{i}"] = f"${{+ Base{i} 1}}"
+        json_input[f"Text{i}"] = f"${{concat [[Base{i}]] [[-]] [[Double{i}]]}}"
+    assert convert_json_to_config(json_input, workers=2) == convert_json_to_config(json_input), "Ошибка в convert_json_to_config: параллельный результат отличается"
+    print("Тест пройден")
+
+def test_batch_conversion():
+    print("Тест 12: Пакетное преобразование")
+    with tempfile.TemporaryDirectory() as directory:
+        inputs = {
+            os.path.join(directory, "a.json"): {"Base": 1, "Next": "${+ Base 1}"},
+            os.path.join(directory, "nested", "b.json"): {"Name": "b"},
+            os.path.join(directory, "nested", "c.json"): {"Count": 3},
+        }
+        for path, data in inputs.items():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+        broken = os.path.join(directory, "broken.json")
+        with open(broken, "w", encoding="utf-8") as f:
+            json.dump({"Sum": "${+ Missing 1}"}, f)
+        manifest = os.path.join(directory, "manifest.json")
+
+        # Каталог обходится рекурсивно, результат пишется рядом с каждым файлом
+        result = convert_batch([directory], workers=2, manifest_path=manifest)
+        assert sorted(result["converted"]) == sorted(inputs), "Ошибка в convert_batch: преобразованы не все файлы"
+        assert list(result["failed"]) == [broken], "Ошибка в convert_batch: ошибка не обнаружена"
+        assert "Неопределенная константа 'Missing'" in result["failed"][broken], "Ошибка в convert_batch: потеряно сообщение об ошибке"
+        for path, data in inputs.items():
+            with open(path[:-len(".json")] + ".txt", encoding="utf-8") as f:
+                assert f.read() == convert_json_to_config(data) + "\n", f"Ошибка в convert_batch: неверный результат для {path}"
+
+        # Повторный запуск пропускает неизмененные файлы, файл с ошибкой пробует снова
+        result = convert_batch([directory], workers=2, manifest_path=manifest)
+        assert result["converted"] == [] and sorted(result["skipped"]) == sorted(inputs), "Ошибка в convert_batch: файлы не пропущены"
+        assert list(result["failed"]) == [broken], "Ошибка в convert_batch: файл с ошибкой пропущен"
+
+        # Измененный вход и удаленный результат преобразуются заново; шаблон выбирает часть файлов
+        changed, removed = os.path.join(directory, "a.json"), os.path.join(directory, "nested", "c.txt")
+        with open(changed, "w", encoding="utf-8") as f:
+            json.dump({"Base": 5, "Next": "${+ Base 1}"}, f)
+        os.remove(removed)
+        result = convert_batch([os.path.join(directory, "**", "[ac].json")], manifest_path=manifest)
+        assert sorted(result["converted"]) == sorted([changed, removed[:-len(".txt")] + ".json"]), "Ошибка в convert_batch: изменения не обнаружены"
+        with open(changed[:-len(".json")] + ".txt", encoding="utf-8") as f:
+            assert "#([[Next]], 6)" in f.read(), "Ошибка в convert_batch: результат не обновлен"
+
+        # Файл не в UTF-8 и отсутствующий файл попадают в ошибки, остальные преобразуются, манифест пишется
+        binary, missing = os.path.join(directory, "binary.json"), os.path.join(directory, "missing.json")
+        with open(binary, "wb") as f:
+            f.write(b'{"Name": "\xff"}')
+        os.remove(manifest)
+        result = convert_batch([directory, missing], manifest_path=manifest)
+        assert sorted(result["failed"]) == sorted([binary, broken, missing]), "Ошибка в convert_batch: ошибки чтения не перехвачены"
+        assert sorted(result["converted"]) == sorted(inputs), "Ошибка в convert_batch: соседние файлы не преобразованы"
+        assert os.path.exists(manifest), "Ошибка в convert_batch: манифест не записан"
+    print("Тест пройден")
+
 # Запуск всех тестов
 if __name__ == "__main__":
     test_simple_expression()
@@ -194,3 +375,7 @@ if __name__ == "__main__":
     test_game_character_config()
     test_nested_array_config()  # Тест для вложенных массивов
     test_deeply_nested_arrays()  # Тест для глубокой вложенности
+    test_compiled_expressions()
+    test_streaming_conversion()
+    test_dependency_order()
+    test_batch_conversion()
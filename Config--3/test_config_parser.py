@@ -0,0 +1,87 @@
+import io
+import random
+
+from config_language import convert_json_to_config
+from config_parser import ConfigSyntaxError, benchmark, iter_items, loads, parse_value
+
+def random_value(rng, depth=0):
+    kind = rng.randrange(6 if depth < 4 else 4)
+    if kind == 0:
+        return rng.randint(-10 ** 20, 10 ** 20)
+    if kind == 1:
+        return rng.choice([rng.random() * 10 ** rng.randint(-10, 10), -0.0, 1e-07, 1.5e+300, True, False])
+    if kind in (2, 3):
+        # Строки из скобок, пробелов и переводов строк проверяют экранирование ]]
+        return ''.join(rng.choice(['a', ' ', ']', ']]', '[', '[[', '\n', 'я', ',', ')', '#(']) for _ in range(rng.randint(0, 8)))
+    return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+
+def random_config(rng, count):
+    return {f"Key{i}{random_value(rng, 4) if i % 3 == 0 else ''}": random_value(rng) for i in range(count)}
+
+def test_round_trip():
+    print("Тест 1: Обратное преобразование")
+    rng = random.Random(0)
+    for _ in range(200):
+        data = random_config(rng, rng.randint(0, 10))
+        text = convert_json_to_config(data)
+        assert loads(text) == data, f"Ошибка в loads: данные не совпадают для {data!r}"
+        assert dict(iter_items(io.StringIO(text), rng.randint(1, 16))) == data, f"Ошибка в iter_items: данные не совпадают для {data!r}"
+
+    # Выражения читаются вычисленными
+    text = convert_json_to_config({"Base": 2, "Sum": "${+ Base 1}", "Text": "${concat [[a]] [[b]]}"})
+    assert loads(text) == {"Base": 2, "Sum": 3, "Text": "ab"}, "Ошибка в loads: неверные значения выражений"
+
+    # Строка, которая заканчивается вместе с текстом
+    assert parse_value('[[abc]]') == ('abc', 7), "Ошибка в parse_value: строка в конце текста"
+    assert parse_value('[[a]]]') == ('a]', 6), "Ошибка в parse_value: скобка в конце строки"
+    print("Тест пройден")
+
+def test_nested_arrays():
+    print("Тест 2: Глубокая вложенность")
+    # Вложенность разбирается без рекурсии
+    depth = 10000
+    text = "#( #([[Deep]], " + "#( " * depth + "1" + " )" * depth + ") )"
+    value = loads(text)["Deep"]
+    for _ in range(depth):
+        assert isinstance(value, list) and len(value) == 1, "Ошибка в loads: неверная вложенность"
+        value = value[0]
+    assert value == 1, "Ошибка в loads: потеряно значение"
+    assert loads("#( #([[Empty]], #(  )), #([[Pair]], #( #( ), #( 2 ) )) )") == {"Empty": [], "Pair": [[], [2]]}, "Ошибка в loads: пустые массивы"
+    print("Тест пройден")
+
+def test_syntax_errors():
+    print("Тест 3: Синтаксические ошибки")
+    cases = {
+        "#( #([[A]], 1) ": "Неожиданный конец файла",
+        "#( #([[A]] 1) )": "Ожидалась ',' или ')'",
+        "#( #(1, 2) )": "Ожидалась запись",
+        "#( ) x": "Лишние данные",
+        "#( #([[A]], @) )": "Ожидалось значение",
+        "#( #([[A]], [[открытая строка) )": "Неожиданный конец файла",
+        "x": "Ожидалось '#('",
+    }
+    for text, message in cases.items():
+        for parse in (loads, lambda text: list(iter_items(io.StringIO(text), 2))):
+            try:
+                parse(text)
+                assert False, f"Ошибка в разборе: не обнаружена ошибка в {text!r}"
+            except ConfigSyntaxError as e:
+                assert message in str(e), f"Ошибка в разборе: неверное сообщение '{e}' для {text!r}"
+    try:
+        loads("#(\n#([[A]], 1)\n,\n#([[B]] 2)\n)")
+    except ConfigSyntaxError as e:
+        assert "строка 4, столбец 9" in str(e), f"Ошибка в ConfigSyntaxError: неверная позиция '{e}'"
+    print("Тест пройден")
+
+def test_benchmark():
+    print("Тест 4: Сравнение с json.loads")
+    results = benchmark(1000, repeat=1)
+    assert set(results) == {"config_parser.loads", "json.loads"}, "Ошибка в benchmark"
+    print("Тест пройден")
+
+# Запуск всех тестов
+if __name__ == "__main__":
+    test_round_trip()
+    test_nested_arrays()
+    test_syntax_errors()
+    test_benchmark()